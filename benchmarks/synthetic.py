@@ -0,0 +1,60 @@
+"""Generate synthetic MILC programs for benchmarking.
+"""
+from pathlib import Path
+from typing import List
+
+APP_HEADER = '''#!/usr/bin/env python3
+"""Synthetic MILC program with {subcommands} subcommands.
+
+PYTHON_ARGCOMPLETE_OK
+"""
+from milc import cli
+
+cli.milc_options(name='synthetic', version='1.0.0', batch_argument=True)
+
+
+@cli.argument('-n', '--name', default='World', help='Name to greet.')
+@cli.entrypoint('Synthetic benchmark program.')
+def main(cli):
+    cli.echo('Hello, %s!', cli.config.general.name)
+'''
+
+SUBCOMMAND = '''
+
+{arguments}@cli.subcommand('Synthetic subcommand {index}.'{parent})
+def {function}(cli):
+    cli.echo('{function}')
+'''
+
+ARGUMENT = "@cli.argument('--option-{index}', default='{index}', help='Synthetic option {index}.')\n"
+
+
+def write_app(path: Path, subcommands: int, arguments: int = 1, depth: int = 1) -> Path:
+    """Write a synthetic MILC program with `subcommands` subcommands that each take `arguments` flags.
+
+    When `depth` is more than 1 the subcommands are nested up to `depth` levels deep, like nested_example. Subcommand `i` sits at level `i % depth`, under the most recent subcommand on the level above it.
+    """
+    source = [APP_HEADER.format(subcommands=subcommands)]
+    argument_source = ''.join(ARGUMENT.format(index=index) for index in range(arguments))
+    parents: List[str] = []
+
+    for index in range(subcommands):
+        function = f'sub_{index}'
+        level = index % depth
+        parent = f', parent={parents[level - 1]}' if level else ''
+        parents[level:] = [function]
+
+        source.append(SUBCOMMAND.format(arguments=argument_source, index=index, parent=parent, function=function))
+
+    source.append("\n\nif __name__ == '__main__':\n    cli()\n")
+    path.write_text(''.join(source))
+
+    return path
+
+
+def deepest_path(subcommands: int, depth: int = 1) -> List[str]:
+    """Returns the command line tokens for the deepest subcommand `write_app()` generates.
+    """
+    levels = min(subcommands, depth)
+
+    return [f'sub-{index}' for index in range(levels)]
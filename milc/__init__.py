@@ -26,5 +26,18 @@ from .milc_interface import MILCInterface
 
 cli = MILCInterface()
 
-# Extra stuff people can import
-from ._sparkline import sparkline  # noqa
+
+def __getattr__(name: str) -> Any:
+    """Import the extra stuff people can import from milc the first time it's used.
+    """
+    if name == 'sparkline':
+        from ._sparkline import sparkline
+
+        return sparkline
+
+    if name == 'ConfigBackend':
+        from ._config_backends import ConfigBackend
+
+        return ConfigBackend
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
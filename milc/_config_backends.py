@@ -0,0 +1,375 @@
+"""Read and write config files in different formats, chosen by the file extension.
+
+INI files are parsed with RawConfigParser and have their values converted to the type of the argument they belong to, or by sniffing the strings when there's no argument. TOML and JSON files have native types, so only their string values are converted. SQLite databases store one row per option, so single sections and options can be read and written without loading the whole file.
+
+Every backend returns the same `{section: {option: value}}` dictionaries, with nested tables flattened into dotted section names such as `remote.add`.
+"""
+import json
+import sys
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from ._config_writer import apply_changes, config_file_lock, update_config_file, write_config_text
+from .configuration import ConfigTypes, _coerce_config_sections, _index_config_file, _parse_ini_file
+
+if TYPE_CHECKING:
+    import sqlite3
+
+Sections = Dict[str, Dict[str, Any]]
+Changes = Dict[Tuple[str, str], Any]
+
+
+def flatten_sections(tables: Dict[str, Any], prefix: str = '') -> Sections:
+    """Returns the options in nested `tables` as flat sections with dotted names.
+
+    Options at the top level, outside of any table, are ignored the same as options before the first section of an INI file.
+    """
+    sections: Sections = {}
+
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            continue
+
+        section = prefix + name
+        options = {option: value for option, value in table.items() if not isinstance(value, dict) and value is not None}
+
+        if options or not any(isinstance(value, dict) for value in table.values()):
+            sections[section] = options
+
+        sections.update(flatten_sections(table, section + '.'))
+
+    return sections
+
+
+def nest_sections(sections: Sections) -> Dict[str, Any]:
+    """Returns flat sections with dotted names as nested tables.
+    """
+    tables: Dict[str, Any] = {}
+
+    for section, options in sections.items():
+        table = tables
+
+        for part in section.split('.'):
+            table = table.setdefault(part, {})
+
+        table.update(options)
+
+    return tables
+
+
+def native_value(value: Any) -> Any:
+    """Returns `value` as a type that JSON and TOML can store.
+
+    Decimals are written as strings, since converting them to floats could change their value.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+
+    if value is None or isinstance(value, (bool, int, float, str, list)):
+        return value
+
+    return str(value)
+
+
+class ConfigBackend(ABC):
+    """Reads and writes one config file format.
+
+    Subclass this and pass it to `cli.register_config_backend()` to support another format. Subclasses must implement `read()` and `write()`.
+    """
+    @abstractmethod
+    def read(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Sections:
+        """Returns the sections of `config_file`, or an empty dictionary if it doesn't exist.
+
+        Values that are read as strings should be converted using `types`, the type of the argument for each section and option.
+        """
+
+    def sections(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """Returns a function for each section of `config_file` that returns its options.
+
+        Backends that can read one section at a time override this, the default reads the whole file.
+        """
+        sections = self.read(config_file, types)
+
+        return {section: partial(sections.__getitem__, section) for section in sections}
+
+    @abstractmethod
+    def write(self, config_file: Path, changes: Changes, fsync: str = 'never', replace: bool = False) -> bool:
+        """Apply `changes` to `config_file`, removing options whose value is None. Returns False when nothing needed to be written.
+
+        When `replace` is True options that aren't in `changes` are removed as well.
+        """
+
+
+class IniBackend(ConfigBackend):
+    """INI files, edited in place so comments and formatting are kept.
+    """
+    def read(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Sections:
+        return _parse_ini_file(config_file, types)
+
+    def sections(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        return _index_config_file(config_file, types)
+
+    def write(self, config_file: Path, changes: Changes, fsync: str = 'never', replace: bool = False) -> bool:
+        def edit(document: Any) -> None:
+            if replace:
+                for section, option in set(document.options) - set(changes):
+                    document.remove(section, option)
+
+            apply_changes(document, changes)
+
+        return update_config_file(config_file, edit, fsync)
+
+
+class DocumentBackend(ConfigBackend):
+    """Formats with native types that are read and written as a whole, such as JSON and TOML.
+
+    Subclasses implement `loads()` and `dumps()`.
+    """
+    @abstractmethod
+    def loads(self, text: str) -> Dict[str, Any]:
+        """Returns the nested tables in `text`.
+        """
+
+    @abstractmethod
+    def dumps(self, tables: Dict[str, Any]) -> str:
+        """Returns nested `tables` as text.
+        """
+
+    def read(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Sections:
+        try:
+            text = config_file.read_text()
+
+        except FileNotFoundError:
+            return {}
+
+        return _coerce_config_sections(flatten_sections(self.loads(text)), types) if text.strip() else {}
+
+    def write(self, config_file: Path, changes: Changes, fsync: str = 'never', replace: bool = False) -> bool:
+        with config_file_lock(config_file):
+            try:
+                old_text = config_file.read_text()
+
+            except FileNotFoundError:
+                old_text = ''
+
+            sections = {} if replace or not old_text.strip() else flatten_sections(self.loads(old_text))
+
+            for (section, option), value in changes.items():
+                if value is None:
+                    sections.get(section, {}).pop(option, None)
+                else:
+                    sections.setdefault(section, {})[option] = native_value(value)
+
+            new_text = self.dumps(nest_sections({section: options for section, options in sections.items() if options}))
+
+            if new_text == old_text:
+                return False
+
+            write_config_text(config_file, new_text, fsync)
+
+        return True
+
+
+class JsonBackend(DocumentBackend):
+    """JSON files, with a top level object for each section.
+    """
+    def loads(self, text: str) -> Dict[str, Any]:
+        return json.loads(text)  # type: ignore[no-any-return]
+
+    def dumps(self, tables: Dict[str, Any]) -> str:
+        return json.dumps(tables, indent=4) + '\n'
+
+
+class TomlBackend(DocumentBackend):
+    """TOML files, with a table for each section.
+
+    Reading TOML needs Python 3.11 or the `tomli` package. Writing is done by MILC, and supports the strings, numbers, booleans and lists config values are made of.
+    """
+    def loads(self, text: str) -> Dict[str, Any]:
+        if sys.version_info >= (3, 11):
+            import tomllib
+
+            return tomllib.loads(text)
+
+        try:
+            import tomli
+
+        except ImportError:
+            raise RuntimeError('Reading TOML config files needs Python 3.11 or newer, or the tomli package.')
+
+        return tomli.loads(text)  # type: ignore[no-any-return]
+
+    def dumps(self, tables: Dict[str, Any], prefix: str = '') -> str:
+        lines = []
+        options = {key: value for key, value in tables.items() if not isinstance(value, dict)}
+        subtables = {key: value for key, value in tables.items() if isinstance(value, dict)}
+
+        if prefix and (options or not subtables):
+            lines.append(f'[{prefix}]\n')
+
+        for option, value in options.items():
+            lines.append(f'{toml_key(option)} = {toml_value(value)}\n')
+
+        text = ''.join(lines)
+
+        for name, table in subtables.items():
+            subtable_text = self.dumps(table, f'{prefix}.{toml_key(name)}' if prefix else toml_key(name))
+            text = f'{text}\n{subtable_text}' if text else subtable_text
+
+        return text
+
+
+def toml_key(key: str) -> str:
+    """Returns `key` quoted if it isn't a bare TOML key.
+    """
+    if key and all(character.isascii() and (character.isalnum() or character in '-_') for character in key):
+        return key
+
+    return json.dumps(key)
+
+
+def toml_value(value: Any) -> str:
+    """Returns `value` as a TOML value.
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+
+    if isinstance(value, (int, float)):
+        return repr(value)
+
+    if isinstance(value, list):
+        return '[' + ', '.join(toml_value(item) for item in value) + ']'
+
+    return json.dumps(str(value))
+
+
+class SqliteBackend(ConfigBackend):
+    """SQLite databases for large, machine-managed configs.
+
+    Options are stored one per row with a JSON encoded value, indexed by section and option, so reading a section or writing a few options doesn't touch the rest of the database. SQLite handles locking between processes itself.
+    """
+    def connect(self, config_file: Path, read_only: bool = False) -> 'sqlite3.Connection':
+        """Returns a connection to `config_file`, creating the config table if needed.
+        """
+        import sqlite3
+
+        if read_only:
+            return sqlite3.connect(config_file.resolve().as_uri() + '?mode=ro', uri=True, timeout=30)
+
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(config_file), timeout=30, isolation_level=None)
+        connection.execute('CREATE TABLE IF NOT EXISTS config (section TEXT NOT NULL, option TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (section, option))')
+
+        return connection
+
+    def query(self, config_file: Path, sql: str, *parameters: Any) -> Sections:
+        """Called by self.read and self.read_section: Returns the (section, option, value) rows selected by `sql` as sections.
+        """
+        import sqlite3
+
+        sections: Sections = {}
+
+        if not config_file.exists():
+            return sections
+
+        connection = self.connect(config_file, read_only=True)
+
+        try:
+            for section, option, value in connection.execute(sql, parameters):
+                sections.setdefault(section, {})[option] = json.loads(value)
+
+        except sqlite3.OperationalError:
+            # The database doesn't have a config table yet
+            return {}
+
+        finally:
+            connection.close()
+
+        return sections
+
+    def read(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Sections:
+        return _coerce_config_sections(self.query(config_file, 'SELECT section, option, value FROM config'), types)
+
+    def read_section(self, config_file: Path, section: str, types: Optional[ConfigTypes] = None) -> Dict[str, Any]:
+        """Returns the options in `section`.
+        """
+        return _coerce_config_sections(self.query(config_file, 'SELECT section, option, value FROM config WHERE section = ?', section), types).get(section, {})
+
+    def sections(self, config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        import sqlite3
+
+        if not config_file.exists():
+            return {}
+
+        connection = self.connect(config_file, read_only=True)
+
+        try:
+            names = [section for section, in connection.execute('SELECT DISTINCT section FROM config')]
+
+        except sqlite3.OperationalError:
+            return {}
+
+        finally:
+            connection.close()
+
+        return {section: partial(self.read_section, config_file, section, types) for section in names}
+
+    def write(self, config_file: Path, changes: Changes, fsync: str = 'never', replace: bool = False) -> bool:
+        connection = self.connect(config_file)
+
+        try:
+            connection.execute('PRAGMA synchronous = ' + ('NORMAL' if fsync == 'never' else 'FULL'))
+            connection.execute('BEGIN IMMEDIATE')
+            total_changes = connection.total_changes
+
+            if replace:
+                for section, option in connection.execute('SELECT section, option FROM config').fetchall():
+                    if (section, option) not in changes:
+                        connection.execute('DELETE FROM config WHERE section = ? AND option = ?', (section, option))
+
+            for (section, option), value in changes.items():
+                if value is None:
+                    connection.execute('DELETE FROM config WHERE section = ? AND option = ?', (section, option))
+                else:
+                    connection.execute(
+                        'INSERT INTO config (section, option, value) VALUES (?, ?, ?) ON CONFLICT (section, option) DO UPDATE SET value = excluded.value WHERE value != excluded.value',
+                        (section, option, json.dumps(native_value(value))),
+                    )
+
+            connection.execute('COMMIT')
+
+            return connection.total_changes != total_changes
+
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+
+            raise
+
+        finally:
+            connection.close()
+
+
+CONFIG_BACKENDS: Dict[str, ConfigBackend] = {
+    '.ini': IniBackend(),
+    '.json': JsonBackend(),
+    '.toml': TomlBackend(),
+    '.sqlite': SqliteBackend(),
+    '.sqlite3': SqliteBackend(),
+    '.db': SqliteBackend(),
+}
+
+
+def config_backend(config_file: Path) -> ConfigBackend:
+    """Returns the backend for `config_file`'s extension. Files with other extensions are read as INI.
+    """
+    return CONFIG_BACKENDS.get(config_file.suffix.lower(), CONFIG_BACKENDS['.ini'])
+
+
+def register_config_backend(extension: str, backend: ConfigBackend) -> None:
+    """Use `backend` for config files ending in `extension`, such as `.yaml`. This changes CONFIG_BACKENDS, which is shared by every MILC instance in the process.
+    """
+    CONFIG_BACKENDS[extension.lower() if extension.startswith('.') else '.' + extension.lower()] = backend
@@ -0,0 +1,88 @@
+"""Cache parsed configuration files so unchanged files don't have to be parsed again.
+
+The cache is a pickle in the user cache directory holding the type-coerced sections of each config file. It is only used when the MILC version and the argument types values were converted with match, and every config file still has the path, size, mtime and inode that were recorded.
+"""
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+CONFIG_CACHE_FORMAT = 2
+
+FileKey = Tuple[str, Optional[int], Optional[int], Optional[int]]
+Sections = Dict[str, Dict[str, Any]]
+TypesKey = Tuple[Tuple[str, str, str], ...]
+
+
+def config_file_keys(config_files: Sequence[Path]) -> List[FileKey]:
+    """Returns the (path, size, mtime, inode) of each config file, with None for files that don't exist.
+    """
+    keys: List[FileKey] = []
+
+    for config_file in config_files:
+        try:
+            stat = os.stat(config_file)
+            keys.append((str(config_file), stat.st_size, stat.st_mtime_ns, stat.st_ino))
+
+        except OSError:
+            keys.append((str(config_file), None, None, None))
+
+    return keys
+
+
+def config_types_key(types: Dict[str, Dict[str, Callable[[str], Any]]]) -> TypesKey:
+    """Returns the (section, option, type name) of each argument type, so the cache can tell when values would be converted differently.
+    """
+    types_key = []
+
+    for section, options in types.items():
+        for option, value_type in options.items():
+            type_name = getattr(value_type, '__qualname__', repr(value_type))
+            types_key.append((section, option, f'{getattr(value_type, "__module__", "")}.{type_name}'))
+
+    return tuple(sorted(types_key))
+
+
+def read_config_cache(cache_file: Path, keys: List[FileKey], milc_version: str, types_key: TypesKey = ()) -> Optional[List[Sections]]:
+    """Returns the parsed sections for each config file stored in `cache_file`, or None if it is missing or stale.
+    """
+    import pickle
+
+    try:
+        with open(cache_file, 'rb') as cache:
+            cache_format, cached_version, cached_keys, cached_types_key, sections = pickle.load(cache)
+
+    except Exception:
+        return None
+
+    if cache_format != CONFIG_CACHE_FORMAT or cached_version != milc_version or cached_keys != keys or cached_types_key != types_key:
+        return None
+
+    return sections  # type: ignore[no-any-return]
+
+
+def write_config_cache(cache_file: Path, keys: List[FileKey], milc_version: str, sections: List[Sections], types_key: TypesKey = ()) -> bool:
+    """Atomically write the parsed `sections` for each config file to `cache_file`. Returns False if it could not be written.
+    """
+    import pickle
+    from tempfile import NamedTemporaryFile
+
+    tmpfile_name = None
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile(mode='wb', dir=str(cache_file.parent), delete=False) as tmpfile:
+            tmpfile_name = tmpfile.name
+            pickle.dump((CONFIG_CACHE_FORMAT, milc_version, keys, types_key, sections), tmpfile, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmpfile_name, str(cache_file))
+
+    # Values from a custom argument `type` may not be picklable
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        return False
+
+    finally:
+        if tmpfile_name and os.path.exists(tmpfile_name):
+            os.unlink(tmpfile_name)
+
+    return True
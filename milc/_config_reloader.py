@@ -0,0 +1,186 @@
+"""Reload the config files of a long-running MILC program when they change.
+
+The reloader remembers the stat of each config layer and the sections read from it. When a file changes only that file is parsed again, the merged values of the old and new layers are compared, and the options that differ are applied to the running configuration.
+"""
+import signal
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ._config_cache import FileKey, config_file_keys
+from .configuration import ConfigRecord, _config_navigate, _find_project_config_file, _parse_config_file
+
+if TYPE_CHECKING:
+    from .milc import MILC
+
+Sections = Dict[str, Dict[str, Any]]
+
+
+def merge_layers(layers: List[Tuple[str, Sections]]) -> Dict[Tuple[str, str], Tuple[Any, str]]:
+    """Returns the (value, layer) of each (section, option) in `layers`, which are ordered from lowest to highest precedence.
+    """
+    merged: Dict[Tuple[str, str], Tuple[Any, str]] = {}
+
+    for layer, sections in layers:
+        for section, options in sections.items():
+            for option, value in options.items():
+                merged[(section, option)] = (value, layer)
+
+    return merged
+
+
+class ConfigReloader(object):
+    """Watches the config layers of `cli` and applies changes to its running configuration.
+
+    Returned by `cli.watch_config()`. Call `check()` to look for changes right away, or `start()` to check every `interval` seconds and whenever the process receives SIGHUP.
+    """
+    def __init__(self, cli: 'MILC', interval: Optional[float] = 1.0, sighup: bool = True) -> None:
+        self.cli = cli
+        self.interval = interval
+        self.sighup = sighup
+        self.layers: List[Tuple[str, Path]] = []
+        self.keys: Dict[Path, FileKey] = {}
+        self.sections: Dict[Path, Sections] = {}
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_sighup: Any = None
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        """Remember the config layers, and the stat of each file and the sections that were read from it when it was loaded.
+        """
+        config_layers = self.cli.config._layers
+        self.layers = self.cli.config_layers
+
+        if config_layers is None:
+            return
+
+        config_layers.load_all()
+
+        for layer, config_file in self.layers:
+            if config_file in config_layers.file_keys:
+                self.keys[config_file] = config_layers.file_keys[config_file]
+                self.sections[config_file] = config_layers.loaded.get(layer, {})
+
+    def check(self) -> List[str]:
+        """Parse the config files that changed and apply the differences. Returns the `section.option` of each option that changed.
+        """
+        _find_project_config_file.cache_clear()
+        layers = self.cli.config_layers
+        config_files = [config_file for layer, config_file in layers]
+        keys = dict(zip(config_files, config_file_keys(config_files)))
+
+        if layers == self.layers and keys == self.keys:
+            return []
+
+        sections = {config_file: self.sections[config_file] if keys[config_file] == self.keys.get(config_file) else _parse_config_file(config_file, self.cli._config_types) for config_file in config_files}
+        old = merge_layers([(layer, self.sections.get(config_file, {})) for layer, config_file in self.layers])
+        new = merge_layers([(layer, sections[config_file]) for layer, config_file in layers])
+        changed = self.apply({key: new.get(key) for key in set(old) | set(new) if old.get(key, (None, None))[0] != new.get(key, (None, None))[0]})
+
+        self.layers = layers
+        self.keys = keys
+        self.sections = sections
+        config_layers = self.cli.config._layers
+
+        # Keep what save_config() compares against up to date
+        if config_layers is not None:
+            config_layers.loaded = {layer: sections[config_file] for layer, config_file in layers}
+            config_layers.file_keys = keys
+
+        if changed:
+            for callback in self.cli._config_callbacks:
+                callback(self.cli, changed)
+
+        return changed
+
+    def apply(self, changes: Dict[Tuple[str, str], Optional[Tuple[Any, str]]]) -> List[str]:
+        """Called by self.check: Apply changed config file values to the running configuration, leaving options set by arguments or environment variables alone.
+        """
+        changed: List[str] = []
+
+        self.cli.acquire_lock()
+
+        try:
+            for (section, option), change in sorted(changes.items()):
+                config_data = _config_navigate(self.cli.config, section)._data
+                record = config_data.get(option)
+
+                if isinstance(record, ConfigRecord) and record.source not in (None, 'config_file'):
+                    continue
+
+                if change is None:
+                    defaults = {**self.cli.default_arguments.get(section, {}), **self.cli._config_defaults.get(section, {})}
+
+                    # Removed from every config file, so it falls back to the argument's default
+                    if option in defaults:
+                        config_data[option] = ConfigRecord(defaults[option], None, None)
+
+                    else:
+                        config_data.pop(option, None)
+
+                else:
+                    config_data[option] = ConfigRecord(change[0], 'config_file', change[1])
+
+                changed.append(f'{section}.{option}')
+
+        finally:
+            self.cli.release_lock()
+
+        return changed
+
+    def start(self) -> None:
+        """Check for changes in a background thread every `interval` seconds, and when SIGHUP is received.
+        """
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+
+        if self.sighup and hasattr(signal, 'SIGHUP'):
+            if threading.current_thread() is threading.main_thread():
+                self._previous_sighup = signal.signal(signal.SIGHUP, lambda signum, frame: self._wakeup.set())
+
+                # Handlers that weren't installed from Python are returned as None and can't be put back
+                if self._previous_sighup is None:
+                    self._previous_sighup = signal.SIG_DFL
+            else:
+                self.cli.log.debug('Not reloading config on SIGHUP, signal handlers can only be installed from the main thread.')
+
+        self._thread = threading.Thread(target=self.run, name='milc-config-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop checking for changes, and put back the SIGHUP handler start() replaced.
+        """
+        self._stop.set()
+        self._wakeup.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._previous_sighup is not None:
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGHUP, self._previous_sighup)
+                self._previous_sighup = None
+
+            else:
+                self.cli.log.debug('Not restoring the SIGHUP handler, signal handlers can only be installed from the main thread.')
+
+    def run(self) -> None:
+        """Called by self.start: Check for changes until stop() is called.
+        """
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+            if self._stop.is_set():
+                break
+
+            try:
+                self.check()
+
+            except Exception as e:
+                self.cli.log.error('Could not reload config: %s: %s', type(e).__name__, e)
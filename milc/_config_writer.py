@@ -0,0 +1,318 @@
+"""Edit INI config files in place, keeping comments, ordering and formatting.
+
+Only the lines for options that change are rewritten, and the file is only written when its content changes.
+"""
+import os
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, List, Optional, Set, Tuple
+
+from .configuration import _config_navigate, _config_record, _convert_config_value
+
+if TYPE_CHECKING:
+    from .milc import MILC
+
+FSYNC_POLICIES = ('never', 'file', 'directory')
+
+# The same section header and option delimiters RawConfigParser uses
+SECTION_HEADER = re.compile(r'\[(?P<header>.+)\]')
+OPTION_LINE = re.compile(r'(?P<key>[^=:\s][^=:]*?)\s*[=:]\s*')
+
+
+class IniDocument(object):
+    """The lines of an INI file, grouped by section and option so single options can be changed without touching the rest of the file.
+
+    Each section is a list of blocks. A block is `[option, lines]`, where `option` is the lowercased option name, or None for comments and blank lines.
+    """
+    def __init__(self, text: str = '') -> None:
+        self.preamble: List[str] = []
+        self.headers: Dict[str, str] = {}
+        self.sections: Dict[str, List[List[Any]]] = {}
+        self.options: Dict[Tuple[str, str], List[Any]] = {}
+        self.new_sections: Set[str] = set()
+        section = None
+        block: List[Any] = [None, self.preamble]
+
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            header = SECTION_HEADER.match(stripped)
+            option = OPTION_LINE.match(stripped) if section is not None and stripped[:1] not in ('', '#', ';') else None
+
+            if block[0] is not None and stripped and line[0].isspace():
+                # A continuation of a multi-line value
+                block[1].append(line)
+
+            elif header and header.group('header') not in self.sections:
+                section = header.group('header')
+                block = [None, []]
+                self.headers[section] = line
+                self.sections[section] = [block]
+
+            elif section is not None and option:
+                block = [option.group('key').lower(), [line]]
+                self.sections[section].append(block)
+                self.options[(section, block[0])] = block
+
+            elif block[0] is None:
+                block[1].append(line)
+
+            else:
+                block = [None, [line]]
+                self.sections[section].append(block)  # type: ignore
+
+    def get(self, section: str, option: str) -> Optional[str]:
+        """Returns the raw value of `option` in `section`, or None if it's not there.
+        """
+        block = self.options.get((section, option.lower()))
+
+        if block is None:
+            return None
+
+        first_line = block[1][0].strip()
+        prefix = OPTION_LINE.match(first_line)
+        value_lines = [first_line[prefix.end():] if prefix else first_line] + [line.strip() for line in block[1][1:]]
+
+        return '\n'.join(value_lines)
+
+    def set(self, section: str, option: str, value: Any) -> None:
+        """Set `option` in `section`, keeping the original key and delimiter when it's already there.
+        """
+        value = str(value).replace('\n', '\n\t')
+        block = self.options.get((section, option.lower()))
+
+        if block is not None:
+            first_line = block[1][0]
+            prefix = OPTION_LINE.match(first_line.lstrip())
+            indent = first_line[:len(first_line) - len(first_line.lstrip())]
+            block[1] = [f'{indent}{prefix.group(0) if prefix else option + " = "}{value}\n']
+            return
+
+        if section not in self.sections:
+            self.headers[section] = f'[{section}]\n'
+            self.sections[section] = [[None, []]]
+            self.new_sections.add(section)
+
+        blocks = self.sections[section]
+        last_option = max([index for index, existing in enumerate(blocks) if existing[0] is not None], default=0)
+        block = [option.lower(), [f'{option} = {value}\n']]
+
+        blocks.insert(last_option + 1, block)
+        self.options[(section, option.lower())] = block
+
+    def remove(self, section: str, option: str) -> None:
+        """Remove `option` from `section` if it's there.
+        """
+        block = self.options.pop((section, option.lower()), None)
+
+        if block is not None:
+            block[0] = None
+            block[1] = []
+
+    def text(self) -> str:
+        """Returns the document as INI text.
+        """
+        lines: List[str] = list(self.preamble)
+
+        for section, blocks in self.sections.items():
+            if section in self.new_sections and lines and lines[-1].strip():
+                # Separate sections we've added from the one before them
+                lines.append('\n')
+
+            lines.append(self.headers[section])
+
+            for block in blocks:
+                lines.extend(block[1])
+
+        # Lines added after the end of the file need the last line to be terminated
+        return ''.join(line if line.endswith('\n') or index == len(lines) - 1 else line + '\n' for index, line in enumerate(lines))
+
+
+def apply_changes(document: IniDocument, changes: Dict[Tuple[str, str], Any]) -> None:
+    """Apply option changes to `document`, removing options whose value is None.
+
+    Lines that already hold the value are left alone, so `yes` isn't rewritten as `True`.
+    """
+    for (section, option), value in changes.items():
+        raw_value = document.get(section, option)
+
+        if value is None:
+            document.remove(section, option)
+
+        elif raw_value is None or (raw_value != value and _convert_config_value(raw_value) != value):
+            document.set(section, option, value)
+
+
+def config_changes(options: Dict[Tuple[str, str], Any], baseline: Dict[str, Dict[str, Any]]) -> Dict[Tuple[str, str], Any]:
+    """Returns the options that differ from the `baseline` sections that were read from a config file, with None for options that have been removed.
+    """
+    baseline_options = {(section, option): value for section, section_options in baseline.items() for option, value in section_options.items()}
+    changes: Dict[Tuple[str, str], Any] = dict.fromkeys(set(baseline_options) - set(options))
+
+    for key, value in options.items():
+        if key not in baseline_options or baseline_options[key] != value:
+            changes[key] = value
+
+    return changes
+
+
+@contextmanager
+def config_file_lock(config_file: Path) -> Generator[None, None, None]:
+    """Hold an exclusive advisory lock for `config_file` while the context manager is active.
+
+    The lock is taken on `<config_file>.lock`, because the config file itself is replaced on every write. It uses fcntl, or msvcrt on Windows. On platforms with neither this does nothing.
+    """
+    if sys.platform == 'win32':
+        import msvcrt
+
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(config_file.with_name(config_file.name + '.lock'), 'a') as lock_file:
+            lock_file.seek(0)
+
+            # LK_LOCK gives up after trying for 10 seconds, so keep waiting the same as flock() does
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+
+                except OSError:
+                    continue
+
+            try:
+                yield
+
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+        return
+
+    try:
+        import fcntl
+
+    except ImportError:
+        yield
+        return
+
+    config_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(config_file.with_name(config_file.name + '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def update_config_file(config_file: Path, edit: Callable[[IniDocument], None], fsync: str = 'never') -> bool:
+    """Apply `edit` to the IniDocument for `config_file` and write it atomically. Returns False when the content didn't change and nothing was written.
+
+    The file is read, edited and written while holding its lock, so `edit` always sees the changes other processes have written.
+    """
+    with config_file_lock(config_file):
+        try:
+            old_text = config_file.read_text()
+
+        except FileNotFoundError:
+            old_text = ''
+
+        document = IniDocument(old_text)
+        edit(document)
+        new_text = document.text()
+
+        if new_text == old_text:
+            return False
+
+        write_config_text(config_file, new_text, fsync)
+
+    return True
+
+
+def write_config_text(config_file: Path, text: str, fsync: str = 'never') -> None:
+    """Atomically replace `config_file` with `text`.
+
+    With `fsync='file'` the new file is flushed to disk before it replaces the old one, and with `fsync='directory'` the rename is flushed as well.
+    """
+    config_dir = config_file.parent
+    tmpfile_name = None
+
+    config_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with NamedTemporaryFile(mode='w', dir=str(config_dir), delete=False) as tmpfile:
+            tmpfile_name = tmpfile.name
+            tmpfile.write(text)
+
+            if fsync != 'never':
+                tmpfile.flush()
+                os.fsync(tmpfile.fileno())
+
+        os.replace(tmpfile_name, str(config_file))
+
+        if fsync == 'directory':
+            directory_fd = os.open(str(config_dir), os.O_RDONLY)
+
+            try:
+                os.fsync(directory_fd)
+
+            finally:
+                os.close(directory_fd)
+
+    finally:
+        if tmpfile_name and os.path.exists(tmpfile_name):
+            os.unlink(tmpfile_name)
+
+
+class ConfigTransaction(object):
+    """Collects config option changes so they can be written to the config file in a single edit.
+
+    Returned by `cli.config_transaction()`. Changes are applied to the running configuration right away, and written when the `with` block exits without an exception.
+    """
+    def __init__(self, cli: 'MILC', config_file: Path, fsync: str = 'never') -> None:
+        self.cli = cli
+        self.config_file = config_file
+        self.fsync = fsync
+        self.changes: Dict[Tuple[str, str], Any] = {}
+
+    def set(self, section: str, option: str, value: Any) -> None:
+        """Set `section.option` to `value`, or remove it when `value` is None.
+        """
+        config_section = _config_navigate(self.cli.config, section)
+
+        if value is None:
+            config_section._data.pop(option, None)
+
+        else:
+            record = _config_record(config_section, option)
+            record.value = value
+            record.source = 'config_file'
+
+        self.record(section, option, value)
+
+    def delete(self, section: str, option: str) -> None:
+        """Remove `section.option` from the config file.
+        """
+        self.set(section, option, None)
+
+    def record(self, section: str, option: str, value: Any) -> None:
+        """Record a change to write without touching the running configuration.
+        """
+        self.changes[(section, option)] = value
+
+    def commit(self) -> bool:
+        """Write the recorded changes to the config file. Returns False when the file didn't need to change.
+        """
+        if not self.changes:
+            return False
+
+        from ._config_backends import config_backend
+
+        written = config_backend(self.config_file).write(self.config_file, self.changes, self.fsync)
+        self.changes = {}
+
+        return written
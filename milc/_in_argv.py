@@ -1,26 +1,48 @@
 import sys
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+ArgvIndex = Dict[str, Tuple[int, Optional[str]]]
 
-def _in_argv(argument: str) -> bool:
-    """Returns true if the argument is found is sys.argv.
+# The argv that was last indexed, its length, and its index
+_argv_cache: Tuple[Optional[List[str]], int, ArgvIndex] = (None, 0, {})
 
-    Since long options can be passed as either '--option value' or '--option=value' we need to check for both forms.
+
+def _argv_index() -> ArgvIndex:
+    """Returns the position of the first occurrence of each argument in sys.argv, and its value if it was passed as '--option=value'.
+
+    sys.argv is only tokenized again when it's replaced, its length changes, or _invalidate_argv_index() is called, so looking up many arguments doesn't scan it for each one.
     """
-    for arg in sys.argv:
-        if arg.split('=')[0] == argument:
-            return True
+    global _argv_cache
 
-    return False
+    argv, argv_length, index = _argv_cache
 
+    if argv is sys.argv and argv_length == len(sys.argv):
+        return index
 
-def _index_argv(argument: str) -> Optional[int]:
-    """Returns the location of the argument in sys.argv, or None.
+    index = {}
 
-    Since long options can be passed as either '--option value' or '--option=value' we need to check for both forms.
-    """
     for i, arg in enumerate(sys.argv):
-        if arg.split('=')[0] == argument:
-            return i
+        name, equals, value = arg.partition('=')
+
+        if name not in index:
+            index[name] = (i, value if equals else None)
+
+    _argv_cache = (sys.argv, len(sys.argv), index)
+
+    return index
 
-    return None
+
+def _invalidate_argv_index() -> None:
+    """Tokenize sys.argv again the next time it's used. Call this after editing sys.argv in place without changing its length.
+    """
+    global _argv_cache
+
+    _argv_cache = (None, 0, {})
+
+
+def _in_argv(argument: str) -> bool:
+    """Returns true if the argument is found is sys.argv.
+
+    Since long options can be passed as either '--option value' or '--option=value' we need to check for both forms.
+    """
+    return argument in _argv_index()
@@ -0,0 +1,113 @@
+"""Cache the registered subcommand tree so warm starts don't have to import every subcommand module.
+
+The manifest is a JSON file in the user cache directory. It is only used when the app version, the MILC version, and the mtimes of the modules that registered the subcommands all match what was recorded.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+MANIFEST_FORMAT = 2
+
+# Argument types that can be stored in the manifest by name
+MANIFEST_TYPES: Dict[str, Callable[[str], Any]] = {'bool': bool, 'int': int, 'float': float, 'str': str}
+
+
+def handler_import_path(handler: Union[Callable[..., Any], str]) -> Optional[str]:
+    """Returns the `module:qualname` import path for a subcommand handler, or None if it can't be imported by path.
+    """
+    if isinstance(handler, str):
+        return handler
+
+    module_name = getattr(handler, '__module__', None)
+    qualname = getattr(handler, '__qualname__', '')
+
+    if not module_name or '<locals>' in qualname:
+        return None
+
+    return f'{module_name}:{qualname}'
+
+
+def source_mtimes(module_names: Iterable[str]) -> Dict[str, int]:
+    """Returns the mtimes of the script, modules, and module directories a manifest was built from.
+
+    Directories are included so that adding a new module next to an existing one invalidates the manifest.
+    """
+    paths = set()
+
+    if sys.argv and os.path.isfile(sys.argv[0]):
+        paths.add(os.path.abspath(sys.argv[0]))
+
+    for module_name in module_names:
+        module_file = getattr(sys.modules.get(module_name), '__file__', None)
+
+        if module_file:
+            module_file = os.path.abspath(module_file)
+            paths.add(module_file)
+            paths.add(os.path.dirname(module_file))
+
+    return {path: os.stat(path).st_mtime_ns for path in sorted(paths)}
+
+
+def sources_current(sources: Dict[str, int]) -> bool:
+    """Returns True if every recorded source still has the recorded mtime.
+    """
+    for path, mtime in sources.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+
+        except OSError:
+            return False
+
+    return True
+
+
+def read_manifest(manifest_file: Path, app_version: str, milc_version: str) -> Optional[Dict[str, Any]]:
+    """Returns the manifest stored in `manifest_file`, or None if it is missing or stale.
+    """
+    try:
+        manifest = json.loads(manifest_file.read_text())
+
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('format') != MANIFEST_FORMAT or manifest.get('app_version') != app_version or manifest.get('milc_version') != milc_version:
+        return None
+
+    if not sources_current(manifest.get('sources', {})):
+        return None
+
+    return manifest  # type: ignore[no-any-return]
+
+
+def write_manifest(manifest_file: Path, manifest: Dict[str, Any]) -> bool:
+    """Atomically write `manifest` to `manifest_file`. Returns False if it could not be written.
+    """
+    tmpfile_name = None
+
+    try:
+        manifest_text = json.dumps(manifest, sort_keys=True)
+
+    except (TypeError, ValueError):
+        return False
+
+    try:
+        manifest_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile(mode='w', dir=str(manifest_file.parent), delete=False) as tmpfile:
+            tmpfile_name = tmpfile.name
+            tmpfile.write(manifest_text)
+
+        os.replace(tmpfile_name, str(manifest_file))
+
+    except OSError:
+        return False
+
+    finally:
+        if tmpfile_name and os.path.exists(tmpfile_name):
+            os.unlink(tmpfile_name)
+
+    return True
@@ -0,0 +1,208 @@
+"""Run commands from a resident server, so short commands don't pay for starting Python and importing the program every time.
+
+The server listens on a Unix socket in the user's runtime directory. `milc/client.py` sends it the arguments, environment and working directory for a command along with its stdin, stdout and stderr file descriptors. The server forks a child that runs the command with `cli.invoke()` and sends back the exit code.
+
+Before each command the server makes sure the program, its subcommand modules and MILC haven't changed since it started. When they have it tells the client to run the program itself and exits, so it never runs old code. Config files that changed are parsed again.
+"""
+import configparser
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ._manifest import source_mtimes, sources_current
+
+if TYPE_CHECKING:
+    from .milc import MILC
+
+# Bumped when the messages the client and server exchange change
+SERVER_PROTOCOL = 1
+
+# The length of the request that follows, sent together with the stdio file descriptors
+REQUEST_HEADER = struct.Struct('!I')
+
+
+def server_supported() -> bool:
+    """Returns True if this platform can pass file descriptors over Unix sockets and fork.
+    """
+    return hasattr(socket, 'AF_UNIX') and hasattr(socket, 'send_fds') and hasattr(os, 'fork')
+
+
+def _reap_children(signum: int, frame: Any) -> None:
+    """Collect the exit status of finished children so they don't linger as zombies.
+    """
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+
+    except ChildProcessError:
+        pass
+
+
+def _receive(connection: socket.socket, size: int) -> bytes:
+    """Returns exactly `size` bytes from `connection`, or fewer if it was closed.
+    """
+    data = b''
+
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+
+        if not chunk:
+            break
+
+        data += chunk
+
+    return data
+
+
+class MILCServer(object):
+    """Serve commands for `cli` on `socket_path` until it's interrupted or the program changes.
+    """
+    def __init__(self, cli: 'MILC', socket_path: Path) -> None:
+        self.cli = cli
+        self.socket_path = socket_path
+
+        # Everything is imported already, so only changes to the files themselves matter, not new files next to them
+        self.sources = {path: mtime for path, mtime in source_mtimes(cli._handler_modules()).items() if not os.path.isdir(path)}
+        self.listener: Optional[socket.socket] = None
+
+    def serve_forever(self) -> None:
+        """Listen for commands until interrupted, or until a command arrives after the program has changed.
+        """
+        self.listen()
+        signal.signal(signal.SIGCHLD, _reap_children)
+
+        try:
+            while self.listener is not None:
+                connection, address = self.listener.accept()
+
+                with connection:
+                    try:
+                        self.handle(connection)
+
+                    except (OSError, ValueError) as e:
+                        self.cli.log.error('Could not run a command from the client: %s: %s', type(e).__name__, e)
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.close()
+
+    def listen(self) -> None:
+        """Called by self.serve_forever: Bind the socket, which only the user can connect to.
+        """
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+            try:
+                probe.connect(str(self.socket_path))
+                raise RuntimeError(f'A server is already listening on {self.socket_path}')
+
+            except ConnectionError:
+                # Left behind by a server that was killed
+                self.socket_path.unlink()
+
+            finally:
+                probe.close()
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # Create the socket with mode 0600, so nobody else can connect before it's chmodded
+        umask = os.umask(0o177)
+
+        try:
+            self.listener.bind(str(self.socket_path))
+
+        finally:
+            os.umask(umask)
+
+        os.chmod(self.socket_path, 0o600)
+        self.listener.listen()
+
+    def close(self) -> None:
+        """Stop listening and remove the socket.
+        """
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+    def handle(self, connection: socket.socket) -> None:
+        """Called by self.serve_forever: Read a request and fork a child to run it, or tell the client to run the command itself.
+        """
+        header, fds, flags, address = socket.recv_fds(connection, REQUEST_HEADER.size, 3)
+
+        try:
+            if len(header) != REQUEST_HEADER.size or len(fds) != 3:
+                return
+
+            request = json.loads(_receive(connection, REQUEST_HEADER.unpack(header)[0]))
+
+            if request.get('protocol') != SERVER_PROTOCOL or not sources_current(self.sources):
+                self.cli.log.info('The program changed since the server started, exiting.')
+                connection.sendall(json.dumps({'stale': True}).encode())
+                self.close()
+                return
+
+            try:
+                self.cli._preload_config()
+
+            except (OSError, ValueError, configparser.Error) as e:
+                # The child reads the config itself and reports the error to the client
+                self.cli.log.warning('Could not preload the config: %s: %s', type(e).__name__, e)
+
+            if os.fork() == 0:
+                self.run(connection, request, fds)
+
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def run(self, connection: socket.socket, request: Dict[str, Any], fds: List[int]) -> None:
+        """Called by self.handle in the child: Run the command with the client's stdio and send back its exit code.
+        """
+        import fcntl
+
+        exit_code = 255
+
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+            if self.listener is not None:
+                self.listener.close()
+
+            # Move the descriptors above stdio first, so putting one in place can't close another
+            fds = [fcntl.fcntl(fd, fcntl.F_DUPFD, 3) for fd in fds]
+
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+
+            os.chdir(request['cwd'])
+            result, exit_code = self.cli.invoke(request['argv'], request['env'])
+
+        except Exception as e:
+            self.cli.log.error('%s: %s', type(e).__name__, e)
+
+        finally:
+            _reply(connection, exit_code)
+            os._exit(0)
+
+
+def _reply(connection: socket.socket, exit_code: int) -> None:
+    """Called by MILCServer.run: Flush the command's output and send its exit code to the client, which may already be gone.
+    """
+    with suppress(OSError):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        connection.sendall(json.dumps({'exit_code': exit_code}).encode())
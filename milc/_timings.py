@@ -0,0 +1,73 @@
+"""Record how long each phase of MILC's startup takes.
+
+Enable this with `--milc-timings` or by setting the `MILC_TIMINGS` environment variable. When `MILC_TIMINGS` ends in `.json` the timings are written to that file as JSON, otherwise a table is printed to stderr when the program exits.
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, List, Optional
+
+
+class PhaseTimings(object):
+    """Collects monotonic timestamps for named phases.
+    """
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        """Time the code inside this context manager as `name`.
+
+        Phases that run more than once, such as env var resolution, are added together.
+        """
+        phase_start = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.add(name, phase_start, time.perf_counter() - phase_start)
+
+    def add(self, name: str, phase_start: float, duration: float) -> None:
+        """Record a single run of phase `name`.
+        """
+        if name not in self.phases:
+            self.phases[name] = {'name': name, 'calls': 0, 'start_ms': (phase_start - self.start) * 1000, 'total_ms': 0.0}
+
+        self.phases[name]['calls'] += 1
+        self.phases[name]['total_ms'] += duration * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the timings as a JSON serializable dictionary.
+        """
+        return {
+            'phases': list(self.phases.values()),
+            'total_ms': (time.perf_counter() - self.start) * 1000,
+        }
+
+    def table(self) -> str:
+        """Returns the timings formatted as a table.
+        """
+        timings = self.as_dict()
+        name_width = max([len('phase')] + [len(phase['name']) for phase in timings['phases']])
+        lines: List[str] = ['%-*s %6s %10s %10s' % (name_width, 'phase', 'calls', 'start ms', 'total ms')]
+
+        for phase in timings['phases']:
+            lines.append('%-*s %6d %10.3f %10.3f' % (name_width, phase['name'], phase['calls'], phase['start_ms'], phase['total_ms']))
+
+        lines.append('%-*s %6s %10s %10.3f' % (name_width, 'total', '', '', timings['total_ms']))
+
+        return '\n'.join(lines)
+
+    def report(self, destination: Optional[str]) -> None:
+        """Write the timings to `destination` if it's a .json file, otherwise print a table to stderr.
+        """
+        if destination and destination.endswith('.json'):
+            with open(destination, 'w') as json_file:
+                json.dump(self.as_dict(), json_file, indent=4)
+
+            return
+
+        print(self.table(), file=sys.stderr)
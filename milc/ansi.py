@@ -7,8 +7,6 @@ import sys
 from copy import copy
 from typing import Any
 
-import colorama
-
 from .emoji import EMOJI_LOGLEVELS
 
 ansi_config = {
@@ -33,16 +31,43 @@ ansi_regex = r'\x1b(' \
              r'(\[\?\d;\d0c)|' \
              r'(\d;\dR))'
 ansi_escape = re.compile(ansi_regex, flags=re.IGNORECASE)
-ansi_styles = (
-    ('fg', colorama.ansi.AnsiFore()),
-    ('bg', colorama.ansi.AnsiBack()),
-    ('style', colorama.ansi.AnsiStyle()),
-)
+
+# These are the same SGR codes that colorama.ansi provides. We build them here
+# so that `import milc` doesn't have to import colorama, which is only needed
+# to wrap stdout when `cli()` runs.
+ansi_colornames = {
+    'black': 0,
+    'blue': 4,
+    'cyan': 6,
+    'green': 2,
+    'lightblack_ex': 60,
+    'lightblue_ex': 64,
+    'lightcyan_ex': 66,
+    'lightgreen_ex': 62,
+    'lightmagenta_ex': 65,
+    'lightred_ex': 61,
+    'lightwhite_ex': 67,
+    'lightyellow_ex': 63,
+    'magenta': 5,
+    'red': 1,
+    'reset': 9,
+    'white': 7,
+    'yellow': 3,
+}
+ansi_stylenames = {
+    'bright': 1,
+    'dim': 2,
+    'normal': 22,
+    'reset_all': 0,
+}
 ansi_colors = {}
 
-for prefix, obj in ansi_styles:
-    for color in [x for x in obj.__dict__ if not x.startswith('_')]:
-        ansi_colors[prefix + '_' + color.lower()] = getattr(obj, color)
+for prefix, base_code in (('fg', 30), ('bg', 40)):
+    for name, offset in ansi_colornames.items():
+        ansi_colors[prefix + '_' + name] = '\033[%dm' % (base_code+offset)
+
+for name, code in ansi_stylenames.items():
+    ansi_colors['style_' + name] = '\033[%dm' % code
 
 
 def format_ansi(text: str) -> str:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Thin client for MILC's resident server, started with `--milc-server`.
+
+This file only uses the standard library and doesn't import milc, so it starts quickly. Run it as a script:
+
+    python3 -S /path/to/milc/client.py SOCKET PROGRAM [ARGS...]
+
+It sends ARGS, the environment, the working directory and its stdin, stdout and stderr to the server listening on SOCKET, then exits with the command's exit code. When no server is listening, or the program has changed since the server started, PROGRAM is run with ARGS instead.
+"""
+import json
+import os
+import socket
+import struct
+import sys
+from typing import Any, Dict, List, NoReturn, Optional
+
+# Must match SERVER_PROTOCOL and REQUEST_HEADER in milc/_server.py
+SERVER_PROTOCOL = 1
+REQUEST_HEADER = struct.Struct('!I')
+
+
+def request(socket_path: str, argv: List[str]) -> Optional[Dict[str, Any]]:
+    """Send `argv` to the server and return its reply, or None if no server is listening on `socket_path`.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        client.connect(socket_path)
+
+    except OSError:
+        client.close()
+        return None
+
+    payload = json.dumps({'protocol': SERVER_PROTOCOL, 'argv': argv, 'env': dict(os.environ), 'cwd': os.getcwd()}).encode()
+    reply = b''
+
+    with client:
+        socket.send_fds(client, [REQUEST_HEADER.pack(len(payload))], [0, 1, 2])
+        client.sendall(payload)
+
+        while True:
+            chunk = client.recv(4096)
+
+            if not chunk:
+                break
+
+            reply += chunk
+
+    # The server went away while the command was running, so don't run it a second time
+    if not reply:
+        return {'exit_code': 255}
+
+    return json.loads(reply)  # type: ignore[no-any-return]
+
+
+def run_program(program: str, argv: List[str]) -> NoReturn:
+    """Replace this process with `program`.
+    """
+    if program.endswith('.py'):
+        os.execv(sys.executable, [sys.executable, program, *argv])
+
+    os.execvp(program, [program, *argv])
+
+
+def main() -> int:
+    if len(sys.argv) < 3:
+        print(f'usage: {sys.argv[0]} SOCKET PROGRAM [ARGS...]', file=sys.stderr)
+        return 2
+
+    socket_path, program, argv = sys.argv[1], sys.argv[2], sys.argv[3:]
+    reply = request(socket_path, argv)
+
+    if reply is None or reply.get('stale'):
+        run_program(program, argv)
+
+    return int(reply['exit_code'])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,27 +1,165 @@
+import argparse
+import os
+import re
 from configparser import RawConfigParser
 from decimal import Decimal
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Generator, Hashable, List, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Hashable, ItemsView, Iterable, Iterator, List, Optional, Tuple
 
 if TYPE_CHECKING:
+    from ._config_cache import FileKey
     from .milc import MILC
 
 from .attrdict import AttrDict
 
+# The same section header RawConfigParser matches, at the start of a line
+SECTION_HEADER = re.compile(r'^\[(.+)\]', re.M)
+
+# The types of the arguments each config option belongs to, by section and option
+ConfigTypes = Dict[str, Dict[str, Callable[[str], Any]]]
+
+
+class ConfigRecord(object):
+    """A config option's value, where the value came from, and the config file layer it was read from.
+
+    `source` is 'config_file', 'env_var' or 'argument', or None for defaults and values set by the program.
+    """
+    __slots__ = ('value', 'source', 'layer')
+
+    def __init__(self, value: Any = None, source: Optional[str] = None, layer: Optional[str] = None) -> None:
+        self.value = value
+        self.source = source
+        self.layer = layer
+
+    def __repr__(self) -> str:
+        return f'ConfigRecord({self.value!r}, {self.source!r}, {self.layer!r})'
+
 
 class Configuration(AttrDict):
     """Represents the running configuration.
 
     This class never raises IndexError, instead it will return None if a
     section or option does not yet exist.
+
+    Each option is stored once, as a `ConfigRecord`. `cli.config`, `cli.config_source` and `cli.config_layer` are views of the same records that read and write the value, source and layer fields. Use `_view()` to get another view of a section.
+
+    Config files can be loaded lazily. The root of a layered configuration has a `ConfigLayers` in `_layers`, which merges in lower layers and sections that haven't been read yet whenever a key is missing or the whole configuration is iterated.
     """
+    _layers: Optional['ConfigLayers'] = None
+    _field = 'value'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(Configuration, self).__init__(*args, **kwargs)
+        self._views: Dict[str, Configuration] = {'value': self}
+
     def __getitem__(self, key: Hashable) -> Any:
         """Returns a config section, creating it if it doesn't exist yet.
         """
+        self._load_section(str(key))
+
+        item = self._data.get(key)
+
+        if item is None:
+            item = self._data[key] = ConfigurationSection(self._view('value'), str(key))
+
+        return _record_field(item, self._field)
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        setattr(_config_record(self, key), self._field, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        """Removes an option. Deleting from the value view removes the whole record, other views only clear their field.
+        """
+        if self._field == 'value' or not isinstance(self._data[key], ConfigRecord):
+            del self._data[key]
+        else:
+            setattr(self._data[key], self._field, None)
+
+    def __iter__(self) -> Any:
+        self._load_all_layers()
+
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        self._load_all_layers()
+
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
         if key not in self._data:
-            self._data[key] = ConfigurationSection(self, str(key))
+            self._load_section(self._top_section(key))
+
+        while key not in self._data and self._load_next_layer():
+            pass
+
+        return key in self._data
+
+    def __repr__(self) -> str:
+        return repr({key: _record_field(item, self._field) for key, item in self._data.items()})
+
+    def freeze(self) -> 'FrozenConfiguration':
+        """Returns a read-only snapshot of the configuration for code that reads it in hot loops.
+
+        Every config layer is loaded, and values that fall back to the `user` section are resolved up front. Changes made to the configuration afterwards are not reflected in the snapshot, so freeze it after `merge_args_into_config()` has run, such as in your entrypoint.
+        """
+        self._load_all_layers()
+
+        user = self._data.get('user')
+        user_values = _frozen_options(user, self._field) if isinstance(user, ConfigurationSection) else {}
+        values: Dict[str, Any] = {}
+
+        # Sections that don't exist still fall back to the `user` section
+        frozen = FrozenConfiguration(values, FrozenConfiguration(values, None, user_values))
+        _freeze_section(self, frozen, '', values, user_values, self._field)
+
+        return frozen
+
+    def _view(self, field: str) -> 'Configuration':
+        """Returns the view of this section that reads and writes `field` of each record.
+        """
+        view = self._views.get(field)
+
+        if view is None:
+            view = object.__new__(type(self))
+            view.__dict__.update(self.__dict__)
+            view._field = field
+            self._views[field] = view
+
+        return view
+
+    def _top_section(self, key: Any) -> str:
+        """Returns the name of the top level section that `key` belongs to.
+        """
+        return str(key)
 
-        return self._data[key]
+    def _config_layers(self) -> Optional['ConfigLayers']:
+        """Returns the ConfigLayers for the root of this configuration, if it has one.
+        """
+        return self._layers
+
+    def _load_next_layer(self) -> bool:
+        """Merge in the next config layer that hasn't been read yet. Returns False when every layer has been loaded.
+        """
+        layers = self._config_layers()
+
+        return layers is not None and layers.load_next_layer()
+
+    def _load_section(self, top_section: str) -> None:
+        """Merge in the parts of `top_section` that haven't been read yet.
+        """
+        layers = self._config_layers()
+
+        if layers is not None:
+            layers.load_section(top_section)
+
+    def _load_all_layers(self) -> None:
+        """Merge in every config layer and section that hasn't been read yet.
+        """
+        layers = self._config_layers()
+
+        if layers is not None:
+            layers.load_all()
 
 
 class ConfigurationSection(Configuration):
@@ -34,7 +172,15 @@ class ConfigurationSection(Configuration):
         """Returns a config value, pulling from the `user` section as a fallback.
         This is called when the attribute is accessed either via the get method or through [ ] index.
         """
-        val = self._data.get(key)
+        val = _record_field(self._data.get(key), self._field)
+
+        if val is None:
+            self._load_section(self._top_section(key))
+            val = _record_field(self._data.get(key), self._field)
+
+        while val is None and self._load_next_layer():
+            val = _record_field(self._data.get(key), self._field)
+
         if val is not None:
             return val
 
@@ -52,110 +198,742 @@ class ConfigurationSection(Configuration):
 
         return None
 
+    def _view(self, field: str) -> 'Configuration':
+        view = self._views.get(field)
+
+        if view is None:
+            view = super(ConfigurationSection, self)._view(field)
+            view._parent = self._parent._view(field)  # type: ignore
+
+        return view
+
+    def freeze(self) -> 'FrozenConfiguration':
+        """Returns a read-only snapshot of this section, taken from a snapshot of the whole configuration.
+        """
+        return self._parent.freeze().get_path(self._section_name)
+
+    def _top_section(self, key: Any) -> str:
+        return self._section_name.split('.', 1)[0]
+
+    def _config_layers(self) -> Optional['ConfigLayers']:
+        return self._parent._layers  # type: ignore[attr-defined, no-any-return]
+
     def __setattr__(self, key: str, value: Any) -> None:
         """Sets dictionary value when an attribute is set.
         """
         if key[0] != '_':
-            self._data[key] = value
+            self[key] = value
         else:
             object.__setattr__(self, key, value)
 
 
+def _record_field(item: Any, field: str) -> Any:
+    """Returns `field` of a ConfigRecord, or the view of a ConfigurationSection that reads `field`.
+    """
+    if isinstance(item, ConfigRecord):
+        return getattr(item, field)
+
+    if isinstance(item, Configuration):
+        return item._view(field)
+
+    return item
+
+
+def _config_record(section: 'Configuration', option: Hashable) -> ConfigRecord:
+    """Returns the record for `option` in `section`, creating it if it doesn't exist yet.
+    """
+    record = section._data.get(option)
+
+    if not isinstance(record, ConfigRecord):
+        record = section._data[option] = ConfigRecord()
+
+    return record
+
+
+class FrozenConfiguration(object):
+    """A read-only snapshot of the configuration, returned by `cli.config.freeze()`.
+
+    Values are kept in a flat dictionary keyed by dotted path, so `get_path('remote.add.url')` is a single lookup. Sections and values are also stored as instance attributes, so `frozen.remote.add.url` doesn't run any MILC code. Missing options are None, the same as `cli.config`.
+    """
+    __slots__ = ('_values', '_default', '__dict__')
+
+    def __init__(self, values: Dict[str, Any], default: Optional['FrozenConfiguration'] = None, options: Optional[Dict[str, Any]] = None) -> None:
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_default', default)
+
+        if options:
+            self.__dict__.update(options)
+
+    def get_path(self, dotted_path: str, default: Any = None) -> Any:
+        """Returns the value or section at `dotted_path`, such as `remote.add.url`, or `default` if it isn't set.
+        """
+        return self._values.get(dotted_path, default)
+
+    def __getattr__(self, key: str) -> Any:
+        """Called when `key` isn't set: Returns None, or an empty section when this is the root.
+        """
+        if key[0] == '_':
+            raise AttributeError(key)
+
+        return self._default
+
+    def __getitem__(self, key: str) -> Any:
+        return self.__dict__.get(key, self._default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__dict__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__dict__)
+
+    def __len__(self) -> int:
+        return len(self.__dict__)
+
+    def __repr__(self) -> str:
+        return repr(self.__dict__)
+
+    def items(self) -> ItemsView[str, Any]:
+        return self.__dict__.items()
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError('Frozen configuration is read-only, change cli.config instead.')
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError('Frozen configuration is read-only, change cli.config instead.')
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError('Frozen configuration is read-only, change cli.config instead.')
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError('Frozen configuration is read-only, change cli.config instead.')
+
+
+def _frozen_options(section: 'Configuration', field: str) -> Dict[str, Any]:
+    """Returns the options in `section` that have `field` set, without its subsections.
+    """
+    options: Dict[str, Any] = {}
+
+    for key, item in section._data.items():
+        if isinstance(item, ConfigRecord) and getattr(item, field) is not None:
+            options[key] = getattr(item, field)
+
+    return options
+
+
+def _freeze_section(section: 'Configuration', frozen: FrozenConfiguration, prefix: str, values: Dict[str, Any], user_values: Dict[str, Any], field: str) -> None:
+    """Called by Configuration.freeze: Copy `section` and its subsections into `frozen` and the flat `values`, filling in missing options from the `user` section.
+    """
+    options = frozen.__dict__
+
+    for key, item in section._data.items():
+        path = f'{prefix}.{key}' if prefix else key
+
+        if isinstance(item, ConfigurationSection):
+            child = FrozenConfiguration(values)
+            _freeze_section(item, child, path, values, user_values, field)
+            options[key] = values[path] = child
+
+        elif isinstance(item, ConfigRecord) and getattr(item, field) is not None:
+            options[key] = values[path] = getattr(item, field)
+
+    # Only sections fall back to the `user` section, not the root
+    if prefix:
+        for key, value in user_values.items():
+            if key not in options:
+                options[key] = values[f'{prefix}.{key}'] = value
+
+
+def _config_record_source(config_root: 'Configuration', section_name: str, option: str, record: ConfigRecord) -> Optional[str]:
+    """Returns where `record` came from, falling back to the `user` section the same as `cli.config_source` does.
+    """
+    if record.source is not None:
+        return record.source
+
+    return _config_navigate(config_root._view('source'), section_name)[option]  # type: ignore[no-any-return]
+
+
 def _config_navigate(config_root: 'Configuration', dotted_path: str) -> 'Configuration':
     """Navigate config to the ConfigurationSection at dotted_path, creating as needed.
 
     Consistent with the lazy-creation behavior of Configuration.__getitem__:
     intermediate sections are always created if they don't exist.
+
+    The section is returned as the same view (value, source or layer) as `config_root`.
     """
     parts = dotted_path.split('.')
-    section: Configuration = config_root
+    value_root = config_root._view('value')
+    section: Configuration = value_root
     for i, part in enumerate(parts):
         existing = section._data.get(part)
         if isinstance(existing, ConfigurationSection):
             section = existing
         else:
             path_so_far = '.'.join(parts[:i + 1])
-            new_section = ConfigurationSection(config_root, path_so_far)
+            new_section = ConfigurationSection(value_root, path_so_far)
             section._data[part] = new_section
             section = new_section
-    return section
+    return section._view(config_root._field)
+
+
+def _config_default(config_root: 'Configuration', section: str, option: str, value: Any) -> None:
+    """Set the value `option` in `section` falls back to when no config file or the `user` section sets it.
+    """
+    layers = config_root._layers
+
+    if layers is not None:
+        layers.add_default(section, option, value)
+        return
+
+    config_section = _config_navigate(config_root, section)
+
+    if config_section[option] is None:
+        config_section[option] = value
+
+
+def _parse_config_file(config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Dict[str, Any]]:
+    """Returns the sections of a configuration file, read by the backend for its file extension."""
+    from ._config_backends import config_backend
 
+    return config_backend(config_file).read(config_file, types)
 
-def _read_config_file(config_file: Path, config: Configuration, config_source: Configuration) -> None:
-    """Merge a configuration file into the running configuration."""
+
+def _parse_ini_file(config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Dict[str, Any]]:
+    """Returns the sections of an INI configuration file with their values converted to python types."""
     raw_config = RawConfigParser()
 
     raw_config.read(str(config_file))
 
-    # Iterate over the config file options and write them into config.
-    # Section names may be dotted (e.g. [remote.add]) for nested subcommands.
+    return _convert_raw_config(raw_config, types)
+
+
+def _parse_config_section(text: str, section: str, types: Optional[ConfigTypes] = None) -> Dict[str, Any]:
+    """Returns the options in `section` of an INI fragment with their values converted to python types."""
+    raw_config = RawConfigParser()
+
+    raw_config.read_string(text)
+
+    return _convert_raw_config(raw_config, types).get(section, {})
+
+
+def _index_config_file(config_file: Path, types: Optional[ConfigTypes] = None) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Returns a function for each section of a configuration file that parses only that section.
+
+    The file is read once and only the offsets of the section headers are found up front. Values from a `[DEFAULT]` section are included in every section, the same as RawConfigParser does.
+    """
+    try:
+        text = config_file.read_text()
+
+    except OSError:
+        return {}
+
+    headers = [(match.group(1), match.start()) for match in SECTION_HEADER.finditer(text)]
+    offsets: Dict[str, List[Tuple[int, int]]] = {}
+
+    for index, (section, start) in enumerate(headers):
+        end = headers[index + 1][1] if index + 1 < len(headers) else len(text)
+        offsets.setdefault(section, []).append((start, end))
+
+    default_text = ''.join(text[start:end] for start, end in offsets.pop('DEFAULT', []))
+
+    return {section: partial(_parse_config_section, default_text + ''.join(text[start:end] for start, end in section_offsets), section, types) for section, section_offsets in offsets.items()}
+
+
+def _convert_raw_config(raw_config: RawConfigParser, types: Optional[ConfigTypes] = None) -> Dict[str, Dict[str, Any]]:
+    """Returns the sections of a RawConfigParser with their values converted to python types.
+
+    Options that belong to an argument with a known type are converted to that type, everything else has its type guessed from the value.
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+
     for section in raw_config.sections():
-        config_section = _config_navigate(config, section)
-        config_source_section = _config_navigate(config_source, section)
+        options: Dict[str, Any] = {}
+        section_types = types.get(section, {}) if types else {}
 
         for option in raw_config.options(section):
-            value = raw_config.get(section, option)
+            value = _coerce_config_value(raw_config.get(section, option), section_types.get(option))
+
+            if value is not None:
+                options[option] = value
+
+        sections[section] = options
+
+    return sections
+
+
+def _coerce_config_sections(sections: Dict[str, Dict[str, Any]], types: Optional[ConfigTypes]) -> Dict[str, Dict[str, Any]]:
+    """Returns `sections` with the string values of options that belong to an argument with a known type converted to that type.
+
+    This is for formats with native types, where only values written as strings need converting.
+    """
+    if not types:
+        return sections
+
+    for section, section_types in types.items():
+        options = sections.get(section)
+
+        if not options:
+            continue
+
+        for option, value_type in section_types.items():
+            value = options.get(option)
+
+            if isinstance(value, str):
+                options[option] = _coerce_config_value(value, value_type)
+
+                if options[option] is None:
+                    del options[option]
+
+    return sections
+
+
+def _coerce_config_value(value: str, value_type: Optional[Callable[[str], Any]]) -> Any:
+    """Returns a config file value converted to `value_type`, or with its type guessed when there's no type or the value doesn't fit it."""
+    lowered = value.lower()
+
+    if value_type is None or lowered == 'none':
+        return _convert_config_value(value)
+
+    if value_type is bool:
+        if lowered in ['yes', 'true', 'on', '1']:
+            return True
+        elif lowered in ['no', 'false', 'off', '0']:
+            return False
 
-            if value.lower() in ['yes', 'true', 'on']:
-                value = True
-            elif value.lower() in ['no', 'false', 'off']:
-                value = False
-            elif value.lower() in ['none']:
+        return _convert_config_value(value)
+
+    try:
+        return value_type(value)
+
+    except (ValueError, TypeError, argparse.ArgumentTypeError):
+        return _convert_config_value(value)
+
+
+def _convert_config_value(value: str) -> Any:
+    """Returns a config file value converted to a python type, or None when it should be treated as unset."""
+    if value.lower() in ['yes', 'true', 'on']:
+        return True
+    elif value.lower() in ['no', 'false', 'off']:
+        return False
+    elif value.lower() in ['none']:
+        return None
+    elif value.replace('.', '').isdigit():
+        if '.' in value:
+            return Decimal(value)
+        else:
+            return int(value)
+
+    return value
+
+
+def _merge_config_layer(sections: Dict[str, Dict[str, Any]], layer: str, config: Configuration) -> None:
+    """Merge a lower config layer into the running configuration, keeping any values that are already set.
+    """
+    for section, options in sections.items():
+        config_data = _config_navigate(config, section)._data
+
+        for option, value in options.items():
+            record = config_data.get(option)
+
+            if not isinstance(record, ConfigRecord):
+                config_data[option] = ConfigRecord(value, 'config_file', layer)
+                continue
+
+            # Values set in the running config before this layer was loaded still came from a config file
+            if record.value is None:
+                record.value = value
+
+            if record.source is None:
+                record.source = 'config_file'
+
+            if record.layer is None:
+                record.layer = layer
+
+
+class ConfigLayers(object):
+    """Loads config file layers into a configuration as they're needed.
+
+    Layers are given from lowest to highest precedence, and are loaded from the highest down. When `lazy_sections` is set only the `general` and `user` sections, and the top level sections in `eager_sections`, are merged when a layer is loaded. Other sections are parsed the first time they're used.
+
+    Values are converted using `types`, which is shared with the program so arguments registered after this is created still apply to the layers and sections that haven't been parsed yet.
+
+    Defaults for options that no layer sets are held back until every layer has been loaded and their section has been parsed, so filling them in never loads anything by itself.
+    """
+    def __init__(self, layers: List[Tuple[str, Path, Optional[Dict[str, Dict[str, Any]]]]], config: Configuration, lazy_sections: bool = False, eager_sections: Iterable[str] = (), types: Optional[ConfigTypes] = None) -> None:
+        self.pending_layers = list(layers)
+        self.config = config
+        self.types = types
+        self.lazy_sections = lazy_sections
+        self.loaded_sections = {'general', 'user', *eager_sections}
+        self.pending_sections: Dict[str, List[Tuple[str, str, Callable[[], Dict[str, Any]]]]] = {}
+        self.loaded: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.layer_files: Dict[str, Path] = {}
+        self.file_keys: Dict[Path, 'FileKey'] = {}
+        self.defaults: Dict[str, Dict[str, Any]] = {}
+
+        # Views of the configuration made after this share the same layers
+        for view in config._views.values():
+            view._layers = self
+
+    def load_next_layer(self) -> bool:
+        """Merge in the next layer. Returns False when every layer has been loaded.
+        """
+        from ._config_cache import config_file_keys
+
+        if not self.pending_layers:
+            return False
+
+        layer, config_file, sections = self.pending_layers.pop()
+        self.layer_files[layer] = config_file
+        self.file_keys[config_file] = config_file_keys([config_file])[0]
+
+        if not self.lazy_sections:
+            self.merge(layer, _parse_config_file(config_file, self.types) if sections is None else sections)
+            self.load_defaults()
+            return True
+
+        if sections is None:
+            from ._config_backends import config_backend
+
+            section_parsers = config_backend(config_file).sections(config_file, self.types)
+        else:
+            section_parsers = {section: partial(sections.__getitem__, section) for section in sections}
+
+        for section, parse_section in section_parsers.items():
+            top_section = section.split('.', 1)[0]
+
+            if top_section in self.loaded_sections:
+                self.merge(layer, {section: parse_section()})
+            else:
+                self.pending_sections.setdefault(top_section, []).append((layer, section, parse_section))
+
+        self.load_defaults()
+
+        return True
+
+    def load_section(self, top_section: str) -> None:
+        """Merge in `top_section` and its subsections from the layers that have been loaded.
+        """
+        if not self.lazy_sections or top_section in self.loaded_sections:
+            return
+
+        self.loaded_sections.add(top_section)
+
+        for layer, section, parse_section in self.pending_sections.pop(top_section, []):
+            self.merge(layer, {section: parse_section()})
+
+        self.load_defaults(top_section)
+
+    def load_all(self) -> None:
+        """Merge in every layer and section that hasn't been loaded yet.
+        """
+        while self.load_next_layer():
+            pass
+
+        for top_section in list(self.pending_sections):
+            self.load_section(top_section)
+
+    def add_default(self, section: str, option: str, value: Any) -> None:
+        """Set the value `option` falls back to when no layer or the `user` section sets it.
+
+        Defaults are merged in once every layer has been loaded, and lazy sections have been parsed, so arguments and config defaults don't load anything themselves.
+        """
+        defaults = self.defaults.setdefault(section, {})
+
+        if defaults.get(option) is None:
+            defaults[option] = value
+
+        self.load_defaults(section.split('.', 1)[0])
+
+    def load_defaults(self, top_section: Optional[str] = None) -> None:
+        """Merge in the defaults for options that no layer or the `user` section set, for `top_section` or every section that has been parsed.
+
+        Nothing is merged until every layer has been loaded, since a lower layer may still set the option.
+        """
+        if self.pending_layers:
+            return
+
+        user = _config_navigate(self.config, 'user')._data
+
+        for section in list(self.defaults):
+            section_top = section.split('.', 1)[0]
+
+            if (top_section is not None and section_top != top_section) or (self.lazy_sections and section_top not in self.loaded_sections):
                 continue
-            elif value.replace('.', '').isdigit():
-                if '.' in value:
-                    value = Decimal(value)
-                else:
-                    value = int(value)
 
-            config_section[option] = value
-            config_source_section[option] = 'config_file'
+            config_section = _config_navigate(self.config, section)
+
+            for option, value in self.defaults.pop(section).items():
+                if section != 'user' and _record_field(user.get(option), 'value') is not None:
+                    continue
+
+                record = _config_record(config_section, option)
+
+                if record.value is None:
+                    record.value = value
+
+    def retype(self, options: Iterable[Tuple[str, str]]) -> None:
+        """Convert `options` again, for arguments whose type was registered after their value was read from a config file.
+
+        Each config file that supplied one of the options is parsed again, once.
+        """
+        parsed: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        for section, option in options:
+            record = _config_navigate(self.config, section)._data.get(option)
+
+            if not isinstance(record, ConfigRecord) or record.source != 'config_file' or record.layer not in self.layer_files:
+                continue
+
+            if record.layer not in parsed:
+                parsed[record.layer] = _parse_config_file(self.layer_files[record.layer], self.types)
+
+            value = parsed[record.layer].get(section, {}).get(option)
+
+            if value is not None:
+                record.value = value
+                self.loaded.setdefault(record.layer, {}).setdefault(section, {})[option] = value
+
+    def merge(self, layer: str, sections: Dict[str, Dict[str, Any]]) -> None:
+        """Merge the parsed `sections` from `layer` into the configuration.
+
+        The sections are also kept in `self.loaded`, so saving the config can tell which options have changed since they were read.
+        """
+        loaded = self.loaded.setdefault(layer, {})
+
+        for section, options in sections.items():
+            loaded.setdefault(section, {}).update(options)
+
+        _merge_config_layer(sections, layer, self.config)
+
+
+@lru_cache(maxsize=None)
+def _find_project_config_file(directory: str, filename: str) -> Optional[Path]:
+    """Returns the first `filename` found in `directory` or one of its parents.
+
+    Results are cached for each directory, so later searches from the same tree don't stat every parent again. The cache is cleared whenever the config files are read again, so project config files that were created or removed since are found.
+    """
+    config_file = os.path.join(directory, filename)
+
+    if os.path.isfile(config_file):
+        return Path(config_file)
+
+    parent = os.path.dirname(directory)
+
+    if parent == directory:
+        return None
+
+    return _find_project_config_file(parent, filename)
+
+
+def _find_dropin_config_files(system_config_file: Path) -> List[Path]:
+    """Returns the drop-in files in the `<system config file>.d` directory with an extension that has a config backend, sorted by name.
+    """
+    from ._config_backends import CONFIG_BACKENDS
+
+    dropin_dir = Path(f'{system_config_file}.d')
+
+    try:
+        names = sorted(entry.name for entry in os.scandir(dropin_dir) if os.path.splitext(entry.name)[1].lower() in CONFIG_BACKENDS and entry.is_file())
+
+    except OSError:
+        return []
+
+    return [dropin_dir / name for name in names]
 
 
 def _collect_config_sections(section: 'Configuration', prefix: str = '') -> Generator[Tuple[str, str, Any], None, None]:
     """Recursively yield (dotted_section_name, option_name, value) for all leaf values.
 
-    Used by _save_config_file to emit flat INI sections with dotted names.
+    The values are the field of the view `section` is, so this works the same for `cli.config`, `cli.config_source` and `cli.config_layer`.
+    """
+    for section_name, option, record in _collect_config_records(section, prefix):
+        yield section_name, option, getattr(record, section._field)
+
+
+def _collect_config_records(section: 'Configuration', prefix: str = '') -> Generator[Tuple[str, str, ConfigRecord], None, None]:
+    """Recursively yield (dotted_section_name, option_name, record) for every option.
+
+    Used by _save_config_file and the config subcommand to read values and their sources in a single pass.
     """
-    for key, value in section._data.items():
-        if isinstance(value, ConfigurationSection):
+    section._load_all_layers()
+
+    for key, item in section._data.items():
+        if isinstance(item, ConfigurationSection):
             sub_prefix = f"{prefix}.{key}" if prefix else key
-            yield from _collect_config_sections(value, sub_prefix)
-        else:
-            yield prefix, key, value
+            yield from _collect_config_records(item, sub_prefix)
+        elif isinstance(item, ConfigRecord):
+            yield prefix, key, item
+
+
+class ParserMap(dict):  # type: ignore[type-arg]
+    """Maps subcommand names to their parsers, building each parser the first time it's looked up.
+    """
+    def __getitem__(self, name: Any) -> Any:
+        parser = super().__getitem__(name)
+
+        if isinstance(parser, SubparserWrapper):
+            return parser.subparser
+
+        return parser
+
+    def get(self, name: Any, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+    def values(self) -> Any:
+        return [self[name] for name in self]
+
+    def items(self) -> Any:
+        return [(name, self[name]) for name in self]
+
+
+class LazySubParsersAction(argparse._SubParsersAction):  # type: ignore[type-arg]
+    """A subparsers action that only builds the parser for a subcommand when it's used.
+
+    Subcommands are registered with `add_lazy_parser()`, which records the name and help text. The parser itself is built by `build_parser()` when the subcommand is selected on the command line, its help is printed, or tab completion needs it.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._name_parser_map = ParserMap()
+        self.choices = self._name_parser_map
+
+    def add_lazy_parser(self, name: str, wrapper: 'SubparserWrapper', **kwargs: Any) -> None:
+        """Register `wrapper` as the subcommand `name` without building its parser.
+        """
+        aliases = kwargs.get('aliases', ())
+
+        for key in (name, *aliases):
+            if key in self._name_parser_map:
+                raise argparse.ArgumentError(self, 'conflicting subparser: %s' % key)
+
+        if 'help' in kwargs:
+            self._choices_actions.append(self._ChoicesPseudoAction(name, aliases, kwargs['help']))
+
+        for key in (name, *aliases):
+            dict.__setitem__(self._name_parser_map, key, wrapper)
+
+    def build_parser(self, name: str, **kwargs: Any) -> argparse.ArgumentParser:
+        """Build the parser for the subcommand `name`, the same way `add_parser()` would.
+        """
+        if kwargs.get('prog') is None:
+            kwargs['prog'] = '%s %s' % (self._prog_prefix, name)
+
+        aliases = kwargs.pop('aliases', ())
+        kwargs.pop('help', None)
+        parser = self._parser_class(**kwargs)
+
+        for key in (name, *aliases):
+            dict.__setitem__(self._name_parser_map, key, parser)
+
+        return parser
 
 
 class SubparserWrapper(object):
     """Wrap subparsers so we can track what options the user passed.
+
+    The argparse parser for the subcommand isn't built until something needs it. Until then arguments, defaults and child subcommands are recorded here and applied when it's built.
     """
 
     # We type `cli` as Any instead of MILC to avoid a circular import
-    def __init__(self, cli: Any, submodule: Any, subparser: Any) -> None:
+    def __init__(self, cli: Any, submodule: Any, subparsers: Any, name: str, parser_kwargs: Dict[str, Any]) -> None:
         self.cli = cli
         self.submodule = submodule
-        self.subparser = subparser
         self._arg_parser = self.cli._arg_parser
-        self._child_subparsers = None
+        self._subparsers = subparsers
+        self._name = name
+        self._parser_kwargs = parser_kwargs
+        self._subparser: Optional[argparse.ArgumentParser] = None
+        self._child_subparsers: Any = None
+        self._pending_arguments: List[Tuple[Tuple[Any, ...], Dict[str, Any], Any]] = []
+        self._pending_children: List[Tuple[str, SubparserWrapper, Dict[str, Any]]] = []
+        self._pending_defaults: Dict[str, Any] = {}
+        self._completer = None
+
+        subparsers.add_lazy_parser(name, self, **parser_kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        """Delegate anything we don't override to the wrapped subparser.
+        """
+        if attr == '_subparser':
+            raise AttributeError(attr)
+
+        return getattr(self.subparser, attr)
+
+    @property
+    def subparser(self) -> argparse.ArgumentParser:
+        """The argparse parser for this subcommand, built the first time it's used.
+        """
+        if self._subparser is None:
+            subparsers = self._subparsers.get_child_subparsers() if isinstance(self._subparsers, SubparserWrapper) else self._subparsers
+            self._subparser = subparsers.build_parser(self._name, **self._parser_kwargs)
+            self._subparser.set_defaults(**self._pending_defaults)
+
+            if self._completer is not None:
+                self._subparser.completer = self._completer
+
+            for args, kwargs, completer in self._pending_arguments:
+                self._add_parser_argument(args, kwargs, completer)
 
-        for attr in dir(subparser):
-            if not hasattr(self, attr):
-                setattr(self, attr, getattr(subparser, attr))
+            if self._pending_children:
+                self.get_child_subparsers()
+
+            self._pending_arguments = []
+
+        return self._subparser
+
+    def add_lazy_parser(self, name: str, wrapper: 'SubparserWrapper', **kwargs: Any) -> None:
+        """Register the child subcommand `name`, waiting until this parser is built if it hasn't been yet.
+        """
+        if self._child_subparsers is None:
+            self._pending_children.append((name, wrapper, kwargs))
+
+        else:
+            self._child_subparsers.add_lazy_parser(name, wrapper, **kwargs)
 
     def get_child_subparsers(self) -> Any:
         """Lazily create and return the _SubParsersAction for nested sub-subcommands."""
         if self._child_subparsers is None:
-            self._child_subparsers = self.subparser.add_subparsers(title='Sub-commands', dest='subparsers', metavar="")
+            child_subparsers: Any = self.subparser.add_subparsers(title='Sub-commands', dest='subparsers', metavar="", action=LazySubParsersAction)
+
+            for name, wrapper, kwargs in self._pending_children:
+                child_subparsers.add_lazy_parser(name, wrapper, **kwargs)
+
+            self._child_subparsers = child_subparsers
+            self._pending_children = []
+
         return self._child_subparsers
 
+    def set_defaults(self, **kwargs: Any) -> None:
+        """Set parser defaults for this subcommand, such as its entrypoint.
+        """
+        if self._subparser is None:
+            self._pending_defaults.update(kwargs)
+
+        else:
+            self._subparser.set_defaults(**kwargs)
+
     def completer(self, completer: Any) -> None:
         """Add an arpcomplete completer to this subcommand.
         """
-        self.subparser.completer = completer
+        if self._subparser is None:
+            self._completer = completer
+
+        else:
+            self._subparser.completer = completer  # type: ignore
+
+    def _add_parser_argument(self, args: Tuple[Any, ...], kwargs: Dict[str, Any], completer: Any) -> None:
+        """Called by self.add_argument and self.subparser: Add an argument to the argparse parser.
+        """
+        assert self._subparser is not None
+
+        if completer:
+            self._subparser.add_argument(*args, **kwargs).completer = completer  # type: ignore
+        else:
+            self._subparser.add_argument(*args, **kwargs)
 
     def add_argument(self, *args: Any, **kwargs: Any) -> None:
         """Add an argument for this subcommand.
 
-        This also stores the default for the argument in `self.cli.default_arguments`.
+        This also stores the default for the argument in `self.cli.default_arguments`. The argparse argument is only created when the parser is built.
         """
         if kwargs.get('action') == 'store_boolean':
             # Store boolean will call us again with the enable/disable flag arguments
@@ -171,21 +949,23 @@ class SubparserWrapper(object):
             self.cli.acquire_lock()
             argument_name = get_argument_name(self.cli._arg_parser, *args, **kwargs)
 
-            if completer:
-                self.subparser.add_argument(*args, **kwargs).completer = completer
+            if self._subparser is None:
+                self._pending_arguments.append((args, kwargs, completer))
             else:
-                self.subparser.add_argument(*args, **kwargs)
+                self._add_parser_argument(args, kwargs, completer)
 
             if kwargs.get('action') == 'store_false':
-                self.cli._config_store_false.append(argument_name)
+                self.cli._config_store_false.add(argument_name)
 
             if kwargs.get('action') == 'store_true':
-                self.cli._config_store_true.append(argument_name)
+                self.cli._config_store_true.add(argument_name)
 
             if self.submodule not in self.cli.default_arguments:
                 self.cli.default_arguments[self.submodule] = {}
 
             self.cli.default_arguments[self.submodule][argument_name] = kwargs.get('default')
+            self.cli._add_config_type(self.submodule, argument_name, kwargs)
+            self.cli._config_routes.clear()
             self.cli.release_lock()
 
 
@@ -209,6 +989,24 @@ def get_argument_name(arg_parser: Any, *args: Any, **kwargs: Any) -> Any:
         return arg_parser._get_positional_kwargs(*args, **kwargs)['dest']
 
 
+def get_argument_type(kwargs: Dict[str, Any]) -> Optional[Callable[[str], Any]]:
+    """Takes argparse arguments and returns the type config file values for the argument should be converted to, or None to guess it from the value.
+    """
+    action = kwargs.get('action')
+
+    if action in ('store_true', 'store_false', 'store_boolean'):
+        return bool
+
+    if action == 'count':
+        return int
+
+    # Lists and constants don't have a single value of the argument's type
+    if action not in (None, 'store') or kwargs.get('nargs') not in (None, '?'):
+        return None
+
+    return kwargs.get('type')  # type: ignore[no-any-return]
+
+
 def handle_store_boolean(self: 'MILC | SubparserWrapper', *args: Any, **kwargs: Any) -> Any:
     """Does the add_argument for action='store_boolean'.
     """
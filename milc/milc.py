@@ -1,41 +1,135 @@
 # coding=utf-8
 import argparse
+import atexit
+import importlib
+import io
 import logging
 import os
 import shlex
 import subprocess
 import sys
-from configparser import RawConfigParser
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from platform import platform
-from tempfile import NamedTemporaryFile
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union, overload
+from typing import IO, TYPE_CHECKING, Any, Callable, ContextManager, Dict, Generator, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar, Union, overload
 
 if TYPE_CHECKING:
-    from argparse import _SubParsersAction
+    from halo import Halo
+
+    from ._config_backends import ConfigBackend
+    from ._config_cache import FileKey, TypesKey
+    from ._config_reloader import ConfigReloader
+    from ._config_writer import ConfigTransaction
 
 import threading
 
-import argcomplete
-import colorama
-from halo import Halo
-from platformdirs import user_config_dir
-from spinners.spinners import Spinners
 from typing_extensions import ParamSpec
 
-from ._in_argv import _in_argv, _index_argv
+from ._in_argv import _argv_index, _in_argv, _invalidate_argv_index
 from .ansi import MILCFormatter, ansi_colors, ansi_config, ansi_escape, format_ansi
 from .attrdict import AttrDict
-from .configuration import Configuration, SubparserWrapper, _collect_config_sections, _config_navigate, _read_config_file, get_argument_name, get_argument_strings, handle_store_boolean
+from .configuration import (
+    ConfigLayers,
+    ConfigTypes,
+    Configuration,
+    LazySubParsersAction,
+    SubparserWrapper,
+    _collect_config_records,
+    _config_default,
+    _config_navigate,
+    _config_record,
+    _config_record_source,
+    _find_dropin_config_files,
+    _find_project_config_file,
+    _parse_config_file,
+    get_argument_name,
+    get_argument_strings,
+    get_argument_type,
+    handle_store_boolean,
+)
 
 P = ParamSpec("P")
 R = TypeVar("R")
 
+# The attributes that hold the state of a single run. cli.invoke() saves them, starts each run fresh, and restores them afterwards.
+INVOCATION_STATE = (
+    'args',
+    'args_passed',
+    '_subcommand',
+    '_config',
+    '_config_source',
+    '_config_layer',
+    '_config_retype',
+    '_config_defaults',
+    '_config_file',
+    '_config_file_explicit',
+    '_interactive',
+    'env_vars_used',
+    '_env_var_defaults',
+    '_env_var_errors',
+    'log_print_level',
+    'log_file',
+    'log_file_handler',
+    'log_print_handler',
+)
+
+
+def user_config_dir(**kwargs: Any) -> str:
+    """Returns the platformdirs user config dir, importing platformdirs on first use.
+    """
+    from platformdirs import user_config_dir as platformdirs_user_config_dir
+
+    return platformdirs_user_config_dir(**kwargs)
+
+
+def user_runtime_dir(**kwargs: Any) -> str:
+    """Returns the platformdirs user runtime dir, importing platformdirs on first use.
+    """
+    from platformdirs import user_runtime_dir as platformdirs_user_runtime_dir
+
+    return platformdirs_user_runtime_dir(**kwargs)
+
+
+def user_cache_dir(**kwargs: Any) -> str:
+    """Returns the platformdirs user cache dir, importing platformdirs on first use.
+    """
+    from platformdirs import user_cache_dir as platformdirs_user_cache_dir
+
+    return platformdirs_user_cache_dir(**kwargs)
+
+
+def _split_comp_line() -> List[str]:
+    """Returns the words argcomplete is completing, minus the program name.
+    """
+    comp_line = os.environ.get('COMP_LINE', '')
+    comp_point = int(os.environ.get('COMP_POINT', len(comp_line)))
+
+    try:
+        words = shlex.split(comp_line[:comp_point])
+    except ValueError:
+        words = comp_line[:comp_point].split()
+
+    return words[1:]
+
+
+def _exit_code(error: SystemExit) -> int:
+    """Returns the exit code a process would have after raising `error`.
+    """
+    if error.code is None:
+        return 0
+
+    if isinstance(error.code, int):
+        return error.code
+
+    print(error.code, file=sys.stderr)
+
+    return 1
+
 
 class MILC(object):
     """MILC - An Opinionated Batteries Included Framework
     """
-    def __init__(self, name: Optional[str] = None, author: Optional[str] = None, version: Optional[str] = None, logger: Optional[logging.Logger] = None, env_prefix: Optional[str] = None, config_file: Optional[Union[str, Path]] = None) -> None:
+    def __init__(self, name: Optional[str] = None, author: Optional[str] = None, version: Optional[str] = None, logger: Optional[logging.Logger] = None, env_prefix: Optional[str] = None, config_file: Optional[Union[str, Path]] = None, config_cache: bool = False, project_config_file: Optional[str] = None, lazy_config_sections: bool = False, batch_argument: bool = False) -> None:
         """Initialize the MILC object.
         """
         # Set some defaults
@@ -48,16 +142,26 @@ class MILC(object):
         if not author:
             author = name.upper()
 
-        # Setup a lock for thread safety
+        # Setup a lock for thread safety, and one that makes calls to cli.invoke() take turns
         self._lock = threading.RLock()
+        self._invoke_lock = threading.RLock()
+
+        # Setup startup timings, if requested
+        self._timings = None
+
+        if os.environ.get('MILC_TIMINGS') or _in_argv('--milc-timings'):
+            from ._timings import PhaseTimings
+
+            self._timings = PhaseTimings()
+            atexit.register(self._timings.report, os.environ.get('MILC_TIMINGS'))
 
         # Define some basic info
         self.acquire_lock()
         self.prog_name = name
         self.version = version
         self.author = author
-        self._config_store_true: List[str] = []
-        self._config_store_false: List[str] = []
+        self._config_store_true: Set[str] = set()
+        self._config_store_false: Set[str] = set()
         self._entrypoint: Callable[..., Any] = lambda _: None
         self._prerun: List[Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]] = []
         self._spinners: Dict[str, Dict[str, Union[int, Sequence[str]]]] = {}
@@ -67,28 +171,164 @@ class MILC(object):
         self.arg_only: Dict[str, List[str]] = {}
         self._config_file_explicit = _in_argv('--config-file')
         self.system_config_file = Path(config_file).expanduser().resolve() if config_file is not None else None
-        self.config_file = self.find_config_file()
+        self._config_file: Optional[Path] = None
+        self.config_cache = config_cache
+        self.project_config_file = project_config_file
+        self.lazy_config_sections = lazy_config_sections
+        self.batch_argument = batch_argument
+        self._config_transaction: Optional[ConfigTransaction] = None
+        self._config_callbacks: List[Callable[..., Any]] = []
+        self._config_reloader: Optional[ConfigReloader] = None
         self.default_arguments: Dict[str, Dict[str, Optional[str]]] = {}
+        self._config_types: ConfigTypes = {}
+        self._config_retype: List[Tuple[str, str]] = []
+        self._config_routes: Dict[Optional[str], Dict[str, Optional[str]]] = {}
         self.env_prefix = env_prefix
         self.env_vars_used: Dict[str, Dict[str, str]] = {}
         self._env_var_defaults: Dict[str, Dict[str, Any]] = {}
         self._env_var_errors: List[str] = []
-        self.platform = platform()
-        self.interactive = sys.stdin.isatty()
+        self._env_var_arguments: List[Tuple[str, str, Sequence[Any], Dict[str, Any]]] = []
+        self._colorama_initialized = False
+        self._platform: Optional[str] = None
+        self._interactive: Optional[bool] = None
         self.release_lock()
         self._deprecated_arguments: Dict[str, str] = {}
         self._deprecated_commands: Dict[str, str] = {}
+        self._manifest_enabled = False
+        self._manifest_loaded = False
+        self._config: Optional[Configuration] = None
+        self._config_source: Optional[Configuration] = None
+        self._config_layer: Optional[Configuration] = None
+        self._config_defaults: Dict[str, Dict[str, Any]] = {}
+        self._parsed_config_files: Optional[Tuple[List['FileKey'], 'TypesKey', List[Dict[str, Dict[str, Any]]]]] = None
 
         # Initialize all the things
-        self.initialize_config()
-        self.initialize_argparse()
-        self.initialize_logging(logger)
-        self.initialize_arguments()
+        with self._phase('argparse build'):
+            self.initialize_argparse()
+            self.initialize_logging(logger)
+            self.initialize_arguments()
+
+    @property
+    def config(self) -> Configuration:
+        if self._config is None:
+            self.initialize_config()
+        assert self._config is not None
+
+        return self._config
+
+    @config.setter
+    def config(self, value: Configuration) -> None:
+        self._config = value
+
+    @property
+    def config_source(self) -> Configuration:
+        if self._config_source is None:
+            self.initialize_config()
+        assert self._config_source is not None
+
+        return self._config_source
+
+    @config_source.setter
+    def config_source(self, value: Configuration) -> None:
+        self._config_source = value
+
+    @property
+    def config_layer(self) -> Configuration:
+        if self._config_layer is None:
+            self.initialize_config()
+        assert self._config_layer is not None
+
+        return self._config_layer
+
+    @property
+    def config_layers(self) -> List[Tuple[str, Path]]:
+        """Returns the name and path of each config file that will be read, from lowest to highest precedence.
+        """
+        layers = []
+
+        if self._config_file_explicit:
+            return [('user', self.config_file)] if self.config_file.exists() else []
+
+        if self.system_config_file:
+            if self.system_config_file.exists():
+                layers.append(('system', self.system_config_file))
+
+            for dropin_file in _find_dropin_config_files(self.system_config_file):
+                layers.append(('drop-in ' + dropin_file.name, dropin_file))
+
+        if self.config_file.exists():
+            layers.append(('user', self.config_file))
+
+        if self.project_config_file:
+            project_config_file = _find_project_config_file(os.getcwd(), self.project_config_file)
+
+            if project_config_file:
+                layers.append(('project', project_config_file))
+
+        return layers
+
+    @property
+    def config_file(self) -> Path:
+        """The user's config file, located the first time it's needed.
+        """
+        if self._config_file is None:
+            self._config_file = self.find_config_file()
+
+        return self._config_file
+
+    @config_file.setter
+    def config_file(self, value: Path) -> None:
+        self._config_file = value
 
     @property
     def config_dir(self) -> Path:
         return self.config_file.parent
 
+    @property
+    def platform(self) -> str:
+        """The platform string, computed the first time it's needed because `platform.platform()` is slow.
+        """
+        if self._platform is None:
+            self._platform = platform()
+
+        return self._platform
+
+    @platform.setter
+    def platform(self, value: str) -> None:
+        self._platform = value
+
+    @property
+    def interactive(self) -> bool:
+        """True when stdin is a tty, or `--interactive` was passed or set in the config file.
+
+        The config is checked the first time this is used after it has been read, so runs that never ask don't open the config file layers for it.
+        """
+        if self._interactive is None:
+            if self._config is None:
+                return sys.stdin.isatty()
+
+            self._interactive = bool(self.config.general.interactive) or sys.stdin.isatty()
+
+        return self._interactive
+
+    @interactive.setter
+    def interactive(self, value: bool) -> None:
+        self._interactive = value
+
+    @property
+    def manifest_file(self) -> Path:
+        return Path(user_cache_dir(appname=self.prog_name, appauthor=self.author), 'manifest.json')
+
+    @property
+    def config_cache_file(self) -> Path:
+        return Path(user_cache_dir(appname=self.prog_name, appauthor=self.author), 'config.pickle')
+
+    @property
+    def server_socket(self) -> Path:
+        """The Unix socket `--milc-server` listens on, in the user's runtime directory.
+        """
+        return Path(user_runtime_dir(appname=self.prog_name, appauthor=self.author), 'milc-server.sock')
+
     @property
     def description(self) -> Optional[str]:
         return self._arg_parser.description
@@ -113,6 +353,14 @@ class MILC(object):
         key = self._subcommand_keys.get(id(self._subcommand))
         return key.split('.') if key else [self._subcommand.__name__]
 
+    def _phase(self, name: str) -> ContextManager[None]:
+        """Returns a context manager that times `name` when startup timings are enabled.
+        """
+        if self._timings is None:
+            return nullcontext()
+
+        return self._timings.phase(name)
+
     def argv_name(self) -> str:
         """Returns the name of our program by examining argv.
         """
@@ -215,6 +463,40 @@ class MILC(object):
 
         return subprocess.run(command, **kwargs)
 
+    def milc_options(self, *, name: Optional[str] = None, author: Optional[str] = None, version: Optional[str] = None, logger: Optional[logging.Logger] = None, env_prefix: Optional[str] = None, config_file: Optional[Union[str, Path]] = None, config_cache: bool = False, project_config_file: Optional[str] = None, lazy_config_sections: bool = False, batch_argument: bool = False) -> None:
+        """Apply new options to this MILC object in place.
+
+        Called by cli.milc_options() once the MILC object has been built. Registered arguments and subcommands are kept, and the config file is found and read again the next time it's used. Arguments that were registered before `env_prefix` was set do not pick up environment variable defaults.
+        """
+        if self._initialized:
+            raise RuntimeError('You must run cli.milc_options() before cli() or anything else!')
+
+        self.acquire_lock()
+        self.prog_name = name or self.argv_name()
+        self.version = version or 'unknown'
+        self.author = author or self.prog_name.upper()
+        self.env_prefix = env_prefix
+        self.system_config_file = Path(config_file).expanduser().resolve() if config_file is not None else None
+        self.config_cache = config_cache
+        self.project_config_file = project_config_file
+        self.lazy_config_sections = lazy_config_sections
+        self.batch_argument = batch_argument
+        self._config_file = None
+        self._config = None
+        self._config_source = None
+        self._config_layer = None
+        self._config_retype = []
+
+        for action in self._arg_parser._actions:
+            if isinstance(action, argparse._VersionAction):
+                action.version = self.version
+
+        if logger is not None:
+            self.milc_logger = False
+            self.log = logger
+
+        self.release_lock()
+
     def initialize_argparse(self) -> None:
         """Prepare to process arguments from sys.argv.
         """
@@ -227,15 +509,25 @@ class MILC(object):
 
         self.subcommands: Dict[str, Any] = {}
         self._subcommand_keys: Dict[int, str] = {}
-        self._subparsers: Optional['_SubParsersAction[Any]'] = None
-        self.argwarn = argcomplete.warn  # type: ignore[attr-defined]
+        self._lazy_subcommands: Dict[str, str] = {}
+        self._subcommand_specs: Dict[str, Dict[str, Any]] = {}
+        self._subcommand_names: List[str] = []
+        self._subparsers: Optional[LazySubParsersAction] = None
         self.args = AttrDict()
         self.args_passed = AttrDict()
+        self._argument_strings: Dict[str, Dict[str, List[str]]] = {}
         self._arg_parser = argparse.ArgumentParser(**kwargs)  # type: ignore
         self.set_defaults = self._arg_parser.set_defaults
 
         self.release_lock()
 
+    def argwarn(self, *args: Any) -> None:
+        """Print a warning from inside an argcomplete completer without breaking tab completion.
+        """
+        import argcomplete
+
+        argcomplete.warn(*args)  # type: ignore[attr-defined]
+
     def print_help(self, *args: Any, **kwargs: Any) -> None:
         """Print a help message for the main program or subcommand, depending on context.
         """
@@ -244,6 +536,7 @@ class MILC(object):
             if key and key in self.subcommands:
                 self.subcommands[key].print_help(*args, **kwargs)
                 return
+        self.set_subcommand_metavar()
         self._arg_parser.print_help(*args, **kwargs)
 
     def print_usage(self, *args: Any, **kwargs: Any) -> None:
@@ -254,8 +547,17 @@ class MILC(object):
             if key and key in self.subcommands:
                 self.subcommands[key].print_usage(*args, **kwargs)
                 return
+        self.set_subcommand_metavar()
         self._arg_parser.print_usage(*args, **kwargs)
 
+    def set_subcommand_metavar(self) -> None:
+        """Build the `{a,b,c}` list of subcommands shown in usage and help from the visible top level subcommands.
+
+        This is done once before the arguments are parsed, instead of every time a subcommand is added.
+        """
+        if self._subparsers is not None and self._subcommand_names:
+            self._subparsers.metavar = '{%s}' % ','.join(self._subcommand_names)
+
     def log_deprecated_warning(self, item_type: str, name: str, reason: str) -> None:
         """Logs a warning with a custom message if an argument or command is deprecated.
         """
@@ -289,16 +591,15 @@ class MILC(object):
             self.default_arguments['general'] = {}
 
         self.default_arguments['general'][arg_name] = kwargs.get('default')
+        self._add_config_type('general', arg_name, kwargs)
+        self._config_routes.clear()
 
         # Determine if it was passed on the command line
         if 'general' not in self.args_passed:
             self.args_passed['general'] = {}
 
-        self.args_passed['general'][arg_name] = False
-
-        for arg in arg_strings:
-            if _in_argv(arg):
-                self.args_passed['general'][arg_name] = True
+        self._argument_strings.setdefault('general', {})[arg_name] = arg_strings
+        self.args_passed['general'][arg_name] = any(_in_argv(arg) for arg in arg_strings)
 
         self.release_lock()
 
@@ -343,15 +644,20 @@ class MILC(object):
         self.add_argument('-V', '--version', version=self.version, action='version', help='Display the version and exit')
         self.add_argument('--interactive', action='store_true', help='Force interactive mode even when stdout is not a tty.')
         self.add_argument('--config-file', help='The location for the configuration file')
+        self.add_argument('--milc-timings', action='store_true', help=argparse.SUPPRESS)
+        self.add_argument('--milc-server', action='store_true', help=argparse.SUPPRESS)
 
         self.arg_only['config_file'] = ['general']
+        self.arg_only['milc_timings'] = ['general']
+        self.arg_only['milc_server'] = ['general']
+        self._config_routes.clear()
 
     def add_subparsers(self, title: str = 'Sub-commands', **kwargs: Any) -> None:
         if self._initialized:
             raise RuntimeError('You must run this before cli()!')
 
         self.acquire_lock()
-        self._subparsers = self._arg_parser.add_subparsers(title=title, dest='subparsers', **kwargs)
+        self._subparsers = self._arg_parser.add_subparsers(title=title, dest='subparsers', action=LazySubParsersAction, **kwargs)
         self.release_lock()
 
     def acquire_lock(self, blocking: bool = True) -> bool:
@@ -371,16 +677,12 @@ class MILC(object):
     def find_config_file(self) -> Path:
         """Locate the config file.
         """
-        config_file_index = _index_argv('--config-file')
-
-        if config_file_index is not None:
-            config_file_param = sys.argv[config_file_index]
+        config_file_arg = _argv_index().get('--config-file')
 
-            if '=' in config_file_param:
-                # get the file name from the '=' assignment
-                opt, config_file = config_file_param.split('=')
+        if config_file_arg is not None:
+            config_file_index, config_file = config_file_arg
 
-            else:
+            if config_file is None:
                 # assume the file name is next space-sep arg
                 if config_file_index + 1 >= len(sys.argv):
                     print('ERROR: --config-file requires a value.', file=sys.stderr)
@@ -394,6 +696,20 @@ class MILC(object):
 
         return Path(filedir, filename).resolve()
 
+    def _add_config_type(self, section: str, arg_name: str, kwargs: Dict[str, Any]) -> None:
+        """Called by self.add_argument and SubparserWrapper.add_argument: Remember the type config file values for this argument are converted to.
+        """
+        value_type = get_argument_type(kwargs)
+
+        if value_type is None:
+            return
+
+        self._config_types.setdefault(section, {})[arg_name] = value_type
+
+        # The config was read before this argument existed, so its value has to be converted again before it's used
+        if self._config is not None:
+            self._config_retype.append((section, arg_name))
+
     def _handle_deprecated(self, arg_name: str, kwargs: Dict[str, Any]) -> None:
         """Called by self.argument: Mark an argument as deprecated, if necessary.
         """
@@ -410,26 +726,39 @@ class MILC(object):
         """
         if self.env_prefix is None or not any(a.startswith('--') for a in args):
             return
-        prefix = self.env_prefix + '_' if self.env_prefix != '' else ''
+        # Remember the argument as it was registered, so cli.invoke() can resolve its env var again
+        self._env_var_arguments.append((config_name, arg_name, args, kwargs.copy()))
+        if not self._resolve_env_var(config_name, arg_name, kwargs):
+            return
+        # For boolean flags, argparse ignores default when another action already claimed the same dest, so we bypass it and apply the value in merge_args_into_config.
+        # For other args we still need to set the default so argparse accepts required=False.
+        if kwargs.get('action') not in ('store_true', 'store_boolean'):
+            kwargs['default'] = self._env_var_defaults[config_name][arg_name]
+        kwargs['required'] = False
+
+    def _resolve_env_var(self, config_name: str, arg_name: str, kwargs: Dict[str, Any]) -> bool:
+        """Called by self._apply_env_var_default and self._resolve_env_var_defaults: Read the env var for an argument into self._env_var_defaults, returning True when it was used.
+        """
+        prefix = self.env_prefix + '_' if self.env_prefix else ''
         if config_name == 'general':
             env_key = prefix + arg_name.replace('-', '_').upper()
         else:
             env_key = prefix + config_name.replace('-', '_').upper() + '_' + arg_name.replace('-', '_').upper()
         env_value = os.environ.get(env_key)
         if env_value is None:
-            return
+            return False
         action = kwargs.get('action')
         # store_false args are the --no-X half of store_boolean pairs; the store_boolean arg itself is already handled, so skip these entirely.
         if action == 'store_false':
             self.log.debug('Ignoring %s for --%s: store_false arguments do not support env var defaults', env_key, arg_name)
-            return
+            return False
         # List-producing and ambiguous-arity arguments are not supported — skip these.
         # Covers: nargs='+'/'*'/REMAINDER, nargs=N (integer), and action='append'.
         # nargs='?' is also excluded: passing the flag with no value should use const, not the env var, and that interaction is too subtle to handle reliably.
         nargs = kwargs.get('nargs')
         if nargs in ('+', '*', '?', argparse.REMAINDER) or isinstance(nargs, int) or action == 'append':
             self.log.debug('Ignoring %s for --%s: nargs=%r / action=%r arguments do not support env var defaults', env_key, arg_name, nargs, action)
-            return
+            return False
         type_fn = kwargs.get('type')
         if action in ('store_true', 'store_boolean'):
             resolved = env_value.lower() not in ('-1', '0', 'false', 'no', 'off', '')
@@ -438,26 +767,24 @@ class MILC(object):
                 resolved = type_fn(env_value)
             except (ValueError, TypeError) as e:
                 self._env_var_errors.append(f"environment variable {env_key}={env_value!r} is not the correct type: {e}")
-                return
+                return False
         else:
             resolved = env_value
-        # For boolean flags, argparse ignores default when another action already claimed the same dest, so we bypass it and apply the value in merge_args_into_config.
-        # For other args we still need to set the default so argparse accepts required=False.
-        if action not in ('store_true', 'store_boolean'):
-            kwargs['default'] = resolved
-        kwargs['required'] = False
         if config_name not in self.env_vars_used:
             self.env_vars_used[config_name] = {}
         self.env_vars_used[config_name][arg_name] = env_key
         if config_name not in self._env_var_defaults:
             self._env_var_defaults[config_name] = {}
         self._env_var_defaults[config_name][arg_name] = resolved
+        return True
 
     def _handle_arg_parsing(self, config_name: str, arg_name: str, args: Sequence[Any], kwargs: Dict[str, Any]) -> None:
         """Called by self.argument: Parse this argument into the right datastructures.
         """
         arg_strings = get_argument_strings(self._arg_parser, *args, **kwargs)
-        self._apply_env_var_default(config_name, arg_name, args, kwargs)
+
+        with self._phase('env var resolution'):
+            self._apply_env_var_default(config_name, arg_name, args, kwargs)
 
         if kwargs.get('arg_only'):
             if arg_name not in self.arg_only:
@@ -470,19 +797,13 @@ class MILC(object):
                 self.default_arguments[config_name] = {}
 
             self.default_arguments[config_name][arg_name] = kwargs.get('default')
-
-            config_section = _config_navigate(self.config, config_name)
-            if config_section[arg_name] is None:
-                config_section[arg_name] = kwargs.get('default')
+            self.add_config_defaults(config_name, {arg_name: kwargs.get('default')})
 
             if config_name not in self.args_passed:
                 self.args_passed[config_name] = {}
 
-            self.args_passed[config_name][arg_name] = False
-
-            for arg in arg_strings:
-                if _in_argv(arg):
-                    self.args_passed[config_name][arg_name] = True
+            self._argument_strings.setdefault(config_name, {})[arg_name] = arg_strings
+            self.args_passed[config_name][arg_name] = any(_in_argv(arg) for arg in arg_strings)
 
     def argument(self, *args: Any, **kwargs: Any) -> Callable[[Callable[P, R]], Callable[P, R]]:
         """Decorator to call self.add_argument or self.<subcommand>.add_argument.
@@ -518,9 +839,13 @@ class MILC(object):
             self.log.debug('Warning: Arguments have already been parsed, ignoring duplicate attempt!')
             return
 
-        argcomplete.autocomplete(self._arg_parser)
+        if '_ARGCOMPLETE' in os.environ:
+            import argcomplete
+
+            argcomplete.autocomplete(self._arg_parser)
 
         self.acquire_lock()
+        self.set_subcommand_metavar()
 
         for key, value in vars(self._arg_parser.parse_args()).items():
             self.args[key] = value
@@ -531,41 +856,142 @@ class MILC(object):
         if 'entrypoint' in self.args:
             self._subcommand = self.args.entrypoint
 
+        self._apply_env_var_args()
         self.release_lock()
 
+    def _apply_env_var_args(self) -> None:
+        """Called by self.parse_args: Set the arguments that weren't passed to their env var default.
+
+        argparse only knows the defaults from when the arguments were registered, while cli.invoke() resolves env vars again for every run.
+        """
+        sections = ['general']
+
+        if self.subcommand_path:
+            sections.append('.'.join(self.subcommand_path).replace('-', '_'))
+
+        for config_name, arg_name, args, kwargs in self._env_var_arguments:
+            if config_name not in sections or arg_name not in self.args or kwargs.get('action') in ('store_true', 'store_false', 'store_boolean'):
+                continue
+
+            if not any(_in_argv(arg) for arg in args):
+                self.args[arg_name] = self._env_var_defaults.get(config_name, {}).get(arg_name, kwargs.get('default'))
+
     def read_config_file(self) -> Tuple[Configuration, Configuration]:
         """Read in the configuration file and return Configuration objects for it and the config_source.
         """
+        config, config_source, config_layer = self._read_config_layers()
+
+        return config, config_source
+
+    def _read_config_layers(self) -> Tuple[Configuration, Configuration, Configuration]:
+        """Called by self.read_config_file and self.initialize_config: Returns the config, config_source and config_layer for the config file layers.
+
+        The layers are loaded lazily, starting from the highest precedence. A lower layer is only read when a key is missing from the layers above it, or when the whole configuration is iterated. When `lazy_config_sections` is set only the `general`, `user` and active subcommand sections are parsed when a layer is read.
+        """
+        # Project config files may have been created or removed since they were last searched for
+        _find_project_config_file.cache_clear()
         config = Configuration()
-        config_source = Configuration()
-        config_files = []
+        layers = self.config_layers
+        parsed: List[Optional[Dict[str, Dict[str, Any]]]] = [None] * len(layers)
+        subcommand_path = self.subcommand_path
+        eager_sections = [subcommand_path[0].replace('-', '_')] if subcommand_path else []
 
-        if self._config_file_explicit:
-            config_files.append(self.config_file)
-        else:
-            for config_file in (self.system_config_file, self.config_file):
-                if config_file:
-                    config_files.append(config_file)
+        if self.config_cache or self._parsed_config_files is not None:
+            parsed = list(self._parse_config_files([config_file for layer, config_file in layers]))
 
-        for config_file in config_files:
-            if not config_file.exists():
-                continue
+        ConfigLayers([(layer, config_file, sections) for (layer, config_file), sections in zip(layers, parsed)], config, self.lazy_config_sections, eager_sections, self._config_types)
 
-            _read_config_file(config_file, config, config_source)
+        return config, config._view('source'), config._view('layer')
 
-        return config, config_source
+    def _parse_config_files(self, config_files: List[Path]) -> List[Dict[str, Dict[str, Any]]]:
+        """Called by self._read_config_layers and self._preload_config: Returns the parsed sections of each config file from memory or the config cache, parsing them and updating the cache when they've changed.
+        """
+        import milc
+
+        from ._config_cache import config_file_keys, config_types_key, read_config_cache, write_config_cache
+
+        keys = config_file_keys(config_files)
+        types_key = config_types_key(self._config_types)
+
+        # The resident server keeps the files it parsed last in memory
+        if self._parsed_config_files is not None and self._parsed_config_files[:2] == (keys, types_key):
+            return self._parsed_config_files[2]
+
+        parsed = read_config_cache(self.config_cache_file, keys, milc.__VERSION__, types_key) if self.config_cache else None
+
+        if parsed is None:
+            parsed = [_parse_config_file(config_file, self._config_types) for config_file in config_files]
+
+            if self.config_cache and not write_config_cache(self.config_cache_file, keys, milc.__VERSION__, parsed, types_key):
+                self.log.debug('Could not write config cache %s.', self.config_cache_file)
+
+        if self._parsed_config_files is not None:
+            self._parsed_config_files = (keys, types_key, parsed)
+
+        return parsed
+
+    def _preload_config(self) -> None:
+        """Called by the resident server: Parse the config files into memory, or again if they changed, so the commands it runs don't have to.
+        """
+        if self._parsed_config_files is None:
+            self._parsed_config_files = ([], (), [])
+
+        _find_project_config_file.cache_clear()
+        self._parse_config_files([config_file for layer, config_file in self.config_layers])
 
     def initialize_config(self) -> None:
         """Read in the configuration file and store it in self.config.
+
+        This happens the first time `self.config` or `self.config_source` is used, so things like tab completion and `--help` never read the config file.
+        """
+        self.acquire_lock()
+
+        with self._phase('config read'):
+            self._config, self._config_source, self._config_layer = self._read_config_layers()
+
+        for section, defaults in self._config_defaults.items():
+            self._apply_config_defaults(section, defaults)
+
+        self.release_lock()
+
+    def add_config_defaults(self, section: str, defaults: Dict[str, Any]) -> None:
+        """Register default values for a config section, applying them now if the config has already been read.
         """
         self.acquire_lock()
-        self.config, self.config_source = self.read_config_file()
+        section_defaults = self._config_defaults.setdefault(section, {})
+
+        for arg_name, default in defaults.items():
+            if section_defaults.get(arg_name) is None:
+                section_defaults[arg_name] = default
+
+        if self._config is not None:
+            self._apply_config_defaults(section, defaults)
+
         self.release_lock()
 
+    def _apply_config_defaults(self, section: str, defaults: Dict[str, Any]) -> None:
+        """Called by self.initialize_config and self.add_config_defaults: Fill in defaults for options the config file didn't set.
+
+        The defaults are only merged in when each option is read, so sections of the config files that aren't used are never parsed for them.
+        """
+        assert self._config is not None
+
+        for arg_name, default in defaults.items():
+            _config_default(self._config, section, arg_name, default)
+
+    def _retype_config_options(self) -> None:
+        """Called by self.merge_args_into_config: Convert config values read before their argument's type was registered.
+        """
+        if self._config_retype and self.config._layers is not None:
+            self.config._layers.retype(self._config_retype)
+
+        self._config_retype = []
+
     def merge_args_into_config(self) -> None:
         """Merge CLI arguments into self.config to create the runtime configuration.
         """
         self.acquire_lock()
+        self._retype_config_options()
         subcommand_name = None
         if self._subcommand is not None:
             dotted_key = self._subcommand_keys.get(
@@ -574,103 +1000,233 @@ class MILC(object):
             )
             subcommand_name = dotted_key.replace('-', '_')
 
-        for argument in self.args:
-            if argument in ('subparsers', 'entrypoint'):
+        routes = self._argument_routes(subcommand_name)
+        config_sections: Dict[str, Configuration] = {}
+
+        for argument, arg_value in self.args.items():
+            section = routes.get(argument)
+
+            if section is None:
                 continue
 
-            # Find the argument's section.
-            # Prefer the active subcommand section when the argument was registered there,
-            # since a subcommand arg with the same dest as a general arg should win.
-            if subcommand_name and argument in self.default_arguments.get(subcommand_name, {}):
-                section = subcommand_name
-            elif argument in self.default_arguments.get('general', {}):
-                section = 'general'
+            # Each section is only looked up once, instead of once for every argument in it
+            config_section = config_sections.get(section)
+
+            if config_section is None:
+                config_section = config_sections[section] = _config_navigate(self.config, section)
+
+            # Merge this argument into self.config
+            if self.args_passed[section][argument] or (arg_value and argument in self._config_store_true) or (not arg_value and argument in self._config_store_false):
+                record = _config_record(config_section, argument)
+                record.value = arg_value
+                record.source = 'argument'
+            elif section in self.env_vars_used and argument in self.env_vars_used[section]:
+                # Env var overrides config file and default; use stored resolved value (not arg_value, since argparse may not have used our default for boolean flags)
+                record = _config_record(config_section, argument)
+                if record.value is not None and record.source == 'config_file':
+                    self.log.debug('Environment variable %s overrides config file value for %s.%s', self.env_vars_used[section][argument], section, argument)
+                record.value = self._env_var_defaults[section][argument]
+                record.source = 'env_var'
             else:
-                section = subcommand_name
+                # Capture the default value, without reading the config file layers that might set it
+                _config_default(self.config, section, argument, arg_value)
+
+        self.release_lock()
+
+    def _argument_routes(self, subcommand_name: Optional[str]) -> Dict[str, Optional[str]]:
+        """Called by self.merge_args_into_config: Returns the config section each argument is merged into when `subcommand_name` runs.
+
+        An argument registered for the subcommand wins over a `general` argument with the same name, and `arg_only` arguments map to None. The table is built the first time each subcommand runs and is thrown away when another argument is registered.
+        """
+        routes = self._config_routes.get(subcommand_name)
+
+        if routes is not None:
+            return routes
 
+        routes = {}
+
+        for section in ('general', subcommand_name):
             if section is None:
                 continue
 
-            if argument not in self.arg_only or section not in self.arg_only[argument]:
-                # Determine the arg value and source
-                arg_value = getattr(self.args, argument)
-                config_section = _config_navigate(self.config, section)
-                config_source_section = _config_navigate(self.config_source, section)
-
-                # Merge this argument into self.config
-                if self.args_passed[section][argument] or (argument in self._config_store_true and arg_value) or (argument in self._config_store_false and not arg_value):
-                    config_section[argument] = arg_value
-                    config_source_section[argument] = 'argument'
-                elif section in self.env_vars_used and argument in self.env_vars_used[section]:
-                    # Env var overrides config file and default; use stored resolved value (not arg_value, since argparse may not have used our default for boolean flags)
-                    if config_source_section[argument] == 'config_file':
-                        self.log.debug('Environment variable %s overrides config file value for %s.%s', self.env_vars_used[section][argument], section, argument)
-                    config_section[argument] = self._env_var_defaults[section][argument]
-                    config_source_section[argument] = 'env_var'
-                elif config_section[argument] is None:
-                    # Capture the default value
-                    config_section[argument] = arg_value
+            for argument in self.default_arguments.get(section, {}):
+                routes[argument] = None if section in self.arg_only.get(argument, ()) else section
 
-        self.release_lock()
+        self._config_routes[subcommand_name] = routes
+
+        return routes
 
     def _save_config_file(self, config: Configuration, config_file: Optional[Path] = None) -> None:
         """Write config to disk.
+
+        The existing file is edited in place so comments and the order of options are kept, and it is only written when its content changes. When `config_file` is one of the config layers only the options that changed since it was read are written, so changes other processes made in the meantime are kept.
         """
+        from ._config_backends import config_backend
+        from ._config_writer import config_changes
+
         config_file = config_file or self.config_file
-        config_dir = config_file.parent
-        sane_config = RawConfigParser()
-        tmpfile_name = None
+        options: Dict[Tuple[str, str], Any] = {}
+        baseline = self._config_file_baseline(config_file)
 
         # Generate a sanitized version of our running configuration.
-        # _collect_config_sections recurses into nested ConfigurationSection objects,
-        # emitting (dotted_section_name, option_name, value) for every leaf.
-        for section_name, option_name, value in _collect_config_sections(config):
-            if not sane_config.has_section(section_name):
-                sane_config.add_section(section_name)
-            config_source_section = _config_navigate(self.config_source, section_name)
-            if config_source_section[option_name] == 'config_file' and value is not None:
-                sane_config.set(section_name, option_name, str(value))
-
-        if not config_dir.exists():
-            config_dir.mkdir(parents=True, exist_ok=True)
-
-        # Write the config file atomically.
+        # _collect_config_records recurses into nested ConfigurationSection objects,
+        # emitting (dotted_section_name, option_name, record) for every leaf.
+        for section_name, option_name, record in _collect_config_records(config):
+            if record.value is not None and _config_record_source(config, section_name, option_name, record) == 'config_file':
+                options[(section_name, option_name)] = record.value
+
         self.acquire_lock()
 
         try:
-            with NamedTemporaryFile(mode='w', dir=str(config_dir), delete=False) as tmpfile:
-                tmpfile_name = tmpfile.name
-                sane_config.write(tmpfile)
+            if not config_backend(config_file).write(config_file, options if baseline is None else config_changes(options, baseline), replace=baseline is None):
+                self.log.debug('Config file %s is unchanged, not writing it.', str(config_file))
 
-            if os.path.getsize(tmpfile_name) > 0:
-                os.replace(tmpfile_name, str(config_file))
-            else:
-                self.log.warning('Config file saving failed, not replacing %s with %s.', str(config_file), tmpfile_name)
         finally:
-            try:
-                if tmpfile_name and os.path.exists(tmpfile_name):
-                    os.unlink(tmpfile_name)
-            finally:
-                self.release_lock()
+            self.release_lock()
+
+    def _config_file_baseline(self, config_file: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Called by self._save_config_file: Returns the sections that were read from `config_file`, or None if it isn't one of the config layers.
+        """
+        layers = self.config._layers
+
+        if layers is None:
+            return None
+
+        for layer, layer_file in self.config_layers:
+            if layer_file == config_file:
+                layers.load_all()
+
+                return layers.loaded.get(layer, {})
+
+        # The user config file didn't exist when it was read, so anything in it now was written by other processes
+        if config_file == self.config_file:
+            return {}
+
+        return None
+
+    @contextmanager
+    def config_transaction(self, config_file: Optional[Union[str, Path]] = None, fsync: str = 'never') -> Generator['ConfigTransaction', None, None]:
+        """Collect config changes and write them to the config file in a single edit.
+
+        Changes made with `transaction.set()`, `transaction.delete()` and `cli.write_config_option()` inside the `with` block are written when it exits, unless it raises an exception. Transactions can be nested, in which case the changes are written when the outermost one exits using the strictest `fsync` policy given. A nested transaction must write to the same file as the outer one or `ValueError` is raised.
+
+        Args:
+            config_file
+                The file to write to. Defaults to `cli.config_file`.
+
+            fsync
+                One of 'never', 'file' to flush the file to disk before it replaces the old one, or 'directory' to also flush the rename.
+        """
+        from ._config_writer import FSYNC_POLICIES, ConfigTransaction
+
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {", ".join(FSYNC_POLICIES)}, not {fsync!r}')
+
+        if config_file is not None:
+            config_file = Path(config_file).expanduser().resolve()
+
+        if self._config_transaction is not None:
+            if config_file is not None and config_file != self._config_transaction.config_file:
+                raise ValueError(f'Can not nest a transaction for {config_file} inside a transaction for {self._config_transaction.config_file}')
+
+            if FSYNC_POLICIES.index(fsync) > FSYNC_POLICIES.index(self._config_transaction.fsync):
+                self._config_transaction.fsync = fsync
+
+            yield self._config_transaction
+            return
+
+        transaction = ConfigTransaction(self, config_file if config_file is not None else self.config_file, fsync)
+        self._config_transaction = transaction
+
+        try:
+            yield transaction
+
+        finally:
+            self._config_transaction = None
+
+        self.acquire_lock()
+
+        try:
+            written = transaction.commit()
+
+        finally:
+            self.release_lock()
+
+        if written:
+            self.log.info('Wrote configuration to %s', shlex.quote(str(transaction.config_file)))
 
     def write_config_option(self, section: str, option: Any) -> None:
         """Save a single config option to the config file.
+
+        Only the line for this option is changed. Inside `cli.config_transaction()` the change is written when the transaction ends.
         """
         if not self.config_file:
             self.log.warning('%s.config_file not set, not saving config!', self.__class__.__name__)
             return
 
-        config, config_source = self.read_config_file()
+        with self.config_transaction() as transaction:
+            transaction.record(section, option, _config_navigate(self.config, section)[option])
 
-        if section in config and option in config[section] and config[section][option] is None:
-            del config[section][option]
-        else:
-            config[section][option] = str(self.config[section][option])
+    def register_config_backend(self, extension: str, backend: 'ConfigBackend') -> None:
+        """Use `backend` to read and write config files ending in `extension`.
+
+        MILC includes backends for `.ini`, `.toml`, `.json` and SQLite (`.sqlite`, `.sqlite3`, `.db`) files. Files with any other extension are read as INI.
+
+        Backends are registered for the whole process, so every MILC instance uses them.
+        """
+        from ._config_backends import register_config_backend
 
-        self._save_config_file(config)
+        register_config_backend(extension, backend)
 
-        # Housekeeping
-        self.log.info('Wrote configuration to %s', shlex.quote(str(self.config_file)))
+    def config_changed(self, handler: Callable[P, R]) -> Callable[P, R]:
+        """Decorator to register a function to call when reloading the config files changes any options.
+
+        The decorated function is called with ``cli`` and a list of the ``section.option`` names that changed.
+        """
+        self.acquire_lock()
+
+        try:
+            self._config_callbacks.append(handler)
+
+        finally:
+            self.release_lock()
+
+        return handler
+
+    def reload_config(self) -> List[str]:
+        """Parse the config files that have changed and apply their changes to the running configuration.
+
+        Options set by arguments or environment variables are left alone. Returns the ``section.option`` of each option that changed, after calling any `@cli.config_changed` functions.
+        """
+        from ._config_reloader import ConfigReloader
+
+        if self._config_reloader is None:
+            self._config_reloader = ConfigReloader(self, None, False)
+
+        return self._config_reloader.check()
+
+    def watch_config(self, interval: Optional[float] = 1.0, sighup: bool = True) -> 'ConfigReloader':
+        """Reload the config files in a background thread when they change.
+
+        Args:
+            interval
+                How many seconds to wait between checking the config files' mtimes. When None they're only checked on SIGHUP.
+
+            sighup
+                Check the config files when the process receives SIGHUP. This only works when called from the main thread.
+
+        Returns the ConfigReloader, which you can `stop()`.
+        """
+        from ._config_reloader import ConfigReloader
+
+        if self._config_reloader is None:
+            self._config_reloader = ConfigReloader(self, interval, sighup)
+
+        self._config_reloader.interval = interval
+        self._config_reloader.sighup = sighup
+        self._config_reloader.start()
+
+        return self._config_reloader
 
     def save_config(self, config_file: Optional[Union[str, Path]] = None) -> None:
         """Save the current configuration to the config file or an explicit path.
@@ -689,6 +1245,133 @@ class MILC(object):
 
         self.log.info('Wrote configuration to %s', shlex.quote(str(save_path)))
 
+    def load_manifest(self) -> bool:
+        """Register subcommands from the manifest cache instead of importing their modules.
+
+        Returns True when a current manifest was loaded. When this returns False you should import your subcommand modules as usual, and a fresh manifest will be written when `cli()` runs.
+        """
+        import milc
+
+        from ._manifest import MANIFEST_TYPES, read_manifest
+
+        if self._initialized:
+            raise RuntimeError('You must run this before cli()!')
+
+        self._manifest_enabled = True
+        manifest = read_manifest(self.manifest_file, self.version, milc.__VERSION__)
+        known_keys = set(self.subcommands)
+
+        if manifest is None:
+            return False
+
+        # Make sure every parent exists before we register anything, so a bad manifest doesn't leave us half loaded
+        for spec in manifest['subcommands']:
+            if spec['parent'] and spec['parent'] not in known_keys:
+                self.log.debug('Ignoring manifest %s: parent subcommand %s is not registered.', self.manifest_file, spec['parent'])
+                return False
+
+            known_keys.add(spec['key'])
+
+        self.acquire_lock()
+
+        for spec in manifest['subcommands']:
+            if spec['key'] not in self.subcommands:
+                self._register_subcommand(spec['handler'], spec['name'], spec['description'], spec['hidden'], spec['deprecated'], spec['parent'], spec['kwargs'])
+
+        for section, defaults in manifest['default_arguments'].items():
+            self.default_arguments.setdefault(section, {}).update(defaults)
+            self.add_config_defaults(section, {arg_name: default for arg_name, default in defaults.items() if section not in manifest['arg_only'].get(arg_name, [])})
+
+        for section, types in manifest['config_types'].items():
+            self._config_types.setdefault(section, {}).update({arg_name: MANIFEST_TYPES[type_name] for arg_name, type_name in types.items()})
+
+        for arg_name, sections in manifest['arg_only'].items():
+            self.arg_only.setdefault(arg_name, []).extend(section for section in sections if section not in self.arg_only[arg_name])
+
+        self._config_store_true.update(manifest['store_true'])
+        self._config_store_false.update(manifest['store_false'])
+        self._config_routes.clear()
+
+        for arg_name, msg in manifest['deprecated_arguments'].items():
+            self._deprecated_arguments.setdefault(arg_name, msg)
+
+        self._manifest_loaded = True
+        self.release_lock()
+
+        return True
+
+    def save_manifest(self) -> None:
+        """Write the registered subcommand tree to the manifest cache.
+
+        Subcommands defined in the `__main__` script are left out because they are registered on every run.
+        """
+        import milc
+
+        from ._manifest import MANIFEST_FORMAT, MANIFEST_TYPES, handler_import_path, source_mtimes, write_manifest
+
+        subcommands = []
+        module_names = set()
+        sections = set()
+
+        for dotted_key, spec in self._subcommand_specs.items():
+            import_path = handler_import_path(spec['handler'])
+
+            if import_path is None:
+                self.log.debug('Not writing manifest: %s can not be imported by path.', spec['handler'])
+                return
+
+            module_name = import_path.split(':')[0]
+
+            if module_name == '__main__':
+                continue
+
+            module_names.add(module_name)
+            sections.add(dotted_key.replace('-', '_'))
+            subcommands.append({
+                'key': dotted_key,
+                'handler': import_path,
+                'name': spec['name'],
+                'parent': spec['parent'],
+                'description': spec['description'],
+                'hidden': spec['hidden'],
+                'deprecated': spec['deprecated'],
+                'kwargs': spec['kwargs'],
+            })
+
+        manifest = {
+            'format': MANIFEST_FORMAT,
+            'app_version': self.version,
+            'milc_version': milc.__VERSION__,
+            'sources': source_mtimes(module_names),
+            'subcommands': subcommands,
+            'default_arguments': {
+                section: defaults
+                for section, defaults in self.default_arguments.items()
+                if section in sections
+            },
+            'arg_only': {
+                arg_name: [section for section in arg_sections if section in sections]
+                for arg_name, arg_sections in self.arg_only.items()
+            },
+            # Only built in types can be stored, other arguments have their type guessed from the value on warm starts
+            'config_types': {
+                section: {
+                    arg_name: type_name
+                    for arg_name, value_type in types.items()
+                    for type_name, manifest_type in MANIFEST_TYPES.items()
+                    if value_type is manifest_type
+                }
+                for section, types in self._config_types.items()
+                if section in sections
+            },
+            'store_true': sorted(self._config_store_true),
+            'store_false': sorted(self._config_store_false),
+            'deprecated_arguments': self._deprecated_arguments,
+        }
+
+        if not write_manifest(self.manifest_file, manifest):
+            self.log.debug('Could not write manifest %s.', self.manifest_file)
+
     def check_deprecated(self) -> None:
         entry_name = getattr(self._entrypoint, '__name__')
 
@@ -705,11 +1388,14 @@ class MILC(object):
                 msg = self._deprecated_commands[name]
                 self.log_deprecated_warning('Subcommand', name, msg)
 
-        deprecated_args_passed = [arg.split('=')[0].lstrip('-').replace('-', '_') for arg in sys.argv if arg.split('=')[0].lstrip('-').replace('-', '_') in self._deprecated_arguments]
+        if not self._deprecated_arguments:
+            return
+
+        for arg in _argv_index():
+            arg = arg.lstrip('-').replace('-', '_')
 
-        for arg in deprecated_args_passed:
-            msg = self._deprecated_arguments[arg]
-            self.log_deprecated_warning('Argument', arg, msg)
+            if arg in self._deprecated_arguments:
+                self.log_deprecated_warning('Argument', arg, self._deprecated_arguments[arg])
 
     def __call__(self) -> Any:
         """Execute the entrypoint function.
@@ -717,29 +1403,68 @@ class MILC(object):
         if self._initialized:
             raise RuntimeError('cli() has already been called and should not be called twice!')
 
+        if self._manifest_enabled and not self._manifest_loaded and '_ARGCOMPLETE' not in os.environ:
+            self.save_manifest()
+
+        # Must happen before we're initialized so the imported modules can still use the decorators
+        if self._lazy_subcommands:
+            with self._phase('load_lazy_subcommands'):
+                self.load_lazy_subcommands()
+
+        # Added last, and only when the program doesn't have a --batch argument of its own
+        if self.batch_argument and '--batch' not in self._arg_parser._option_string_actions:
+            self.add_argument('--batch', dest='milc_batch', metavar='FILE', help='Run each shell-quoted command line in FILE, or stdin for -, and report their exit codes.')
+            self.arg_only['milc_batch'] = ['general']
+
+        self._initialize_colorama()
+
+        # Tab completion, --help and --version exit from inside parse_args(), before we read the config file, setup logging, or run prerun hooks.
+        with self._phase('parse_args'):
+            self.parse_args()
+
+        if self.args.milc_server:
+            return self.serve()
+
         self.acquire_lock()
         self._initialized = True
         self.release_lock()
 
-        colorama.init()
-        self.parse_args()
-        self.merge_args_into_config()
+        if self.args.get('milc_batch'):
+            return self._run_batch()
 
-        if self.config.general.interactive:
-            self.interactive = True
+        return self._run()
 
-        self.setup_logging()
+    def _run(self) -> Any:
+        """Called by self.__call__ and self.invoke: Parse the arguments if they haven't been yet, then run the prerun hooks and the entrypoint or subcommand.
+        """
+        self._initialize_colorama()
+
+        # Tab completion, --help and --version exit from inside parse_args(), before we read the config file, setup logging, or run prerun hooks.
+        if not self.args:
+            with self._phase('parse_args'):
+                self.parse_args()
+
+        with self._phase('merge_args_into_config'):
+            self.merge_args_into_config()
+
+        with self._phase('setup_logging'):
+            self.setup_logging()
 
         try:
-            self.check_deprecated()
+            with self._phase('check_deprecated'):
+                self.check_deprecated()
+
             for hook, args, kwargs in self._prerun:
-                hook(self, *args, **kwargs)
+                with self._phase('prerun ' + getattr(hook, '__name__', repr(hook))):
+                    hook(self, *args, **kwargs)
 
             if self._subcommand:
-                return self._subcommand(self)
+                with self._phase('entrypoint ' + getattr(self._subcommand, '__name__', repr(self._subcommand))):
+                    return self._subcommand(self)
 
             elif self._entrypoint is not None:
-                return self._entrypoint(self)
+                with self._phase('entrypoint ' + getattr(self._entrypoint, '__name__', repr(self._entrypoint))):
+                    return self._entrypoint(self)
 
             raise RuntimeError('No entrypoint provided!')
         except (SystemExit, KeyboardInterrupt):
@@ -748,6 +1473,247 @@ class MILC(object):
             self.log.error('%s: %s', type(e).__name__, e)
             sys.exit(255)
 
+    def _initialize_colorama(self) -> None:
+        """Called by self.__call__ and self._run: Wrap stdout and stderr with colorama, once.
+        """
+        # Completions are written to their own file descriptor, so only output that goes to the terminal needs colorama, including errors and --help from parse_args().
+        if not self._colorama_initialized and '_ARGCOMPLETE' not in os.environ:
+            import colorama
+
+            colorama.init()
+            self._colorama_initialized = True
+
+    def invoke(self, argv: Sequence[str], env: Optional[Dict[str, str]] = None, stdin: Optional[IO[str]] = None) -> Tuple[Any, int]:
+        """Run the program with `argv` in this process and return the entrypoint's result and the exit code.
+
+        The parser, subcommands and imports are reused, but every call parses `argv`, reads the config files and sets up logging from scratch, the same as a new process would. `cli.args`, `cli.config` and the other per-run state are put back the way they were when it returns, so `invoke()` can be called any number of times, including from inside a running command.
+
+        Args:
+            argv
+                The arguments to parse, without the program name.
+
+            env
+                When set, replaces `os.environ` while the command runs, the same as `env` for `subprocess.run()`.
+
+            stdin
+                When set, replaces `sys.stdin` while the command runs.
+
+        The exit code is 1 when the entrypoint returns False, the code passed to `sys.exit()` when it exits, 255 when it raises an exception, and 0 otherwise. Calls from several threads take turns, because `sys.argv`, `os.environ` and the root logger are shared by the whole process.
+        """
+        with self._invoke_lock:
+            try:
+                # Subcommands are imported before the run gets its own state, so the arguments they register are kept afterwards
+                if self._lazy_subcommands:
+                    with self._phase('load_lazy_subcommands'):
+                        self.load_lazy_subcommands(argv)
+
+                with self._invocation(argv, env, stdin):
+                    result = self._run()
+
+            except SystemExit as e:
+                return None, _exit_code(e)
+
+            return result, 1 if result is False else 0
+
+    def batch(self, lines: Iterable[str], stdin: Optional[IO[str]] = None) -> Dict[int, int]:
+        """Run every command line in `lines` with `invoke()` and return the exit code of each, keyed by line number.
+
+        Each line is split like a shell would split it, without expanding variables or globs. Blank lines and `#` comments are skipped. A line that can't be split, such as one with an unclosed quote, gets exit code 2 without running.
+
+        Args:
+            lines
+                The command lines to run, without the program name.
+
+            stdin
+                When set, replaces `sys.stdin` for every command. Pass an empty `io.StringIO()` when `lines` comes from stdin, so the commands can't read the rest of the batch.
+        """
+        exit_codes = {}
+
+        for number, line in enumerate(lines, 1):
+            try:
+                argv = shlex.split(line, comments=True)
+
+            except ValueError as e:
+                self.log.error('Line %d: Could not split %r: %s', number, line.strip(), e)
+                exit_codes[number] = 2
+                continue
+
+            if not argv:
+                continue
+
+            result, exit_code = self.invoke(argv, stdin=stdin)
+            exit_codes[number] = exit_code
+
+            if exit_code == 0:
+                self.log.info('Line %d: %s {fg_green}exited with 0', number, shlex.join(argv))
+
+            else:
+                self.log.error('Line %d: %s {fg_red}exited with %d', number, shlex.join(argv), exit_code)
+
+        return exit_codes
+
+    def _run_batch(self) -> bool:
+        """Called by __call__() when `--batch` is parsed from the command line: Run the command lines from the batch file and log a summary.
+
+        Exits with 1 when any of the commands failed.
+        """
+        # The batch's own arguments, such as -v, only control its logging
+        self.merge_args_into_config()
+        self.setup_logging()
+
+        if self.args.milc_batch == '-':
+            exit_codes = self.batch(sys.stdin, stdin=io.StringIO())
+
+        else:
+            try:
+                with open(self.args.milc_batch, encoding='utf-8') as batch_file:
+                    exit_codes = self.batch(batch_file)
+
+            except OSError as e:
+                self.log.error('Could not read batch file %s: %s', self.args.milc_batch, e.strerror)
+                sys.exit(1)
+
+        failed = sum(1 for exit_code in exit_codes.values() if exit_code != 0)
+        self.log.info('Ran %d commands: %d succeeded, %d failed.', len(exit_codes), len(exit_codes) - failed, failed)
+
+        if failed:
+            sys.exit(1)
+
+        return True
+
+    @contextmanager
+    def _invocation(self, argv: Sequence[str], env: Optional[Dict[str, str]], stdin: Optional[IO[str]]) -> Generator[None, None, None]:
+        """Called by self.invoke: Give a run of the program fresh state for `argv`, and put everything back when it's done.
+        """
+        state = {name: self.__dict__[name] for name in INVOCATION_STATE if name in self.__dict__}
+        argv_orig, environ, stdin_orig, handlers, ansi = sys.argv, dict(os.environ), sys.stdin, logging.root.handlers[:], dict(ansi_config)
+
+        try:
+            sys.argv = [sys.argv[0] if sys.argv else self.prog_name, *argv]
+            _invalidate_argv_index()
+
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+
+            if stdin is not None:
+                sys.stdin = stdin
+
+            self.args = AttrDict()
+            self.args_passed = self._find_args_passed()
+            self._subcommand = None
+            self._config = self._config_source = self._config_layer = None
+            self._config_retype = []
+            self._interactive = None
+            self._config_file_explicit = _in_argv('--config-file')
+
+            if self._config_file_explicit or state.get('_config_file_explicit'):
+                self._config_file = None
+
+            self._resolve_env_var_defaults()
+
+            yield
+
+        finally:
+            for handler in logging.root.handlers:
+                if handler not in handlers:
+                    handler.close()
+
+            logging.root.handlers = handlers
+            ansi_config.update(ansi)
+            sys.argv, sys.stdin = argv_orig, stdin_orig
+            _invalidate_argv_index()
+
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(environ)
+
+            self.__dict__.update(state)
+
+    def serve(self) -> bool:
+        """Run as a resident server for `milc/client.py` until interrupted. Called by __call__() when `--milc-server` is parsed from the command line.
+
+        Every subcommand is imported, its parser is built and the config files are parsed before the server starts listening on `self.server_socket`, so the commands it forks off only have to run.
+        """
+        from ._server import MILCServer, server_supported
+
+        if not server_supported():
+            self.log.error('--milc-server needs a platform with Unix sockets and fork().')
+            return False
+
+        # The server's own arguments, such as -v, only control its logging
+        if not self.args:
+            self.parse_args()
+
+        self.merge_args_into_config()
+        self.setup_logging()
+
+        # Each command wraps its client's stdout and stderr itself, instead of the server's
+        if self._colorama_initialized:
+            import colorama
+
+            colorama.deinit()
+            self._colorama_initialized = False
+
+        for dotted_key in list(self._lazy_subcommands):
+            self.import_lazy_subcommand(dotted_key)
+
+        self.acquire_lock()
+        self._initialized = True
+        self.release_lock()
+
+        # Build every parser now, instead of in each child that uses one
+        for subcommand in self.subcommands.values():
+            subcommand.subparser
+
+        self._preload_config()
+        client = Path(__file__).parent / 'client.py'
+        self.log.info('Serving %s on %s', self.prog_name, self.server_socket)
+        self.log.info('Run commands with: %s -S %s %s %s [ARGS...]', sys.executable, client, self.server_socket, os.path.abspath(sys.argv[0]))
+        MILCServer(self, self.server_socket).serve_forever()
+
+        return True
+
+    def _handler_modules(self) -> Set[str]:
+        """Called by the resident server: Returns the modules the entrypoint, the subcommands and MILC itself come from.
+        """
+        from ._manifest import handler_import_path
+
+        modules = {__name__, getattr(self._entrypoint, '__module__', __name__)}
+
+        for spec in self._subcommand_specs.values():
+            import_path = handler_import_path(spec['handler'])
+
+            if import_path is not None:
+                modules.add(import_path.split(':')[0])
+
+        return modules
+
+    def _find_args_passed(self) -> AttrDict:
+        """Called by self._invocation: Returns which of the registered arguments were passed in sys.argv.
+        """
+        args_passed = AttrDict()
+
+        for section, arguments in self._argument_strings.items():
+            args_passed[section] = {arg_name: any(_in_argv(arg) for arg in arg_strings) for arg_name, arg_strings in arguments.items()}
+
+        return args_passed
+
+    def _resolve_env_var_defaults(self) -> None:
+        """Called by self._invocation: Read the env var defaults for the arguments again, from the current environment.
+        """
+        self.env_vars_used = {}
+        self._env_var_defaults = {}
+        self._env_var_errors = []
+        self._config_defaults = {section: dict(defaults) for section, defaults in self._config_defaults.items()}
+
+        for config_name, arg_name, args, kwargs in self._env_var_arguments:
+            used = self._resolve_env_var(config_name, arg_name, kwargs)
+
+            # Boolean flags never had their env var baked into the config defaults, see _apply_env_var_default
+            if kwargs.get('action') not in ('store_true', 'store_boolean') and arg_name in self._config_defaults.get(config_name, {}):
+                self._config_defaults[config_name][arg_name] = self._env_var_defaults[config_name][arg_name] if used else kwargs.get('default')
+
     def entrypoint(self, description: str, deprecated: Optional[str] = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
         """Decorator that marks the entrypoint used when a subcommand is not supplied.
         Args:
@@ -816,22 +1782,32 @@ class MILC(object):
 
         return prerun_func
 
+    @overload
+    def add_subcommand(self, handler: str, description: str, hidden: bool = False, deprecated: Optional[str] = None, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> str:
+        ...
+
+    @overload
+    def add_subcommand(self, handler: Callable[P, R], description: str, hidden: bool = False, deprecated: Optional[str] = None, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> Callable[P, R]:
+        ...
+
     def add_subcommand(
         self,
-        handler: Callable[P, R],
+        handler: Union[Callable[..., Any], str],
         description: str,
         hidden: bool = False,
         deprecated: Optional[str] = None,
         parent: Optional[Callable[..., Any]] = None,
         name: Optional[str] = None,
         **kwargs: Any,
-    ) -> Callable[P, R]:
+    ) -> Union[Callable[..., Any], str]:
         """Register a subcommand.
 
         Args:
 
             handler
-                The function to execute for this subcommand.
+                The function to execute for this subcommand. This can also be an import path
+                string such as `'mytool.commands.flash:flash'`, in which case the module is
+                only imported when this subcommand is selected on the command line.
 
             description
                 A one-line description to display in --help
@@ -855,51 +1831,133 @@ class MILC(object):
         if self._initialized:
             raise RuntimeError('You must run this before cli()!')
 
+        if isinstance(handler, str):
+            module_name, _, function_name = handler.partition(':')
+
+            if not module_name or not function_name:
+                raise ValueError(f"Lazy subcommand '{handler}' must be of the form 'module:function'.")
+
+            handler_name = function_name.split('.')[-1]
+        else:
+            handler_name = getattr(handler, '__name__')
+
+        parent_key = None
+
         if parent is not None:
             if not callable(parent):
                 raise TypeError("'parent' must be a function object, not a string.")
             parent_key = self._subcommand_keys.get(id(parent))
             if parent_key is None:
                 raise ValueError(f"Parent function '{getattr(parent, '__name__', repr(parent))}' is not a registered subcommand.")
-            parent_wrapper = self.subcommands[parent_key]
-            target_subparsers = parent_wrapper.get_child_subparsers()
-            cli_name = name or getattr(handler, '__name__').replace('_', '-')
-            dotted_key = f"{parent_key}.{cli_name}"
+
+        self._register_subcommand(handler, name or handler_name.replace('_', '-'), description, hidden, deprecated, parent_key, kwargs)
+
+        return handler
+
+    def _register_subcommand(self, handler: Union[Callable[..., Any], str], cli_name: str, description: str, hidden: bool, deprecated: Optional[str], parent_key: Optional[str], kwargs: Dict[str, Any]) -> None:
+        """Called by self.add_subcommand and self.load_manifest: Create the subparser for a subcommand.
+        """
+        dotted_key = f"{parent_key}.{cli_name}" if parent_key else cli_name
+
+        # The module for a lazy subcommand is being imported, attach the real handler to the existing subparser.
+        if dotted_key in self._lazy_subcommands and not isinstance(handler, str):
+            self.bind_lazy_subcommand(dotted_key, handler)
+            return
+
+        if parent_key:
+            target_subparsers = self.subcommands[parent_key]
         else:
             if self._subparsers is None:
                 self.add_subparsers(metavar="")
             assert self._subparsers is not None
             target_subparsers = self._subparsers
-            cli_name = name or getattr(handler, '__name__').replace('_', '-')
-            dotted_key = cli_name
 
         # Pre-register config sections so hierarchical access never returns None.
         # Use underscore form for config paths (hyphens can't be Python identifiers).
         config_path = dotted_key.replace('-', '_')
-        _config_navigate(self.config, config_path)
-        _config_navigate(self.config_source, config_path)
+        self.add_config_defaults(config_path, {})
+
+        self.acquire_lock()
+
+        self._subcommand_specs[dotted_key] = {
+            'handler': handler,
+            'name': cli_name,
+            'parent': parent_key,
+            'description': description,
+            'hidden': hidden,
+            'deprecated': deprecated,
+            'kwargs': kwargs.copy(),
+        }
 
         if deprecated:
             self._deprecated_commands[dotted_key] = deprecated
             description += f' [Deprecated]: {deprecated}'
 
-        self.acquire_lock()
-
-        if parent is None and not hidden and self._subparsers is not None:
-            if self._subparsers.metavar:
-                self._subparsers.metavar = "{%s,%s}" % (self._subparsers.metavar[1:-1], cli_name)
-            else:
-                self._subparsers.metavar = "{%s}" % cli_name
+        if parent_key is None and not hidden:
+            self._subcommand_names.append(cli_name)
 
         kwargs['help'] = description
 
-        self.subcommands[dotted_key] = SubparserWrapper(self, config_path, target_subparsers.add_parser(cli_name, **kwargs))
+        self.subcommands[dotted_key] = SubparserWrapper(self, config_path, target_subparsers, cli_name, kwargs)
+
+        if isinstance(handler, str):
+            self._lazy_subcommands[dotted_key] = handler
+        else:
+            self.subcommands[dotted_key].set_defaults(entrypoint=handler)
+            self._subcommand_keys[id(handler)] = dotted_key
+
+        self.release_lock()
+
+    def bind_lazy_subcommand(self, dotted_key: str, handler: Callable[..., Any]) -> None:
+        """Attach the handler for a lazily registered subcommand once its module has been imported.
+        """
+        self.acquire_lock()
+        del self._lazy_subcommands[dotted_key]
         self.subcommands[dotted_key].set_defaults(entrypoint=handler)
         self._subcommand_keys[id(handler)] = dotted_key
-
         self.release_lock()
 
-        return handler
+    def import_lazy_subcommand(self, dotted_key: str) -> None:
+        """Import the module for a lazily registered subcommand and attach its handler.
+        """
+        import_path = self._lazy_subcommands[dotted_key]
+        module_name, _, function_name = import_path.partition(':')
+        handler: Any = importlib.import_module(module_name)
+
+        # Importing the module usually binds the handler through @cli.subcommand
+        for attr in function_name.split('.'):
+            handler = getattr(handler, attr)
+
+        if dotted_key in self._lazy_subcommands:
+            self.bind_lazy_subcommand(dotted_key, handler)
+
+    def load_lazy_subcommands(self, argv: Optional[Sequence[str]] = None) -> None:
+        """Import the modules for any lazily registered subcommands selected on the command line.
+        """
+        dotted_key = ''
+
+        if argv is None:
+            argv = sys.argv[1:]
+
+            if '_ARGCOMPLETE' in os.environ:
+                argv = _split_comp_line()
+
+        for token in argv:
+            if token == '--':
+                break
+
+            if token.startswith('-'):
+                continue
+
+            candidate = f'{dotted_key}.{token}' if dotted_key else token
+
+            if candidate not in self.subcommands:
+                continue
+
+            dotted_key = candidate
+
+            if dotted_key in self._lazy_subcommands:
+                self.import_lazy_subcommand(dotted_key)
 
     def subcommand(self, description: str, hidden: bool = False, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> Callable[[Callable[P, R]], Callable[P, R]]:
         """Decorator to register a subcommand.
@@ -962,6 +2020,8 @@ class MILC(object):
     def is_spinner(self, name: str) -> bool:
         """Returns true if name is a valid spinner.
         """
+        from spinners.spinners import Spinners
+
         return name in Spinners.__members__ or name in self._spinners
 
     def add_spinner(self, name: str, spinner: Dict[str, Union[int, Sequence[str]]]) -> None:
@@ -998,7 +2058,7 @@ class MILC(object):
         stream: Any = sys.stdout,
         enabled: bool = sys.stdout.isatty(),
         **kwargs: Any,
-    ) -> Halo:
+    ) -> 'Halo':
         """Create a spinner object for showing activity to the user.
 
         This uses halo <https://github.com/ManrajGrover/halo> behind the scenes, most of the arguments map to Halo objects 1:1.
@@ -1073,6 +2133,8 @@ class MILC(object):
             enabled
                 Enable or disable the spinner. Defaults to `sys.stdout.isatty()`.
         """
+        from halo import Halo
+
         spinner_obj: Any = None
 
         if isinstance(spinner, dict):
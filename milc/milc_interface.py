@@ -6,15 +6,21 @@ import sys
 import warnings
 from logging import Logger
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Sequence, TypeVar, Union, overload
+from typing import IO, TYPE_CHECKING, Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union, overload
 
-from halo import Halo
 from typing_extensions import ParamSpec
 
 from .attrdict import AttrDict
 from .configuration import Configuration
 from .milc import MILC
 
+if TYPE_CHECKING:
+    from halo import Halo
+
+    from ._config_backends import ConfigBackend
+    from ._config_reloader import ConfigReloader
+    from ._config_writer import ConfigTransaction
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
@@ -28,12 +34,18 @@ class MILCInterface:
         self._logger: Optional[Logger] = None
         self._env_prefix: Optional[str] = None
         self._config_file: Optional[Union[str, Path]] = None
+        self._config_cache: Optional[bool] = None
+        self._project_config_file: Optional[str] = None
+        self._lazy_config_sections: Optional[bool] = None
+        self._batch_argument: Optional[bool] = None
 
-    def milc_options(self, *, name: Optional[str] = None, author: Optional[str] = None, version: Optional[str] = None, logger: Optional[Logger] = None, env_prefix: Optional[str] = None, config_file: Optional[Union[str, Path]] = None) -> None:
+    def milc_options(self, *, name: Optional[str] = None, author: Optional[str] = None, version: Optional[str] = None, logger: Optional[Logger] = None, env_prefix: Optional[str] = None, config_file: Optional[Union[str, Path]] = None, config_cache: Optional[bool] = None, project_config_file: Optional[str] = None, lazy_config_sections: Optional[bool] = None, batch_argument: Optional[bool] = None) -> None:
         """Configure MILC before the entrypoint runs.
 
         Call this before `cli()` or any imports that reference `cli`. It may be called multiple times; each call updates only the supplied arguments.
 
+        The MILC object is not built until something uses it, so calling this several times is cheap. If it has already been built the new options are applied to it in place.
+
         Args:
             name: The name of your program. Used for the config file path and other internal defaults.
             author: The author string, used in the config file path on some platforms.
@@ -41,28 +53,39 @@ class MILCInterface:
             logger: A custom logger instance to use instead of MILC's default logger.
             env_prefix: A string prefix that enables environment variable defaults. When set, each `--flag` can be configured via a `<PREFIX>_<FLAG>` environment variable.
             config_file: A system configuration file to read before the platformdirs user configuration file.
+            config_cache: When True, parsed config files are cached in the user cache directory and only parsed again when they change.
+            project_config_file: A file name, such as `.myapp.ini`, to search for in the current directory and its parents. When found it overrides the user configuration file.
+            lazy_config_sections: When True, only the `general`, `user` and active subcommand sections of the config files are parsed up front. Other sections are parsed the first time they're used.
+            batch_argument: When True, adds a `--batch FILE` argument that runs every command line in FILE in one process. It isn't added when your program has a `--batch` argument of its own.
         """
         if self._milc and self._milc._initialized:
             raise RuntimeError('You must run cli.milc_options() before cli() or anything else!')
 
-        if name is not None:
-            self._name = name
-        if author is not None:
-            self._author = author
-        if version is not None:
-            self._version = version
-        if logger is not None:
-            self._logger = logger
-        if env_prefix is not None:
-            self._env_prefix = env_prefix
-        if config_file is not None:
-            self._config_file = config_file
-        self._milc = MILC(self._name, self._author, self._version, self._logger, self._env_prefix, self._config_file)
+        options = {
+            'name': name,
+            'author': author,
+            'version': version,
+            'logger': logger,
+            'env_prefix': env_prefix,
+            'config_file': config_file,
+            'config_cache': config_cache,
+            'project_config_file': project_config_file,
+            'lazy_config_sections': lazy_config_sections,
+            'batch_argument': batch_argument,
+        }
+
+        # Only the options passed to this call replace the ones from earlier calls
+        for option, value in options.items():
+            if value is not None:
+                setattr(self, '_' + option, value)
+
+        if self._milc:
+            self._milc.milc_options(name=self._name, author=self._author, version=self._version, logger=self._logger, env_prefix=self._env_prefix, config_file=self._config_file, config_cache=bool(self._config_cache), project_config_file=self._project_config_file, lazy_config_sections=bool(self._lazy_config_sections), batch_argument=bool(self._batch_argument))
 
     @property
     def milc(self) -> MILC:
         if not self._milc:
-            self._milc = MILC()
+            self._milc = MILC(self._name, self._author, self._version, self._logger, self._env_prefix, self._config_file, bool(self._config_cache), self._project_config_file, bool(self._lazy_config_sections), bool(self._batch_argument))
 
         return self._milc
 
@@ -82,6 +105,14 @@ class MILCInterface:
     def config_source(self) -> Configuration:
         return self.milc.config_source
 
+    @property
+    def config_layer(self) -> Configuration:
+        return self.milc.config_layer
+
+    @property
+    def config_layers(self) -> List[Tuple[str, Path]]:
+        return self.milc.config_layers
+
     @property
     def description(self) -> Optional[str]:
         return self.milc.description
@@ -188,6 +219,71 @@ class MILCInterface:
         """
         return self.milc.argument(*args, **kwargs)
 
+    def load_manifest(self) -> bool:
+        """Register subcommands from the manifest cache instead of importing their modules.
+
+        Returns True when a current manifest was loaded. When this returns False you should import your subcommand modules as usual, and a fresh manifest will be written when `cli()` runs.
+        """
+        return self.milc.load_manifest()
+
+    def config_transaction(self, config_file: Optional[Union[str, Path]] = None, fsync: str = 'never') -> ContextManager['ConfigTransaction']:
+        """Collect config changes and write them to the config file in a single edit.
+
+        Changes made with `transaction.set()`, `transaction.delete()` and `cli.write_config_option()` inside the `with` block are written when it exits, unless it raises an exception. Transactions can be nested, in which case the changes are written when the outermost one exits using the strictest `fsync` policy given. A nested transaction must write to the same file as the outer one or `ValueError` is raised.
+
+        Args:
+            config_file
+                The file to write to. Defaults to `cli.config_file`.
+
+            fsync
+                One of 'never', 'file' to flush the file to disk before it replaces the old one, or 'directory' to also flush the rename.
+        """
+        return self.milc.config_transaction(config_file, fsync)
+
+    def write_config_option(self, section: str, option: Any) -> None:
+        """Save a single config option to the config file.
+
+        Only the line for this option is changed. Inside `cli.config_transaction()` the change is written when the transaction ends.
+        """
+        return self.milc.write_config_option(section, option)
+
+    def register_config_backend(self, extension: str, backend: 'ConfigBackend') -> None:
+        """Use `backend` to read and write config files ending in `extension`.
+
+        MILC includes backends for `.ini`, `.toml`, `.json` and SQLite (`.sqlite`, `.sqlite3`, `.db`) files. Files with any other extension are read as INI.
+
+        Backends are registered for the whole process, so every MILC instance uses them.
+        """
+        return self.milc.register_config_backend(extension, backend)
+
+    def config_changed(self, handler: Callable[P, R]) -> Callable[P, R]:
+        """Decorator to register a function to call when reloading the config files changes any options.
+
+        The decorated function is called with ``cli`` and a list of the ``section.option`` names that changed.
+        """
+        return self.milc.config_changed(handler)
+
+    def reload_config(self) -> List[str]:
+        """Parse the config files that have changed and apply their changes to the running configuration.
+
+        Options set by arguments or environment variables are left alone. Returns the ``section.option`` of each option that changed, after calling any `@cli.config_changed` functions.
+        """
+        return self.milc.reload_config()
+
+    def watch_config(self, interval: Optional[float] = 1.0, sighup: bool = True) -> 'ConfigReloader':
+        """Reload the config files in a background thread when they change.
+
+        Args:
+            interval
+                How many seconds to wait between checking the config files' mtimes. When None they're only checked on SIGHUP.
+
+            sighup
+                Check the config files when the process receives SIGHUP. This only works when called from the main thread.
+
+        Returns the ConfigReloader, which you can `stop()`.
+        """
+        return self.milc.watch_config(interval, sighup)
+
     def save_config(self, config_file: Optional[Union[str, Path]] = None) -> None:
         """Save the current configuration to the config file or an explicit path.
         """
@@ -198,6 +294,37 @@ class MILCInterface:
         """
         return self.milc()
 
+    def invoke(self, argv: Sequence[str], env: Optional[Dict[str, str]] = None, stdin: Optional[IO[str]] = None) -> Tuple[Any, int]:
+        """Run the program with `argv` in this process and return the entrypoint's result and the exit code.
+
+        The parser, subcommands and imports are reused, but every call parses `argv`, reads the config files and sets up logging from scratch. The per-run state is restored when it returns, so it can be called any number of times.
+
+        Args:
+            argv
+                The arguments to parse, without the program name.
+
+            env
+                When set, replaces `os.environ` while the command runs, the same as `env` for `subprocess.run()`.
+
+            stdin
+                When set, replaces `sys.stdin` while the command runs.
+        """
+        return self.milc.invoke(argv, env, stdin)
+
+    def batch(self, lines: Iterable[str], stdin: Optional[IO[str]] = None) -> Dict[int, int]:
+        """Run every command line in `lines` with `invoke()` and return the exit code of each, keyed by line number.
+
+        Lines are split like a shell would split them. Blank lines and `#` comments are skipped.
+
+        Args:
+            lines
+                The command lines to run, without the program name.
+
+            stdin
+                When set, replaces `sys.stdin` for every command.
+        """
+        return self.milc.batch(lines, stdin)
+
     def entrypoint(self, description: str, deprecated: Optional[str] = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
         """Decorator that marks the entrypoint used when a subcommand is not supplied.
         Args:
@@ -226,6 +353,21 @@ class MILCInterface:
         """
         return self.milc.prerun(*args, **kwargs)
 
+    @overload
+    def add_subcommand(self, handler: str, description: str, hidden: bool = False, deprecated: Optional[str] = None, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> str:
+        ...
+
+    @overload
+    def add_subcommand(self, handler: Callable[P, R], description: str, hidden: bool = False, deprecated: Optional[str] = None, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> Callable[P, R]:
+        ...
+
+    def add_subcommand(self, handler: Union[Callable[..., Any], str], description: str, hidden: bool = False, deprecated: Optional[str] = None, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> Union[Callable[..., Any], str]:
+        """Register a subcommand without using a decorator.
+
+        When `handler` is an import path string such as `'mytool.commands.flash:flash'` the module is only imported when that subcommand is selected on the command line.
+        """
+        return self.milc.add_subcommand(handler, description, hidden=hidden, deprecated=deprecated, parent=parent, name=name, **kwargs)
+
     def subcommand(self, description: str, hidden: bool = False, parent: Optional[Callable[..., Any]] = None, name: Optional[str] = None, **kwargs: Any) -> Callable[[Callable[P, R]], Callable[P, R]]:
         """Decorator to register a subcommand.
 
@@ -271,7 +413,7 @@ class MILCInterface:
         stream: Any = sys.stdout,
         enabled: bool = sys.stdout.isatty(),
         **kwargs: Any,
-    ) -> Halo:
+    ) -> 'Halo':
         """Create a spinner object for showing activity to the user.
 
         This uses halo <https://github.com/ManrajGrover/halo> behind the scenes, most of the arguments map to Halo objects 1:1.
@@ -1,33 +1,45 @@
 """Read and write configuration settings
 """
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 
 import milc
-from milc.configuration import ConfigurationSection, _collect_config_sections, _config_navigate
+from milc.configuration import ConfigRecord, ConfigurationSection, _collect_config_records, _config_navigate, _config_record_source
 from milc.milc import MILC
 
 
+def echo_config(section: str, key: str, value: Any, source: Optional[str]) -> None:
+    """Print a config setting and where it came from to stdout.
+    """
+    if source == 'config_file':
+        milc.cli.echo('%s.%s{fg_blue}={fg_reset}%s {fg_blue}(config){fg_reset}', section, key, value)
+    elif source == 'env_var':
+        milc.cli.echo('%s.%s{fg_yellow}={fg_reset}%s {fg_yellow}(env){fg_reset}', section, key, value)
+    else:
+        milc.cli.echo('{fg_cyan}%s.%s=%s (%s){fg_reset}', section, key, value, source)
+
+
 def print_config(section: str, key: str) -> None:
     """Print a single config setting to stdout.
     """
     config_section = _config_navigate(milc.cli.config, section)
-    config_source_section = _config_navigate(milc.cli.config_source, section)
-    source = config_source_section[key]
-    if source == 'config_file':
-        milc.cli.echo('%s.%s{fg_blue}={fg_reset}%s {fg_blue}(config){fg_reset}', section, key, config_section[key])
-    elif source == 'env_var':
-        milc.cli.echo('%s.%s{fg_yellow}={fg_reset}%s {fg_yellow}(env){fg_reset}', section, key, config_section[key])
+    echo_config(section, key, config_section[key], config_section._view('source')[key])
+
+
+def print_record(section: str, key: str, record: ConfigRecord) -> None:
+    """Print a config setting from its record, falling back to the `user` section like print_config() when the record is missing its value or source.
+    """
+    if record.value is None or record.source is None:
+        print_config(section, key)
     else:
-        milc.cli.echo('{fg_cyan}%s.%s=%s (%s){fg_reset}', section, key, config_section[key], source)
+        echo_config(section, key, record.value, record.source)
 
 
 def show_config() -> None:
     """Print the current configuration to stdout.
     """
-    for section_name, key, value in sorted(_collect_config_sections(milc.cli.config)):
-        config_source_section = _config_navigate(milc.cli.config_source, section_name)
-        if config_source_section[key] in ('config_file', 'env_var') or milc.cli.config.config.all:
-            print_config(section_name, key)
+    for section_name, key, record in sorted(_collect_config_records(milc.cli.config), key=lambda item: item[:2]):
+        if _config_record_source(milc.cli.config, section_name, key, record) in ('config_file', 'env_var') or milc.cli.config.config.all:
+            print_record(section_name, key, record)
 
 
 def parse_config_token(config_token: str) -> Tuple[str, str, Any]:
@@ -69,7 +81,6 @@ def set_config(section: str, option: str, value: str) -> None:
     milc.cli.echo(log_string, section, option, config_section[option], value)
 
     if not milc.cli.args.read_only:
-        config_source_section = _config_navigate(milc.cli.config_source, section)
         if value == 'None':
             if option in config_section:
                 del config_section[option]
@@ -78,7 +89,7 @@ def set_config(section: str, option: str, value: str) -> None:
 
         else:
             config_section[option] = value
-            config_source_section[option] = 'config_file'
+            config_section._view('source')[option] = 'config_file'
 
 
 def _process_config_token(config_token: str) -> bool:
@@ -95,20 +106,18 @@ def _process_config_token(config_token: str) -> bool:
         if isinstance(config_section[option], ConfigurationSection):
             full_section = f"{section}.{option}"
             nested = config_section[option]
-            for section_name, key, value in _collect_config_sections(nested, full_section):
-                src_section = _config_navigate(milc.cli.config_source, section_name)
-                if src_section[key] in ('config_file', 'env_var'):
-                    print_config(section_name, key)
+            for section_name, key, record in _collect_config_records(nested, full_section):
+                if _config_record_source(milc.cli.config, section_name, key, record) in ('config_file', 'env_var'):
+                    print_record(section_name, key, record)
         else:
             print_config(section, option)
         return False
 
     if section:
         config_section = _config_navigate(milc.cli.config, section)
-        for section_name, key, value in _collect_config_sections(config_section, section):
-            src_section = _config_navigate(milc.cli.config_source, section_name)
-            if src_section[key] == 'config_file':
-                print_config(section_name, key)
+        for section_name, key, record in _collect_config_records(config_section, section):
+            if _config_record_source(milc.cli.config, section_name, key, record) == 'config_file':
+                print_record(section_name, key, record)
 
     return False
 
@@ -1,5 +1,17 @@
 import os
 import subprocess
+import sys
+
+import milc
+
+
+def create_milc(monkeypatch, config_dir, argv=(), **kwargs):
+    """Returns a MILC instance named `application` that is run with `argv` and reads its user config file from `config_dir`.
+    """
+    monkeypatch.setattr(sys, 'argv', ['application', *argv])
+    monkeypatch.setattr(milc.milc, 'user_config_dir', lambda **dirs: str(config_dir))
+
+    return milc.milc.MILC(name='application', **kwargs)
 
 
 def check_command(command, *args, input=None):
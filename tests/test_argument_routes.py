@@ -0,0 +1,53 @@
+"""Make sure arguments are merged into the config section they were registered for.
+"""
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path, argv):
+    """Returns a MILC instance with a `hello` subcommand that shares an argument name with the entrypoint.
+    """
+    cli = create_milc(monkeypatch, tmp_path, argv)
+
+    @cli.argument('--name', default='general', help='Name for the entrypoint.')
+    @cli.argument('--level', type=int, default=1, help='Level for the entrypoint.')
+    @cli.entrypoint('Say something.')
+    def main(cli):
+        pass
+
+    @cli.argument('--name', default='hello', help='Who to greet.')
+    @cli.argument('--loud', action='store_true', help='Shout the greeting.')
+    @cli.argument('--dry-run', action='store_true', arg_only=True, help='Only pretend to greet.')
+    @cli.subcommand('Say hello.')
+    def hello(cli):
+        pass
+
+    return cli
+
+
+def test_subcommand_argument_wins(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, ['hello', '--name', 'Jane', '--loud', '--dry-run'])
+    cli.parse_args()
+    cli.merge_args_into_config()
+
+    assert cli.config.hello.name == 'Jane'
+    assert cli.config_source.hello.name == 'argument'
+    assert cli.config.hello.loud is True
+    assert cli.config_source.hello.loud == 'argument'
+    assert cli.config.hello.dry_run is None
+    assert cli.config.general.name == 'general'
+    assert cli.config.general.level == 1
+
+
+def test_routes_rebuilt_after_registration(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    assert cli._argument_routes('hello')['name'] == 'hello'
+    assert cli._argument_routes('hello')['dry_run'] is None
+    assert 'loud' not in cli._argument_routes(None)
+
+    @cli.argument('--loud', action='store_true', help='Shout.')
+    @cli.entrypoint('Say something.')
+    def main(cli):
+        pass
+
+    assert cli._argument_routes(None)['loud'] == 'general'
@@ -0,0 +1,137 @@
+"""Make sure --batch runs each command line in the same process and reports their exit codes.
+"""
+import io
+import sys
+
+import pytest
+
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path, argv, batch_argument=True):
+    """Returns a MILC instance whose entrypoint records the names it greets.
+    """
+    cli = create_milc(monkeypatch, tmp_path, argv, batch_argument=batch_argument)
+    cli.greeted = []
+
+    @cli.argument('--name', default='World', help='Who to greet.')
+    @cli.entrypoint('Greet someone.')
+    def main(cli):
+        cli.greeted.append(cli.config.general.name)
+
+        return cli.config.general.name != 'fail'
+
+    @cli.subcommand('Read stdin.')
+    def read(cli):
+        cli.greeted.append(sys.stdin.read())
+
+    return cli
+
+
+def test_batch(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    lines = [
+        '--name Jane\n',
+        '\n',
+        '# A comment\n',
+        "--name 'Jane Doe'  # Quoted\n",
+        '--name fail\n',
+        '--no-such-argument\n',
+        "--name 'unclosed\n",
+        '\n',
+        '--name Bob',
+    ]
+
+    assert cli.batch(lines) == {1: 0, 4: 0, 5: 1, 6: 2, 7: 2, 9: 0}
+    assert cli.greeted == ['Jane', 'Jane Doe', 'fail', 'Bob']
+
+    # Every line starts from the defaults
+    assert cli.batch(['', '']) == {}
+    assert len(cli.args) == 0
+
+
+def test_batch_stdin(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    assert cli.batch(['read', 'read'], stdin=io.StringIO('input')) == {1: 0, 2: 0}
+    assert cli.greeted == ['input', '']
+
+
+def test_batch_argument(monkeypatch, tmp_path):
+    batch_file = tmp_path / 'batch.txt'
+    batch_file.write_text('--name Jane\n--name Bob\n')
+    cli = _create_milc(monkeypatch, tmp_path, ['--name', 'Ignored', '--batch', str(batch_file)])
+
+    assert cli() is True
+    assert cli.greeted == ['Jane', 'Bob']
+
+
+def test_batch_argument_failures(monkeypatch, tmp_path):
+    batch_file = tmp_path / 'batch.txt'
+    batch_file.write_text('--name Jane\n--name fail\n')
+    cli = _create_milc(monkeypatch, tmp_path, ['--batch', str(batch_file)])
+
+    with pytest.raises(SystemExit) as e:
+        cli()
+
+    assert e.value.code == 1
+    assert cli.greeted == ['Jane', 'fail']
+
+
+def test_batch_stdin_argument(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, ['--batch', '-'])
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('--name Jane\nread\n--name Bob\n'))
+
+    assert cli() is True
+
+    # Commands can't read the rest of the batch
+    assert cli.greeted == ['Jane', '', 'Bob']
+
+
+def test_batch_missing_file(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, ['--batch', str(tmp_path / 'missing.txt')])
+
+    with pytest.raises(SystemExit) as e:
+        cli()
+
+    assert e.value.code == 1
+
+
+def test_batch_argument_opt_in(monkeypatch, tmp_path, capsys):
+    batch_file = tmp_path / 'batch.txt'
+    batch_file.write_text('--name Jane\n')
+    cli = _create_milc(monkeypatch, tmp_path, ['--batch', str(batch_file)], batch_argument=False)
+
+    with pytest.raises(SystemExit) as e:
+        cli()
+
+    assert e.value.code == 2
+    assert '--batch' not in capsys.readouterr().err
+    assert cli.greeted == []
+
+
+def test_batch_argument_defined_by_program(monkeypatch, tmp_path):
+    cli = create_milc(monkeypatch, tmp_path, ['--batch'], batch_argument=True)
+    cli.ran = []
+
+    @cli.argument('--batch', action='store_true', help='Run without prompting.')
+    @cli.entrypoint('Do something.')
+    def main(cli):
+        cli.ran.append(cli.args.batch)
+
+    cli()
+
+    assert cli.ran == [True]
+
+
+def test_batch_argument_defined_by_subcommand(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, ['nightly', '--batch', 'nightly'])
+
+    @cli.argument('--batch', help='Which batch to build.')
+    @cli.subcommand('Build a batch.')
+    def nightly(cli):
+        cli.greeted.append(cli.args.batch)
+
+    cli()
+
+    assert cli.greeted == ['nightly']
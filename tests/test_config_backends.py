@@ -0,0 +1,138 @@
+"""Make sure config files are read and written by the backend for their file extension.
+"""
+import json
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+import milc
+from milc import ConfigBackend
+from milc._config_backends import DocumentBackend, JsonBackend, SqliteBackend, TomlBackend
+
+from .common import create_milc
+
+TOML = """\
+[general]
+verbose = true
+threshold = 1.5
+name = "1.5"
+
+[remote.add]
+retries = 3
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, config_file):
+    """Returns a MILC instance that uses `config_file` as its system config file.
+    """
+    return create_milc(monkeypatch, tmp_path / 'user', config_file=config_file)
+
+
+def test_toml_native_types(monkeypatch, tmp_path):
+    (tmp_path / 'system.toml').write_text(TOML)
+    cli = _create_milc(monkeypatch, tmp_path, tmp_path / 'system.toml')
+
+    assert cli.config.general.verbose is True
+    assert cli.config.general.threshold == 1.5
+    assert type(cli.config.general.threshold) is float
+    assert cli.config.general.name == '1.5'
+    assert cli.config.remote.add.retries == 3
+    assert cli.config_layer.remote.add.retries == 'system'
+
+
+def test_json_config_and_dropins(monkeypatch, tmp_path):
+    (tmp_path / 'system.json').write_text(json.dumps({'general': {'name': 'system', 'count': 10}}))
+    (tmp_path / 'system.json.d').mkdir()
+    (tmp_path / 'system.json.d' / '10-override.toml').write_text('[general]\nname = "drop-in"\n')
+    cli = _create_milc(monkeypatch, tmp_path, tmp_path / 'system.json')
+
+    assert cli.config.general.name == 'drop-in'
+    assert cli.config.general.count == 10
+
+
+def test_document_backends_write(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, None)
+
+    for config_file in (tmp_path / 'written.json', tmp_path / 'written.toml'):
+        with cli.config_transaction(config_file) as transaction:
+            transaction.set('general', 'verbose', True)
+            transaction.set('remote.add', 'url', 'https://example.com/')
+            transaction.set('remote.add', 'retries', 3)
+
+        with cli.config_transaction(config_file) as transaction:
+            transaction.delete('general', 'verbose')
+
+        assert milc.configuration._parse_config_file(config_file) == {'remote.add': {'url': 'https://example.com/', 'retries': 3}}
+
+
+def test_toml_dumps_round_trip():
+    backend = TomlBackend()
+    tables = {'general': {'name': 'quote " and \\ backslash', 'ratio': 0.25, 'items': [1, 2]}, 'remote': {'add': {'needs quoting': False}}}
+
+    assert backend.loads(backend.dumps(tables)) == tables
+
+
+def test_sqlite_backend(monkeypatch, tmp_path):
+    config_file = tmp_path / 'config.sqlite'
+    backend = SqliteBackend()
+
+    assert backend.read(config_file) == {}
+    assert backend.write(config_file, {('general', 'verbose'): True, ('hello', 'name'): 'World', ('hello', 'count'): 2})
+    assert not backend.write(config_file, {('general', 'verbose'): True})
+    assert backend.write(config_file, {('hello', 'count'): None}, fsync='file')
+
+    sections = backend.sections(config_file)
+
+    assert sorted(sections) == ['general', 'hello']
+    assert sections['hello']() == {'name': 'World'}
+
+    connection = sqlite3.connect(str(config_file))
+    assert connection.execute('SELECT COUNT(*) FROM config').fetchone() == (2,)
+    connection.close()
+
+    cli = _create_milc(monkeypatch, tmp_path, config_file)
+
+    assert cli.config.general.verbose is True
+    assert cli.config.hello.name == 'World'
+
+
+def test_register_config_backend(monkeypatch, tmp_path):
+    class UpperBackend(ConfigBackend):
+        def read(self, config_file, types=None):
+            return {'general': {'name': config_file.read_text().strip().upper()}}
+
+        def write(self, config_file, changes, fsync='never', replace=False):
+            return False
+
+    (tmp_path / 'system.upper').write_text('shout\n')
+    monkeypatch.setattr(milc._config_backends, 'CONFIG_BACKENDS', dict(milc._config_backends.CONFIG_BACKENDS))
+    cli = _create_milc(monkeypatch, tmp_path, tmp_path / 'system.upper')
+    cli.register_config_backend('upper', UpperBackend())
+
+    assert cli.config.general.name == 'SHOUT'
+
+
+def test_incomplete_config_backend():
+    class ReadOnlyBackend(ConfigBackend):
+        def read(self, config_file, types=None):
+            return {}
+
+    class LoadsOnlyBackend(DocumentBackend):
+        def loads(self, text):
+            return {}
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+    with pytest.raises(TypeError):
+        LoadsOnlyBackend()
+
+
+def test_decimal_keeps_precision(tmp_path):
+    config_file = tmp_path / 'config.json'
+    value = Decimal('0.10000000000000000000001')
+
+    assert JsonBackend().write(config_file, {('general', 'threshold'): value})
+    assert json.loads(config_file.read_text()) == {'general': {'threshold': '0.10000000000000000000001'}}
+    assert JsonBackend().read(config_file, {'general': {'threshold': Decimal}}) == {'general': {'threshold': value}}
@@ -0,0 +1,99 @@
+"""Make sure the opt-in config cache only parses config files when they change.
+"""
+from decimal import Decimal
+
+import milc
+from milc.configuration import _parse_config_file
+
+from .common import create_milc
+
+CONFIG = """[general]
+verbose = yes
+threshold = 1.5
+
+[remote.add]
+url = https://example.com/
+retries = 3
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, counts, config_cache=True):
+    """Returns a MILC instance that reads its config from `tmp_path` and counts config file parses.
+    """
+    def counting_parse_config_file(config_file, types=None):
+        counts['parse'] += 1
+        return _parse_config_file(config_file, types)
+
+    monkeypatch.setattr(milc.milc, 'user_cache_dir', lambda **kwargs: str(tmp_path / 'cache'))
+    monkeypatch.setattr(milc.milc, '_parse_config_file', counting_parse_config_file)
+    monkeypatch.setattr(milc.configuration, '_parse_config_file', counting_parse_config_file)
+
+    return create_milc(monkeypatch, tmp_path / 'config', config_cache=config_cache)
+
+
+def _write_config(tmp_path, text):
+    """Write the user config file for the test application.
+    """
+    (tmp_path / 'config').mkdir(exist_ok=True)
+    (tmp_path / 'config' / 'application.ini').write_text(text)
+
+
+def test_config_cache_skips_parsing(monkeypatch, tmp_path):
+    counts = {'parse': 0}
+    _write_config(tmp_path, CONFIG)
+
+    first = _create_milc(monkeypatch, tmp_path, counts)
+    assert first.config.general.verbose is True
+    assert counts['parse'] == 1
+    assert first.config_cache_file.exists()
+
+    second = _create_milc(monkeypatch, tmp_path, counts)
+    assert counts['parse'] == 1
+    assert second.config.general.verbose is True
+    assert second.config.general.threshold == Decimal('1.5')
+    assert second.config.remote.add.url == 'https://example.com/'
+    assert second.config.remote.add.retries == 3
+    assert second.config_source.remote.add.retries == 'config_file'
+
+
+def test_config_cache_notices_changes(monkeypatch, tmp_path):
+    counts = {'parse': 0}
+    _write_config(tmp_path, CONFIG)
+
+    assert _create_milc(monkeypatch, tmp_path, counts).config.remote.add.retries == 3
+
+    _write_config(tmp_path, CONFIG.replace('retries = 3', 'retries = 10'))
+
+    assert _create_milc(monkeypatch, tmp_path, counts).config.remote.add.retries == 10
+    assert counts['parse'] == 2
+
+
+def test_config_cache_disabled_by_default(monkeypatch, tmp_path):
+    counts = {'parse': 0}
+    _write_config(tmp_path, CONFIG)
+
+    for _ in range(2):
+        cli = _create_milc(monkeypatch, tmp_path, counts, config_cache=False)
+        assert cli.config.general.verbose is True
+
+    assert counts['parse'] == 2
+    assert not cli.config_cache_file.exists()
+
+
+def test_config_cache_unpicklable_value(monkeypatch, tmp_path):
+    counts = {'parse': 0}
+    _write_config(tmp_path, CONFIG)
+
+    class Threshold(object):
+        def __init__(self, value):
+            self.value = value
+
+    for _ in range(2):
+        cli = _create_milc(monkeypatch, tmp_path, counts)
+        cli.add_argument('--threshold', type=Threshold)
+        assert cli.config.general.threshold.value == '1.5'
+        assert cli.config.remote.add.retries == 3
+
+    assert counts['parse'] == 2
+    assert not cli.config_cache_file.exists()
+    assert list((tmp_path / 'cache').iterdir()) == []
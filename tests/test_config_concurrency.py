@@ -0,0 +1,119 @@
+"""Make sure processes writing different config keys at the same time don't lose each other's changes.
+"""
+import os
+import subprocess
+import sys
+from configparser import RawConfigParser
+from types import SimpleNamespace
+
+from milc._config_writer import config_file_lock
+
+from .common import create_milc
+
+APPLICATION = """
+from milc import cli
+
+cli.milc_options(name='application')
+
+
+@cli.argument('number', type=int, arg_only=True, help='Which key to write.')
+@cli.entrypoint('Write a config key.')
+def main(cli):
+    cli.config['stress']['key_%d' % cli.args.number] = cli.args.number
+
+    if cli.args.number % 2:
+        cli.config_source['stress']['key_%d' % cli.args.number] = 'config_file'
+        cli.save_config()
+    else:
+        cli.write_config_option('stress', 'key_%d' % cli.args.number)
+
+
+if __name__ == '__main__':
+    cli()
+"""
+
+
+def _write_concurrently(tmp_path, processes):
+    """Start `processes` copies of the application at once, each writing its own key, and return the config they wrote.
+    """
+    config_dir = tmp_path / 'config' / 'application'
+    (tmp_path / 'application.py').write_text(APPLICATION)
+    environment = dict(os.environ, XDG_CONFIG_HOME=str(tmp_path / 'config'))
+
+    running = [subprocess.Popen([sys.executable, str(tmp_path / 'application.py'), str(number)], env=environment, stderr=subprocess.PIPE, text=True) for number in range(processes)]
+
+    for process in running:
+        stdout, stderr = process.communicate()
+        assert process.returncode == 0, stderr
+
+    config = RawConfigParser()
+    config.read(config_dir / 'application.ini')
+
+    return config
+
+
+def test_concurrent_config_writes(tmp_path):
+    processes = 24
+    config_dir = tmp_path / 'config' / 'application'
+    config_dir.mkdir(parents=True)
+    (config_dir / 'application.ini').write_text('# Shared by every process\n[general]\nverbose = no\n')
+
+    config = _write_concurrently(tmp_path, processes)
+
+    assert (config_dir / 'application.ini').read_text().startswith('# Shared by every process\n')
+    assert config.get('general', 'verbose') == 'no'
+    assert {option: config.getint('stress', option) for option in config.options('stress')} == {'key_%d' % number: number for number in range(processes)}
+
+
+def test_concurrent_config_writes_without_config_file(tmp_path):
+    processes = 24
+    config = _write_concurrently(tmp_path, processes)
+
+    assert {option: config.getint('stress', option) for option in config.options('stress')} == {'key_%d' % number: number for number in range(processes)}
+
+
+def test_save_config_keeps_other_changes(monkeypatch, tmp_path):
+    config_file = tmp_path / 'application.ini'
+    config_file.write_text('[general]\nverbose = no\nname = first\n')
+
+    cli = create_milc(monkeypatch, tmp_path)
+
+    assert cli.config.general.name == 'first'
+
+    # Another process changes the file after we read it
+    config_file.write_text('[general]\nverbose = yes\nname = first\ncolor = blue\n')
+
+    cli.config.general.name = 'second'
+    cli.save_config()
+
+    assert config_file.read_text() == '[general]\nverbose = yes\nname = second\ncolor = blue\n'
+
+
+def test_save_config_baseline_without_config_file(monkeypatch, tmp_path):
+    cli = create_milc(monkeypatch, tmp_path)
+
+    assert cli.config.general.name is None
+
+    # Only our own changes get merged into a file another process creates before we save
+    assert cli._config_file_baseline(cli.config_file) == {}
+    assert cli._config_file_baseline(tmp_path / 'elsewhere.ini') is None
+
+
+def test_config_file_lock_windows(monkeypatch, tmp_path):
+    calls = []
+
+    def locking(fd, mode, size):
+        calls.append(mode)
+
+        # LK_LOCK gives up when another process holds the lock for too long
+        if len(calls) == 1:
+            raise OSError('Resource deadlock avoided')
+
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    monkeypatch.setitem(sys.modules, 'msvcrt', SimpleNamespace(LK_LOCK='lock', LK_UNLCK='unlock', locking=locking))
+
+    with config_file_lock(tmp_path / 'application.ini'):
+        assert calls == ['lock', 'lock']
+
+    assert calls == ['lock', 'lock', 'unlock']
+    assert (tmp_path / 'application.ini.lock').exists()
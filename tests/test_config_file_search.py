@@ -6,16 +6,16 @@ from configparser import RawConfigParser
 
 import milc
 
+from .common import create_milc
+
 
 def _create_config_file(path, contents):
     path.write_text(contents)
 
 
-def _create_milc(monkeypatch, tmp_path, system_config_file=None, argv=None):
+def _create_milc(monkeypatch, tmp_path, system_config_file=None, argv=()):
     platform_config_dir = tmp_path / 'platformdirs'
-    monkeypatch.setattr(sys, 'argv', argv or ['application'])
-    monkeypatch.setattr(milc.milc, 'user_config_dir', lambda **kwargs: str(platform_config_dir))
-    return milc.milc.MILC(name='application', config_file=system_config_file), platform_config_dir / 'application.ini'
+    return create_milc(monkeypatch, platform_config_dir, argv, config_file=system_config_file), platform_config_dir / 'application.ini'
 
 
 def test_platformdirs_config_overrides_and_merges_system_config(monkeypatch, tmp_path):
@@ -74,7 +74,7 @@ def test_command_line_config_file_bypasses_system_and_platformdirs_configs(monke
     command_line_config_file = tmp_path / 'command-line.ini'
     _create_config_file(command_line_config_file, '[general]\nsource = command-line\n')
 
-    milc, _ = _create_milc(monkeypatch, tmp_path, system_config_file, ['application', '--config-file', str(command_line_config_file)])
+    milc, _ = _create_milc(monkeypatch, tmp_path, system_config_file, ['--config-file', str(command_line_config_file)])
 
     assert milc.config_file == command_line_config_file.resolve()
     assert milc.config.general.source == 'command-line'
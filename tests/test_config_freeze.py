@@ -0,0 +1,89 @@
+"""Make sure frozen config snapshots match the configuration they were taken from.
+"""
+import pytest
+
+import milc.configuration
+
+
+def configuration_setup():
+    """Setup a milc.configuration.Configuration object with a nested section and user fallbacks.
+    """
+    config = milc.configuration.Configuration()
+    config['general']['verbose'] = True
+    milc.configuration._config_navigate(config, 'remote.add')['url'] = 'https://example.com/'
+    config['user']['name'] = 'Jane'
+    config['user']['url'] = 'https://user.example.com/'
+
+    return config
+
+
+def test_freeze_get_path():
+    frozen = configuration_setup().freeze()
+
+    assert frozen.get_path('general.verbose') is True
+    assert frozen.get_path('remote.add.url') == 'https://example.com/'
+    assert frozen.get_path('remote.add.name') == 'Jane'
+    assert frozen.get_path('remote.add.missing') is None
+    assert frozen.get_path('remote.add.missing', 'default') == 'default'
+
+
+def test_freeze_attribute_and_item():
+    frozen = configuration_setup().freeze()
+
+    assert frozen.general.verbose is True
+    assert frozen.remote.add.url == 'https://example.com/'
+    assert frozen['remote']['add']['url'] == 'https://example.com/'
+    assert frozen.general.missing is None
+    assert frozen['general']['missing'] is None
+    assert 'verbose' in frozen.general
+    assert dict(frozen.general.items()) == {'verbose': True, 'name': 'Jane', 'url': 'https://user.example.com/'}
+
+
+def test_freeze_user_fallback():
+    frozen = configuration_setup().freeze()
+
+    assert frozen.general.name == 'Jane'
+    assert frozen.remote.add.name == 'Jane'
+    assert frozen.missing.name == 'Jane'
+    assert frozen['missing']['name'] == 'Jane'
+
+
+def test_freeze_read_only():
+    frozen = configuration_setup().freeze()
+
+    with pytest.raises(AttributeError):
+        frozen.general.verbose = False
+
+    with pytest.raises(TypeError):
+        frozen['general']['verbose'] = False
+
+    with pytest.raises(TypeError):
+        del frozen['general']
+
+
+def test_freeze_is_a_snapshot():
+    config = configuration_setup()
+    frozen = config.freeze()
+    config['general']['verbose'] = False
+    config['general']['new'] = 1
+
+    assert frozen.general.verbose is True
+    assert frozen.general.new is None
+    assert config.freeze().general.new == 1
+
+
+def test_freeze_section():
+    config = configuration_setup()
+    frozen = config.remote.add.freeze()
+
+    assert frozen.url == 'https://example.com/'
+    assert frozen.name == 'Jane'
+
+
+def test_freeze_views():
+    config = configuration_setup()
+    config['general']._view('source')['verbose'] = 'argument'
+    frozen = config._view('source').freeze()
+
+    assert frozen.general.verbose == 'argument'
+    assert frozen.get_path('remote.add.url') is None
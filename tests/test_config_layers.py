@@ -0,0 +1,133 @@
+"""Make sure the system, drop-in, user and project config layers are merged lazily and in order.
+"""
+import logging
+
+import milc
+from milc.configuration import _find_project_config_file
+
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path, counts, **kwargs):
+    """Returns a MILC instance with every config layer, and counts which config files get parsed.
+    """
+    parse_config_file = milc.configuration._parse_config_file
+
+    def counting_parse_config_file(config_file, types=None):
+        counts.append(config_file.name)
+        return parse_config_file(config_file, types)
+
+    system_config_file = tmp_path / 'system.ini'
+    system_config_file.write_text('[general]\nshared = system\nsystem_only = yes\n')
+    (tmp_path / 'system.ini.d').mkdir()
+    (tmp_path / 'system.ini.d' / '20-second.ini').write_text('[general]\nshared = second\n')
+    (tmp_path / 'system.ini.d' / '10-first.ini').write_text('[general]\nshared = first\ndropin_only = 10\n')
+    (tmp_path / 'system.ini.d' / 'README').write_text('Not a config file.\n')
+    (tmp_path / 'user').mkdir()
+    (tmp_path / 'user' / 'application.ini').write_text('[general]\nshared = user\nuser_only = yes\n')
+    (tmp_path / 'project' / 'src' / 'deep').mkdir(parents=True)
+    (tmp_path / 'project' / '.application.ini').write_text('[general]\nshared = project\n')
+
+    monkeypatch.setattr(milc.configuration, '_parse_config_file', counting_parse_config_file)
+    monkeypatch.chdir(tmp_path / 'project' / 'src' / 'deep')
+
+    return create_milc(monkeypatch, tmp_path / 'user', config_file=system_config_file, project_config_file='.application.ini', **kwargs)
+
+
+def test_config_layers_order(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    assert [layer for layer, config_file in cli.config_layers] == ['system', 'drop-in 10-first.ini', 'drop-in 20-second.ini', 'user', 'project']
+    assert cli.config_layers[-1][1] == tmp_path / 'project' / '.application.ini'
+
+
+def test_config_layers_precedence(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    assert cli.config.general.shared == 'project'
+    assert cli.config.general.user_only is True
+    assert cli.config.general.dropin_only == 10
+    assert cli.config.general.system_only is True
+    assert cli.config_source.general.system_only == 'config_file'
+    assert cli.config_layer.general.shared == 'project'
+    assert cli.config_layer.general.user_only == 'user'
+    assert cli.config_layer.general.dropin_only == 'drop-in 10-first.ini'
+    assert cli.config_layer.general.system_only == 'system'
+
+
+def test_lower_layers_load_lazily(monkeypatch, tmp_path):
+    counts = []
+    cli = _create_milc(monkeypatch, tmp_path, counts)
+
+    assert cli.config.general.shared == 'project'
+    assert counts == ['.application.ini']
+
+    assert cli.config.general.user_only is True
+    assert counts == ['.application.ini', 'application.ini']
+
+    assert cli.config.general.missing is None
+    assert counts == ['.application.ini', 'application.ini', '20-second.ini', '10-first.ini', 'system.ini']
+
+
+def test_lower_layers_load_lazily_when_run(monkeypatch, tmp_path):
+    counts = []
+    cli = _create_milc(monkeypatch, tmp_path, counts, logger=logging.getLogger('test_config_layers'))
+
+    @cli.argument('--missing', default='default', help='Not set by any config file.')
+    @cli.entrypoint('Read a config option.')
+    def main(cli):
+        return cli.config.general.shared
+
+    assert cli() == 'project'
+
+    # Merging the arguments and their defaults didn't open the lower layers
+    assert counts == ['.application.ini']
+
+    assert cli.config.general.missing == 'default'
+    assert counts == ['.application.ini', 'application.ini', '20-second.ini', '10-first.ini', 'system.ini']
+
+
+def test_save_config_includes_every_layer(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    save_file = tmp_path / 'saved.ini'
+
+    cli.save_config(save_file)
+    saved = save_file.read_text()
+
+    assert 'shared = project' in saved
+    assert 'system_only = True' in saved
+
+
+def test_project_config_search_cached(tmp_path):
+    (tmp_path / 'a' / 'b' / 'c').mkdir(parents=True)
+    (tmp_path / '.project.ini').write_text('[general]\n')
+
+    assert _find_project_config_file(str(tmp_path / 'a' / 'b' / 'c'), '.project.ini') == tmp_path / '.project.ini'
+
+    hits = _find_project_config_file.cache_info().hits
+
+    assert _find_project_config_file(str(tmp_path / 'a' / 'b'), '.project.ini') == tmp_path / '.project.ini'
+    assert _find_project_config_file.cache_info().hits == hits + 1
+
+
+def test_project_config_search_refreshed(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    @cli.entrypoint('Read a config option.')
+    def main(cli):
+        return cli.config.general.shared
+
+    assert cli.config.general.shared == 'project'
+    assert cli.reload_config() == []
+
+    (tmp_path / 'project' / '.application.ini').unlink()
+
+    assert cli.invoke([]) == ('user', 0)
+    assert cli.reload_config() == ['general.shared']
+    assert cli.config.general.shared == 'user'
+
+    (tmp_path / 'project' / 'src' / '.application.ini').write_text('[general]\nshared = src\n')
+
+    assert cli.invoke([]) == ('src', 0)
+    assert cli.reload_config() == ['general.shared']
+    assert cli.config.general.shared == 'src'
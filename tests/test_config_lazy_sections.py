@@ -0,0 +1,107 @@
+"""Make sure lazy_config_sections only parses the config sections that get used.
+"""
+
+import milc
+from milc.configuration import _collect_config_sections, _parse_config_section
+
+from .common import create_milc
+
+CONFIG = """\
+[DEFAULT]
+shared = default
+
+[general]
+verbose = yes
+
+[user]
+name = Jane
+
+[hello]
+name = World
+
+[goodbye]
+name = Moon
+
+[other]
+count = 5
+
+[other.child]
+enabled = no
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, parsed, lazy_config_sections=True, argv=('hello',)):
+    """Returns a MILC instance with a `hello` subcommand, and records which config sections get parsed.
+    """
+    def recording_parse_config_section(text, section, types=None):
+        parsed.append(section)
+        return _parse_config_section(text, section, types)
+
+    (tmp_path / 'application.ini').write_text(CONFIG)
+
+    monkeypatch.setattr(milc.configuration, '_parse_config_section', recording_parse_config_section)
+
+    cli = create_milc(monkeypatch, tmp_path, argv, lazy_config_sections=lazy_config_sections)
+
+    @cli.argument('--name', default='nobody', help='Who to greet.')
+    @cli.subcommand('Say hello.')
+    def hello(cli):
+        return cli.config.hello.name
+
+    @cli.argument('--name', default='nobody', help='Who to say goodbye to.')
+    @cli.argument('--waves', type=int, default=1, help='How many times to wave.')
+    @cli.subcommand('Say goodbye.')
+    def goodbye(cli):
+        return cli.config.goodbye.name
+
+    return cli
+
+
+def test_lazy_sections_parse_active_subcommand(monkeypatch, tmp_path):
+    parsed = []
+    cli = _create_milc(monkeypatch, tmp_path, parsed)
+    cli.parse_args()
+
+    assert cli.config.hello.name == 'World'
+    assert sorted(parsed) == ['general', 'hello', 'user']
+
+    assert cli.config.other.child.enabled is False
+    assert sorted(parsed) == ['general', 'hello', 'other', 'other.child', 'user']
+
+
+def test_lazy_sections_match_eager(monkeypatch, tmp_path):
+    lazy = _create_milc(monkeypatch, tmp_path, [])
+    eager = _create_milc(monkeypatch, tmp_path, [], lazy_config_sections=False)
+
+    for cli in (lazy, eager):
+        cli.parse_args()
+        cli.merge_args_into_config()
+
+    assert lazy.config.other.count == 5
+    assert lazy.config.other.shared == 'default'
+    assert lazy.config_source.other.count == 'config_file'
+    assert lazy.config_layer.other.count == 'user'
+    assert sorted(_collect_config_sections(lazy.config)) == sorted(_collect_config_sections(eager.config))
+    assert sorted(_collect_config_sections(lazy.config_source)) == sorted(_collect_config_sections(eager.config_source))
+
+
+def test_lazy_sections_arguments_override_config(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [], argv=('hello', '--name', 'Moon'))
+    cli.parse_args()
+    cli.merge_args_into_config()
+
+    assert cli.config.hello.name == 'Moon'
+    assert cli.config_source.hello.name == 'argument'
+
+
+def test_lazy_sections_skip_inactive_subcommands(monkeypatch, tmp_path):
+    parsed = []
+    cli = _create_milc(monkeypatch, tmp_path, parsed)
+
+    assert cli() == 'World'
+    assert sorted(parsed) == ['general', 'hello', 'user']
+
+    # Defaults for the arguments of a section are filled in when it's parsed
+    assert cli.config.goodbye.name == 'Moon'
+    assert cli.config.goodbye.waves == 1
+    assert 'goodbye' in parsed
@@ -0,0 +1,137 @@
+"""Make sure long running programs can pick up config file changes without restarting.
+"""
+import os
+import signal
+import time
+
+import milc
+import milc._config_reloader
+from milc.configuration import _parse_config_file
+
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path, parsed):
+    """Returns a MILC instance with a system and a user config file, and records which config files get parsed again.
+    """
+    def recording_parse_config_file(config_file, types=None):
+        parsed.append(config_file.name)
+        return _parse_config_file(config_file, types)
+
+    (tmp_path / 'system.ini').write_text('[general]\nshared = system\nsystem_only = 1\n')
+    (tmp_path / 'application.ini').write_text('[general]\nshared = user\nuser_only = 1\n')
+
+    monkeypatch.setattr(milc._config_reloader, '_parse_config_file', recording_parse_config_file)
+
+    cli = create_milc(monkeypatch, tmp_path, config_file=tmp_path / 'system.ini')
+    cli.parse_args()
+    cli.merge_args_into_config()
+
+    # The same as passing `--color` on the command line
+    cli.config['general']['color'] = True
+    cli.config_source['general']['color'] = 'argument'
+
+    return cli
+
+
+def _wait_for(condition):
+    """Wait up to 5 seconds for `condition()` to be true.
+    """
+    deadline = time.monotonic() + 5
+
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    return condition()
+
+
+def test_reload_config(monkeypatch, tmp_path):
+    parsed = []
+    calls = []
+    cli = _create_milc(monkeypatch, tmp_path, parsed)
+
+    @cli.config_changed
+    def changed(cli, keys):
+        calls.append(keys)
+
+    assert cli.reload_config() == []
+    assert cli.config.general.shared == 'user'
+
+    (tmp_path / 'application.ini').write_text('[general]\nuser_only = 22\nnew_option = yes\ncolor = no\n')
+
+    assert cli.reload_config() == ['general.new_option', 'general.shared', 'general.user_only']
+    assert parsed == ['application.ini']
+    assert calls == [['general.new_option', 'general.shared', 'general.user_only']]
+    assert cli.config.general.shared == 'system'
+    assert cli.config_layer.general.shared == 'system'
+    assert cli.config.general.user_only == 22
+    assert cli.config.general.new_option is True
+    assert cli.config.general.color is True
+    assert cli.config_source.general.color == 'argument'
+    assert cli.reload_config() == []
+
+
+def test_reload_config_removed_option(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    assert cli.config.general.user_only == 1
+
+    (tmp_path / 'application.ini').write_text('[general]\nshared = user\n')
+
+    assert cli.reload_config() == ['general.user_only']
+    assert cli.config.general.user_only is None
+    assert cli.config_source.general.user_only is None
+
+
+def test_reload_config_removed_option_default(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    cli.add_argument('--user-only', type=int, default=5, help='An option the user config file sets.')
+
+    assert cli.config.general.user_only == 1
+
+    (tmp_path / 'application.ini').write_text('[general]\nshared = user\n')
+
+    assert cli.reload_config() == ['general.user_only']
+    assert cli.config.general.user_only == 5
+    assert cli.config_source.general.user_only is None
+
+    # Defaults registered for the config, like those of @cli.argument, are restored too
+    cli.add_config_defaults('general', {'system_only': 'default'})
+    (tmp_path / 'system.ini').write_text('')
+
+    assert cli.reload_config() == ['general.system_only']
+    assert cli.config.general.system_only == 'default'
+
+
+def test_watch_config_interval(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    reloader = cli.watch_config(interval=0.01, sighup=False)
+
+    try:
+        (tmp_path / 'system.ini').write_text('[general]\nsystem_only = 333\n')
+
+        assert _wait_for(lambda: cli.config.general.system_only == 333)
+
+    finally:
+        reloader.stop()
+
+
+def test_watch_config_sighup(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    sighup_handler = signal.getsignal(signal.SIGHUP)
+    reloader = cli.watch_config(interval=None)
+
+    try:
+        (tmp_path / 'application.ini').write_text('[general]\nshared = reloaded\n')
+        time.sleep(0.05)
+
+        assert cli.config.general.shared == 'user'
+
+        os.kill(os.getpid(), signal.SIGHUP)
+
+        assert _wait_for(lambda: cli.config.general.shared == 'reloaded')
+
+    finally:
+        reloader.stop()
+
+    assert signal.getsignal(signal.SIGHUP) is sighup_handler
@@ -0,0 +1,191 @@
+"""Make sure config writes edit the config file in place and only when something changed.
+"""
+
+import milc
+from milc._config_writer import IniDocument, write_config_text
+
+from .common import create_milc
+
+CONFIG = """\
+# Settings for application
+[general]
+# Be chatty
+verbose = yes
+colors: no
+
+[hello]
+name = World
+greeting = Hello,
+\tand welcome
+
+; The end
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, writes):
+    """Returns a MILC instance using `tmp_path/application.ini`, and records each time a config file is written.
+    """
+    def recording_write_config_text(config_file, text, fsync='never'):
+        writes.append(fsync)
+        return write_config_text(config_file, text, fsync)
+
+    (tmp_path / 'application.ini').write_text(CONFIG)
+
+    monkeypatch.setattr(milc._config_writer, 'write_config_text', recording_write_config_text)
+
+    return create_milc(monkeypatch, tmp_path)
+
+
+def test_ini_document_unchanged():
+    assert IniDocument(CONFIG).text() == CONFIG
+    assert IniDocument('[general]\nverbose = yes').text() == '[general]\nverbose = yes'
+
+
+def test_ini_document_edits():
+    document = IniDocument(CONFIG)
+
+    document.set('general', 'colors', 'yes')
+    document.set('general', 'new_option', 5)
+    document.set('hello', 'greeting', 'Hi')
+    document.remove('hello', 'name')
+    document.set('goodbye', 'name', 'Moon')
+
+    assert document.text() == """\
+# Settings for application
+[general]
+# Be chatty
+verbose = yes
+colors: yes
+new_option = 5
+
+[hello]
+greeting = Hi
+
+; The end
+
+[goodbye]
+name = Moon
+"""
+
+
+def test_config_transaction_writes_once(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    with cli.config_transaction() as transaction:
+        for i in range(50):
+            transaction.set('numbers', f'number_{i}', i)
+
+        transaction.delete('hello', 'name')
+
+    text = (tmp_path / 'application.ini').read_text()
+
+    assert writes == ['never']
+    assert text.startswith(CONFIG.replace('name = World\n', ''))
+    assert 'number_49 = 49\n' in text
+    assert cli.config.numbers.number_49 == 49
+    assert cli.config_source.numbers.number_49 == 'config_file'
+    assert cli.config.hello.name is None
+
+
+def test_config_transaction_skips_unchanged(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    with cli.config_transaction() as transaction:
+        transaction.set('hello', 'name', 'World')
+
+    cli.save_config()
+
+    assert writes == []
+
+
+def test_config_transaction_exception(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    try:
+        with cli.config_transaction() as transaction:
+            transaction.set('hello', 'name', 'Moon')
+            raise KeyboardInterrupt()
+
+    except KeyboardInterrupt:
+        pass
+
+    assert writes == []
+    assert (tmp_path / 'application.ini').read_text() == CONFIG
+
+
+def test_config_transaction_nested_write_config_option(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    with cli.config_transaction(fsync='directory'):
+        cli.config.hello.name = 'Moon'
+        cli.write_config_option('hello', 'name')
+
+        with cli.config_transaction() as transaction:
+            transaction.set('general', 'verbose', False)
+
+        assert writes == []
+
+    assert writes == ['directory']
+    assert (tmp_path / 'application.ini').read_text() == CONFIG.replace('World', 'Moon').replace('verbose = yes', 'verbose = False')
+
+
+def test_config_transaction_nested_fsync(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    with cli.config_transaction():
+        with cli.config_transaction(tmp_path / 'application.ini', fsync='file') as transaction:
+            transaction.set('hello', 'name', 'Moon')
+
+    assert writes == ['file']
+
+
+def test_config_transaction_nested_other_file(monkeypatch, tmp_path):
+    writes = []
+    cli = _create_milc(monkeypatch, tmp_path, writes)
+
+    with cli.config_transaction() as transaction:
+        transaction.set('hello', 'name', 'Moon')
+
+        try:
+            with cli.config_transaction(tmp_path / 'other.ini'):
+                pass
+
+        except ValueError:
+            pass
+
+        else:
+            raise AssertionError('ValueError was not raised for a nested transaction on another file')
+
+    assert writes == ['never']
+    assert not (tmp_path / 'other.ini').exists()
+
+
+def test_config_transaction_fsync_policy(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+
+    try:
+        with cli.config_transaction(fsync='sometimes'):
+            pass
+
+    except ValueError:
+        pass
+
+    else:
+        raise AssertionError('ValueError was not raised for an unknown fsync policy')
+
+
+def test_save_config_keeps_comments(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path, [])
+    cli.config.hello.name = 'Moon'
+
+    cli.save_config()
+    text = (tmp_path / 'application.ini').read_text()
+
+    assert '# Be chatty\nverbose = yes\n' in text
+    assert 'name = Moon\n' in text
+    assert text.endswith('; The end\n')
@@ -0,0 +1,109 @@
+"""Make sure config file values are converted to the type of the argument they belong to.
+"""
+from decimal import Decimal
+
+from .common import create_milc
+
+CONFIG = """\
+[general]
+release = 1.10
+answer = yes
+retries = 3
+ratio = 2
+debug = 1
+ignored = off
+timeout = forever
+untyped = 1.10
+unset = none
+
+[hello]
+name = 007
+loud = yes
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, config_file='application.ini', lazy_config_sections=False):
+    """Returns a MILC instance with typed arguments for the entrypoint and a `hello` subcommand.
+    """
+    cli = create_milc(monkeypatch, tmp_path, config_file=tmp_path / config_file, lazy_config_sections=lazy_config_sections)
+
+    @cli.argument('--release', type=str, help='Release to build.')
+    @cli.argument('--answer', type=str, help='What to say.')
+    @cli.argument('--retries', type=int, help='How many times to retry.')
+    @cli.argument('--ratio', type=float, help='Compression ratio.')
+    @cli.argument('--debug', action='store_true', help='Enable debugging.')
+    @cli.argument('--ignored', action='store_boolean', help='ignoring things.')
+    @cli.argument('--timeout', type=int, help='How long to wait.')
+    @cli.argument('--unset', type=str, help='Never set.')
+    @cli.entrypoint('Build a release.')
+    def main(cli):
+        pass
+
+    @cli.argument('--name', type=str, help='Who to greet.')
+    @cli.argument('--loud', action='store_true', help='Shout the greeting.')
+    @cli.subcommand('Say hello.')
+    def hello(cli):
+        pass
+
+    return cli
+
+
+def test_config_values_use_argument_types(monkeypatch, tmp_path):
+    (tmp_path / 'application.ini').write_text(CONFIG)
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    assert cli.config.general.release == '1.10'
+    assert cli.config.general.answer == 'yes'
+    assert cli.config.general.retries == 3
+    assert cli.config.general.ratio == 2.0
+    assert type(cli.config.general.ratio) is float
+    assert cli.config.general.debug is True
+    assert cli.config.general.ignored is False
+    assert cli.config.general.unset is None
+    assert cli.config.hello.name == '007'
+    assert cli.config.hello.loud is True
+
+
+def test_config_values_without_matching_type(monkeypatch, tmp_path):
+    (tmp_path / 'application.ini').write_text(CONFIG)
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    # Values that don't fit their argument's type, and options without an argument, still have their type guessed
+    assert cli.config.general.timeout == 'forever'
+    assert cli.config.general.untyped == Decimal('1.10')
+
+
+def test_lazy_config_sections_use_argument_types(monkeypatch, tmp_path):
+    (tmp_path / 'application.ini').write_text(CONFIG)
+    cli = _create_milc(monkeypatch, tmp_path, lazy_config_sections=True)
+
+    assert cli.config.hello.name == '007'
+    assert cli.config.general.release == '1.10'
+
+
+def test_native_config_strings_use_argument_types(monkeypatch, tmp_path):
+    (tmp_path / 'application.json').write_text('{"general": {"retries": "5", "ratio": 0.5, "debug": "on"}, "hello": {"name": 7}}')
+    cli = _create_milc(monkeypatch, tmp_path, 'application.json')
+
+    assert cli.config.general.retries == 5
+    assert cli.config.general.ratio == 0.5
+    assert cli.config.general.debug is True
+    assert cli.config.hello.name == 7
+
+
+def test_arguments_registered_after_config_read(monkeypatch, tmp_path):
+    (tmp_path / 'application.ini').write_text('[general]\nrelease = 1.10\n')
+    cli = create_milc(monkeypatch, tmp_path)
+
+    assert cli.config.general.release == Decimal('1.10')
+
+    @cli.argument('--release', type=str, help='Release to build.')
+    @cli.entrypoint('Build a release.')
+    def main(cli):
+        pass
+
+    cli.parse_args()
+    cli.merge_args_into_config()
+
+    assert cli.config.general.release == '1.10'
+    assert cli.config_source.general.release == 'config_file'
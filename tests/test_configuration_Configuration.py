@@ -82,3 +82,28 @@ def test_Configuration_parent_fallback():
     config = configuration_setup()
 
     assert config.a.d == 'arbitrary string'
+
+
+def test_Configuration_views():
+    """Make sure the source and layer views read and write the same records as the values.
+    """
+    config = configuration_setup()
+    config_source = config._view('source')
+    config_source.a.a = 'argument'
+    config_source['a']['e'] = 'config_file'
+
+    assert config_source.a.a == 'argument'
+    assert config_source.a.b is None
+    assert config.a.e is None
+    assert config._view('layer').a.a is None
+    assert config['a']._data['a'].value is True
+    assert config['a']._data['a'].source == 'argument'
+    assert config_source.a is config.a._view('source')
+    assert sorted(config_source.a) == ['a', 'b', 'e']
+
+    del config_source.a['a']
+    assert config.a.a is True
+    assert config_source.a.a is None
+
+    del config.a['b']
+    assert 'b' not in config_source.a
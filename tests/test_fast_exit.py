@@ -0,0 +1,131 @@
+"""Make sure tab completion, --help and --version exit before the expensive parts of startup.
+"""
+import logging
+import os
+import subprocess
+import sys
+
+import milc
+
+from .common import create_milc
+
+APPLICATION = """
+from milc import cli
+
+cli.milc_options(name='application', version='1.2.3')
+
+
+@cli.prerun
+def prerun(cli):
+    print('prerun ran')
+
+
+@cli.entrypoint('Test application.')
+def main(cli):
+    pass
+
+
+@cli.argument('--port', help='Port to flash on.')
+@cli.subcommand('Flash a board.')
+def flash(cli):
+    pass
+
+
+if __name__ == '__main__':
+    cli()
+"""
+
+
+def _create_milc(monkeypatch, tmp_path, argv):
+    """Returns a MILC instance that counts config file reads and prerun calls.
+    """
+    counts = {'read_config_file': 0, 'prerun': 0}
+    read_config_file = milc.milc.MILC._read_config_layers
+
+    def counting_read_config_file(self):
+        counts['read_config_file'] += 1
+        return read_config_file(self)
+
+    monkeypatch.setattr(logging.root, 'handlers', [])
+    monkeypatch.setitem(milc.ansi.ansi_config, 'color', milc.ansi.ansi_config['color'])
+    monkeypatch.setitem(milc.ansi.ansi_config, 'unicode', milc.ansi.ansi_config['unicode'])
+    monkeypatch.setattr(milc.milc.MILC, '_read_config_layers', counting_read_config_file)
+    cli = create_milc(monkeypatch, tmp_path, argv, version='1.2.3')
+
+    @cli.prerun
+    def prerun(cli):
+        counts['prerun'] += 1
+
+    @cli.entrypoint('Test application.')
+    def main(cli):
+        pass
+
+    return cli, counts
+
+
+def _exit_code(cli):
+    """Run `cli` and return the code it exited with.
+    """
+    try:
+        cli()
+    except SystemExit as e:
+        return e.code
+
+    raise AssertionError('cli() did not exit')
+
+
+def test_help_does_not_read_config(monkeypatch, tmp_path, capsys):
+    cli, counts = _create_milc(monkeypatch, tmp_path, ['--help'])
+
+    assert _exit_code(cli) == 0
+    assert counts == {'read_config_file': 0, 'prerun': 0}
+    assert 'Test application.' in capsys.readouterr().out
+
+
+def test_help_initializes_colorama(monkeypatch, tmp_path, capsys):
+    import colorama
+
+    cli, counts = _create_milc(monkeypatch, tmp_path, ['--help'])
+    calls = []
+    monkeypatch.setattr(colorama, 'init', lambda: calls.append(len(cli.args)))
+
+    # Errors and --help are printed from parse_args(), so colorama has to wrap the streams before it runs
+    assert _exit_code(cli) == 0
+    assert calls == [0]
+
+
+def test_version_does_not_read_config(monkeypatch, tmp_path, capsys):
+    cli, counts = _create_milc(monkeypatch, tmp_path, ['--version'])
+
+    assert _exit_code(cli) == 0
+    assert counts == {'read_config_file': 0, 'prerun': 0}
+    assert capsys.readouterr().out == '1.2.3\n'
+
+
+def test_config_read_once_when_running(monkeypatch, tmp_path):
+    cli, counts = _create_milc(monkeypatch, tmp_path, [])
+
+    cli()
+
+    assert counts == {'read_config_file': 1, 'prerun': 1}
+
+
+def test_tab_completion_skips_prerun(tmp_path):
+    (tmp_path / 'application.py').write_text(APPLICATION)
+    output_file = tmp_path / 'completions'
+    comp_line = 'application fl'
+    environment = {
+        **os.environ,
+        '_ARGCOMPLETE': '1',
+        '_ARGCOMPLETE_IFS': '\n',
+        '_ARGCOMPLETE_STDOUT_FILENAME': str(output_file),
+        'COMP_LINE': comp_line,
+        'COMP_POINT': str(len(comp_line)),
+        'XDG_CONFIG_HOME': str(tmp_path / 'config'),
+    }
+
+    result = subprocess.run([sys.executable, str(tmp_path / 'application.py')], capture_output=True, text=True, env=environment)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'prerun ran' not in result.stdout
+    assert output_file.read_text().split() == ['flash']
@@ -0,0 +1,65 @@
+"""Make sure `import milc` stays cheap.
+"""
+import subprocess
+import sys
+
+# Generous enough for slow CI runners, tight enough to catch an eager import of halo/argcomplete/etc.
+IMPORT_TIME_BUDGET_US = 250000
+LAZY_MODULES = ('argcomplete', 'colorama', 'halo', 'hashlib', 'platformdirs', 'spinners', 'sqlite3', 'milc._sparkline')
+
+# Opt-in features, and the stdlib modules only they need
+LAZY_FEATURES = (
+    'json',
+    'pickle',
+    'milc._config_backends',
+    'milc._config_cache',
+    'milc._config_reloader',
+    'milc._config_writer',
+    'milc._manifest',
+    'milc._server',
+    'milc._timings',
+)
+
+
+def _import_times():
+    """Returns a dictionary of module name to cumulative import time in microseconds for `import milc`.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import milc'], capture_output=True, text=True)
+    import_times = {}
+
+    assert result.returncode == 0, result.stderr
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, module = line.split('|')
+        import_times[module.strip()] = int(cumulative)
+
+    return import_times
+
+
+def test_import_milc_defers_optional_backends():
+    """Make sure spinner, completion, color and sparkline backends are not imported by `import milc`.
+    """
+    import_times = _import_times()
+
+    for module in LAZY_MODULES:
+        assert module not in import_times, f'{module} is imported by `import milc`'
+
+
+def test_import_milc_time_budget():
+    """Make sure `import milc` stays under our import time budget.
+    """
+    import_times = _import_times()
+
+    assert import_times['milc'] < IMPORT_TIME_BUDGET_US
+
+
+def test_import_milc_defers_optional_features():
+    """Make sure config writing, backends, caching, reloading, manifests, the server and timings are not imported by `import milc`.
+    """
+    import_times = _import_times()
+
+    for module in LAZY_FEATURES:
+        assert module not in import_times, f'{module} is imported by `import milc`'
@@ -0,0 +1,58 @@
+"""Make sure arguments are found in sys.argv, and the index is rebuilt when it changes.
+"""
+import sys
+from pathlib import Path
+
+from milc._in_argv import _argv_index, _in_argv, _invalidate_argv_index
+
+from .common import create_milc
+
+
+def test_argv_index(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['application', '--name', 'Jane', '--level=3', 'file.txt', '--name=Bob'])
+
+    assert _argv_index() == {
+        'application': (0, None),
+        '--name': (1, None),
+        'Jane': (2, None),
+        '--level': (3, '3'),
+        'file.txt': (4, None),
+    }
+    assert _in_argv('--level')
+    assert not _in_argv('--missing')
+
+    # Looking up more arguments doesn't tokenize sys.argv again
+    assert _argv_index() is _argv_index()
+
+
+def test_argv_index_follows_sys_argv(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['application', '--name'])
+
+    assert _in_argv('--name')
+
+    monkeypatch.setattr(sys, 'argv', ['application', '--level'])
+
+    assert not _in_argv('--name')
+    assert _in_argv('--level')
+
+    sys.argv.append('--name')
+
+    assert _in_argv('--name')
+
+    # Edited in place without changing its length
+    sys.argv[1] = '--verbose'
+    _invalidate_argv_index()
+
+    assert _in_argv('--verbose')
+    assert not _in_argv('--level')
+    assert _argv_index()['--name'] == (2, None)
+
+
+def test_config_file_argument(monkeypatch, tmp_path):
+    cli = create_milc(monkeypatch, tmp_path, [f'--config-file={tmp_path}/a=b.ini'])
+
+    assert cli.find_config_file() == Path(tmp_path, 'a=b.ini')
+
+    monkeypatch.setattr(sys, 'argv', ['application', '--config-file', f'{tmp_path}/c.ini'])
+
+    assert cli.find_config_file() == Path(tmp_path, 'c.ini')
@@ -0,0 +1,95 @@
+"""Make sure a MILC program can be run many times in the same process with cli.invoke().
+"""
+import io
+import os
+import sys
+
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path, env_prefix=None):
+    """Returns a MILC instance with an entrypoint and a `hello` subcommand that report what they were run with.
+    """
+    cli = create_milc(monkeypatch, tmp_path, env_prefix=env_prefix)
+
+    @cli.argument('--name', default='World', help='Who to greet.')
+    @cli.argument('--fail', action='store_true', help='Return False.')
+    @cli.argument('--code', type=int, help='Exit with this code.')
+    @cli.argument('--crash', action='store_true', help='Raise an exception.')
+    @cli.entrypoint('Greet someone.')
+    def main(cli):
+        if cli.args.crash:
+            raise ValueError('crashed')
+
+        if cli.args.code is not None:
+            sys.exit(cli.args.code)
+
+        if cli.args.fail:
+            return False
+
+        return (cli.config.general.name, cli.config_source.general.name)
+
+    @cli.argument('--loud', action='store_true', help='Shout.')
+    @cli.subcommand('Say hello.')
+    def hello(cli):
+        return ('hello', cli.config.hello.loud, sys.stdin.read())
+
+    return cli
+
+
+def test_invoke_twice(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    assert cli.invoke(['--name', 'Jane']) == (('Jane', 'argument'), 0)
+    assert cli.invoke([]) == (('World', None), 0)
+    assert cli.invoke(['hello', '--loud'], stdin=io.StringIO('input')) == (('hello', True, 'input'), 0)
+
+    # The state from before the calls is restored
+    assert sys.argv == ['application']
+    assert len(cli.args) == 0
+    assert cli._subcommand is None
+
+
+def test_invoke_exit_codes(monkeypatch, tmp_path, capsys):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    assert cli.invoke(['--fail']) == (False, 1)
+    assert cli.invoke(['--code', '3']) == (None, 3)
+    assert cli.invoke(['--code', '0']) == (None, 0)
+    assert cli.invoke(['--crash']) == (None, 255)
+    assert cli.invoke(['--no-such-argument']) == (None, 2)
+    assert cli.invoke(['--help']) == (None, 0)
+    assert 'Greet someone.' in capsys.readouterr().out
+
+
+def test_invoke_env(monkeypatch, tmp_path):
+    monkeypatch.delenv('APP_NAME', raising=False)
+    cli = _create_milc(monkeypatch, tmp_path, env_prefix='APP')
+
+    assert cli.invoke([], env={'APP_NAME': 'Jane'}) == (('Jane', 'env_var'), 0)
+    assert cli.invoke([]) == (('World', None), 0)
+    assert cli.invoke(['--name', 'Bob'], env={'APP_NAME': 'Jane'}) == (('Bob', 'argument'), 0)
+    assert 'APP_NAME' not in os.environ
+
+
+def test_invoke_config_file(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path)
+    (tmp_path / 'application.ini').write_text('[general]\nname = Config\n')
+    (tmp_path / 'other.ini').write_text('[general]\nname = Other\n')
+
+    assert cli.invoke([]) == (('Config', 'config_file'), 0)
+    assert cli.invoke(['--config-file', str(tmp_path / 'other.ini')]) == (('Other', 'config_file'), 0)
+    assert cli.invoke([]) == (('Config', 'config_file'), 0)
+
+
+def test_invoke_nested(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    @cli.argument('--name', default='World', help='Who to greet.')
+    @cli.subcommand('Greet someone through another command.')
+    def nested(cli):
+        inner = cli.invoke(['--name', 'Inner'])
+
+        return inner, cli.config.nested.name
+
+    assert cli.invoke(['nested', '--name', 'Outer']) == (((('Inner', 'argument'), 0), 'Outer'), 0)
@@ -0,0 +1,115 @@
+"""Tests for subcommands registered by import path.
+"""
+import os
+import subprocess
+import sys
+
+import milc.milc_interface
+
+APPLICATION = """
+import sys
+
+from milc import cli
+
+cli.milc_options(name='application')
+
+cli.add_subcommand('lazy_commands.flash:flash', 'Flash a board.')
+cli.add_subcommand('lazy_commands.undecorated:erase_board', 'Erase a board.')
+
+
+@cli.entrypoint('Test application.')
+def main(cli):
+    cli.echo('main')
+
+
+@cli.subcommand('Show the loaded command modules.')
+def loaded(cli):
+    cli.echo(','.join(sorted(name for name in sys.modules if name.startswith('lazy_commands.'))))
+
+
+if __name__ == '__main__':
+    cli()
+"""
+
+FLASH = """
+from milc import cli
+
+
+@cli.argument('--port', default='auto', help='Port to flash on.')
+@cli.subcommand('Flash a board.')
+def flash(cli):
+    cli.echo('flash port=%s', cli.config.flash.port)
+"""
+
+UNDECORATED = """
+def erase_board(cli):
+    cli.echo('erase')
+"""
+
+
+def _run(tmp_path, *args):
+    """Write the test application and run it with `args`.
+    """
+    package = tmp_path / 'lazy_commands'
+    package.mkdir(exist_ok=True)
+    (package / '__init__.py').write_text('')
+    (package / 'flash.py').write_text(FLASH)
+    (package / 'undecorated.py').write_text(UNDECORATED)
+    (tmp_path / 'application.py').write_text(APPLICATION)
+    environment = {**os.environ, 'PYTHONPATH': str(tmp_path), 'XDG_CONFIG_HOME': str(tmp_path / 'config')}
+
+    return subprocess.run([sys.executable, str(tmp_path / 'application.py'), '--no-color', *args], capture_output=True, text=True, env=environment)
+
+
+def test_lazy_subcommand_runs_with_its_arguments(tmp_path):
+    result = _run(tmp_path, 'flash', '--port', 'usb0')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == 'flash port=usb0\n'
+
+
+def test_lazy_subcommand_default(tmp_path):
+    result = _run(tmp_path, 'flash')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == 'flash port=auto\n'
+
+
+def test_lazy_subcommand_without_decorator(tmp_path):
+    result = _run(tmp_path, 'erase-board')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == 'erase\n'
+
+
+def test_lazy_subcommand_modules_not_imported(tmp_path):
+    result = _run(tmp_path, 'loaded')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == '\n'
+
+
+def test_lazy_subcommand_listed_in_help(tmp_path):
+    result = _run(tmp_path, '--help')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Flash a board.' in result.stdout
+    assert 'Erase a board.' in result.stdout
+
+
+def test_lazy_subcommand_help(tmp_path):
+    result = _run(tmp_path, 'flash', '--help')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '--port PORT' in result.stdout
+
+
+def test_lazy_subcommand_bad_import_path():
+    cli = milc.milc_interface.MILCInterface()
+
+    try:
+        cli.add_subcommand('lazy_commands.flash', 'Flash a board.')
+    except ValueError:
+        return
+
+    raise AssertionError('add_subcommand() accepted an import path without a function name')
@@ -0,0 +1,147 @@
+"""Tests for the subcommand manifest cache.
+"""
+import os
+import subprocess
+import sys
+
+APPLICATION = """
+import sys
+
+from milc import cli
+
+cli.milc_options(name='application', version='1.0.0')
+
+if not cli.load_manifest():
+    cli.echo('cold start')
+    import manifest_commands.flash
+    import manifest_commands.remote
+
+
+@cli.entrypoint('Test application.')
+def main(cli):
+    cli.echo('main')
+
+
+@cli.subcommand('Show the loaded command modules.')
+def loaded(cli):
+    cli.echo(','.join(sorted(name for name in sys.modules if name.startswith('manifest_commands.'))))
+    cli.echo('flash.port=%s', cli.config.flash.port)
+
+
+if __name__ == '__main__':
+    cli()
+"""
+
+FLASH = """
+from milc import cli
+
+
+@cli.argument('--port', type=str, default='auto', help='Port to flash on.')
+@cli.argument('--erase', action='store_true', arg_only=True, help='Erase before flashing.')
+@cli.subcommand('Flash a board.')
+def flash(cli):
+    cli.echo('flash port=%s erase=%s', cli.config.flash.port, cli.args.erase)
+"""
+
+REMOTE = """
+from milc import cli
+
+
+@cli.subcommand('Manage remotes.')
+def remote(cli):
+    cli.echo('remote')
+
+
+@cli.argument('--url', default='', help='Remote URL.')
+@cli.subcommand('Add a remote.', parent=remote)
+def add(cli):
+    cli.echo('add url=%s', cli.config.remote.add.url)
+"""
+
+
+def _write_application(tmp_path):
+    """Write the test application and its command modules.
+    """
+    package = tmp_path / 'manifest_commands'
+    package.mkdir(exist_ok=True)
+    (package / '__init__.py').write_text('')
+    (package / 'flash.py').write_text(FLASH)
+    (package / 'remote.py').write_text(REMOTE)
+    (tmp_path / 'application.py').write_text(APPLICATION)
+
+
+def _run(tmp_path, *args):
+    """Run the test application with `args`.
+    """
+    environment = {**os.environ, 'PYTHONPATH': str(tmp_path), 'XDG_CONFIG_HOME': str(tmp_path / 'config'), 'XDG_CACHE_HOME': str(tmp_path / 'cache')}
+
+    return subprocess.run([sys.executable, str(tmp_path / 'application.py'), '--no-color', *args], capture_output=True, text=True, env=environment)
+
+
+def test_manifest_written_on_cold_start(tmp_path):
+    _write_application(tmp_path)
+    result = _run(tmp_path, 'loaded')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.startswith('cold start\n')
+    assert (tmp_path / 'cache' / 'application' / 'manifest.json').exists()
+
+
+def test_manifest_warm_start_skips_imports(tmp_path):
+    _write_application(tmp_path)
+    _run(tmp_path, 'loaded')
+    result = _run(tmp_path, 'loaded')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == '\nflash.port=auto\n'
+
+
+def test_manifest_warm_start_runs_subcommand(tmp_path):
+    _write_application(tmp_path)
+    _run(tmp_path, 'loaded')
+    result = _run(tmp_path, 'flash', '--port', 'usb0', '--erase')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == 'flash port=usb0 erase=True\n'
+
+
+def test_manifest_warm_start_runs_nested_subcommand(tmp_path):
+    _write_application(tmp_path)
+    _run(tmp_path, 'loaded')
+    result = _run(tmp_path, 'remote', 'add', '--url', 'https://example.com')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == 'add url=https://example.com\n'
+
+
+def test_manifest_warm_start_help(tmp_path):
+    _write_application(tmp_path)
+    _run(tmp_path, 'loaded')
+    result = _run(tmp_path, '--help')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Flash a board.' in result.stdout
+    assert 'Manage remotes.' in result.stdout
+
+
+def test_manifest_invalidated_by_source_change(tmp_path):
+    _write_application(tmp_path)
+    _run(tmp_path, 'loaded')
+    flash_module = tmp_path / 'manifest_commands' / 'flash.py'
+    flash_stat = flash_module.stat()
+    os.utime(flash_module, ns=(flash_stat.st_atime_ns, flash_stat.st_mtime_ns + 1000000000))
+    result = _run(tmp_path, 'loaded')
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.startswith('cold start\n')
+
+
+def test_manifest_warm_start_config_types(tmp_path):
+    _write_application(tmp_path)
+    (tmp_path / 'config' / 'application').mkdir(parents=True)
+    (tmp_path / 'config' / 'application' / 'application.ini').write_text('[flash]\nport = 0001\n')
+    cold = _run(tmp_path, 'loaded')
+    warm = _run(tmp_path, 'loaded')
+
+    assert cold.stdout == 'cold start\nmanifest_commands.flash,manifest_commands.remote\nflash.port=0001\n'
+    assert warm.stdout == '\nflash.port=0001\n'
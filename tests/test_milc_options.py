@@ -0,0 +1,67 @@
+"""Make sure cli.milc_options() updates MILC in place instead of rebuilding it.
+"""
+import sys
+
+import milc
+
+
+def _create_interface(monkeypatch, tmp_path):
+    """Returns a MILCInterface and a dictionary that counts MILC objects built and config files read.
+    """
+    counts = {'MILC': 0, 'read_config_file': 0}
+    milc_init = milc.milc.MILC.__init__
+    read_config_file = milc.milc.MILC._read_config_layers
+
+    def counting_init(self, *args, **kwargs):
+        counts['MILC'] += 1
+        milc_init(self, *args, **kwargs)
+
+    def counting_read_config_file(self):
+        counts['read_config_file'] += 1
+        return read_config_file(self)
+
+    monkeypatch.setattr(sys, 'argv', ['application'])
+    monkeypatch.setattr(milc.milc, 'user_config_dir', lambda **kwargs: str(tmp_path))
+    monkeypatch.setattr(milc.milc.MILC, '__init__', counting_init)
+    monkeypatch.setattr(milc.milc.MILC, '_read_config_layers', counting_read_config_file)
+
+    return milc.milc_interface.MILCInterface(), counts
+
+
+def test_milc_options_defers_building(monkeypatch, tmp_path):
+    cli, counts = _create_interface(monkeypatch, tmp_path)
+
+    cli.milc_options(name='application')
+    cli.milc_options(author='Jane Doe')
+    cli.milc_options(version='1.2.3')
+
+    assert counts == {'MILC': 0, 'read_config_file': 0}
+    assert cli.milc.prog_name == 'application'
+    assert cli.milc.author == 'Jane Doe'
+    assert cli.milc.version == '1.2.3'
+    assert counts == {'MILC': 1, 'read_config_file': 0}
+
+
+def test_milc_options_after_use(monkeypatch, tmp_path):
+    cli, counts = _create_interface(monkeypatch, tmp_path)
+    (tmp_path / 'library.ini').write_text('[general]\nsource = library\n')
+    (tmp_path / 'application.ini').write_text('[general]\nsource = application\n')
+
+    cli.milc_options(name='library')
+
+    @cli.subcommand('Library subcommand.')
+    def library_command(cli):
+        pass
+
+    assert cli.config.general.source == 'library'
+
+    cli.milc_options(name='application', version='1.2.3')
+
+    assert 'library-command' in cli.subcommands
+    assert cli.milc.author == 'APPLICATION'
+    assert cli.config.general.source == 'application'
+    assert counts == {'MILC': 1, 'read_config_file': 2}
+
+    for action in cli.milc._arg_parser._actions:
+        if action.dest == 'version':
+            assert action.version == '1.2.3'
@@ -0,0 +1,55 @@
+"""Make sure the MILC environment attributes are only computed when they're used.
+"""
+import sys
+
+import milc
+
+
+def _create_milc(monkeypatch, tmp_path):
+    """Returns a MILC instance and a dictionary that counts calls to the expensive environment lookups.
+    """
+    counts = {'platform': 0, 'user_config_dir': 0}
+
+    def counting_platform():
+        counts['platform'] += 1
+        return 'Linux-test'
+
+    def counting_user_config_dir(**kwargs):
+        counts['user_config_dir'] += 1
+        return str(tmp_path)
+
+    monkeypatch.setattr(sys, 'argv', ['application'])
+    monkeypatch.setattr(milc.milc, 'platform', counting_platform)
+    monkeypatch.setattr(milc.milc, 'user_config_dir', counting_user_config_dir)
+
+    return milc.milc.MILC(name='application'), counts
+
+
+def test_environment_not_computed_at_startup(monkeypatch, tmp_path):
+    cli, counts = _create_milc(monkeypatch, tmp_path)
+
+    assert counts == {'platform': 0, 'user_config_dir': 0}
+
+
+def test_platform_memoized(monkeypatch, tmp_path):
+    cli, counts = _create_milc(monkeypatch, tmp_path)
+
+    assert cli.platform == 'Linux-test'
+    assert cli.platform == 'Linux-test'
+    assert counts['platform'] == 1
+
+
+def test_config_file_memoized(monkeypatch, tmp_path):
+    cli, counts = _create_milc(monkeypatch, tmp_path)
+
+    assert cli.config_file == (tmp_path / 'application.ini').resolve()
+    assert cli.config_dir == tmp_path.resolve()
+    assert counts['user_config_dir'] == 1
+
+
+def test_interactive_can_be_overridden(monkeypatch, tmp_path):
+    cli, counts = _create_milc(monkeypatch, tmp_path)
+
+    cli.interactive = True
+
+    assert cli.interactive is True
@@ -0,0 +1,191 @@
+"""Make sure commands run by the resident server behave the same as running the program, and that it exits when the program changes.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import milc
+import milc._server
+from milc._server import MILCServer, server_supported
+
+from .common import create_milc
+
+pytestmark = pytest.mark.skipif(not server_supported(), reason='The resident server needs Unix sockets and fork()')
+
+APP = '''
+import sys
+
+from milc import cli
+
+
+@cli.argument('--name', default='World', help='Who to greet.')
+@cli.entrypoint('Greet someone.')
+def main(cli):
+    cli.echo('Hello, %s!', cli.config.general.name)
+
+    return cli.config.general.name != 'fail'
+
+
+@cli.subcommand('Repeat stdin.')
+def repeat(cli):
+    sys.stdout.write(sys.stdin.read())
+
+
+if __name__ == '__main__':
+    cli()
+'''
+
+CLIENT = Path(milc.__file__).parent / 'client.py'
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Start the resident server for a small program, and stop it afterward.
+    """
+    app = tmp_path / 'app.py'
+    app.write_text(APP)
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(Path(milc.__file__).parent.parent), os.environ.get('PYTHONPATH')])),
+        'XDG_CONFIG_HOME': str(tmp_path / 'config'),
+        'XDG_RUNTIME_DIR': str(tmp_path / 'run'),
+    }
+    socket_path = tmp_path / 'run' / 'app' / 'milc-server.sock'
+    process = subprocess.Popen([sys.executable, str(app), '--milc-server'], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(100):
+        if socket_path.exists():
+            break
+
+        time.sleep(0.05)
+
+    def run(*args, input=None):
+        return subprocess.run([sys.executable, '-S', str(CLIENT), str(socket_path), str(app), *args], env=env, input=input, capture_output=True, text=True, timeout=30)
+
+    yield app, socket_path, process, run
+
+    process.kill()
+    process.wait()
+
+
+def test_server_runs_commands(server):
+    app, socket_path, process, run = server
+
+    assert socket_path.exists()
+
+    result = run('--name', 'Jane')
+    assert (result.returncode, result.stdout) == (0, 'Hello, Jane!\n')
+
+    result = run('--name', 'fail')
+    assert result.returncode == 1
+
+    result = run('--no-such-argument')
+    assert result.returncode == 2
+    assert 'unrecognized arguments' in result.stderr
+
+    result = run('repeat', input='some input\n')
+    assert (result.returncode, result.stdout) == (0, 'some input\n')
+
+    assert process.poll() is None
+
+
+def test_server_config_file(server, tmp_path):
+    app, socket_path, process, run = server
+    config_file = tmp_path / 'config' / 'app' / 'app.ini'
+    config_file.parent.mkdir(parents=True)
+
+    config_file.write_text('[general]\nname = Config\n')
+    assert run().stdout == 'Hello, Config!\n'
+
+    config_file.write_text('[general]\nname = Changed\n')
+    os.utime(config_file, ns=(0, 0))
+    assert run().stdout == 'Hello, Changed!\n'
+
+
+def test_server_malformed_config_file(server, tmp_path):
+    app, socket_path, process, run = server
+    config_file = tmp_path / 'config' / 'app' / 'app.ini'
+    config_file.parent.mkdir(parents=True)
+
+    config_file.write_text('[general\nname = Broken\n')
+    result = run()
+    assert result.returncode != 0
+    assert 'MissingSectionHeaderError' in result.stderr
+    assert process.poll() is None
+
+    config_file.write_text('[general]\nname = Fixed\n')
+    assert run().stdout == 'Hello, Fixed!\n'
+
+
+def test_server_exits_when_program_changes(server):
+    app, socket_path, process, run = server
+    os.utime(app, ns=(0, 0))
+
+    # The client runs the program itself instead
+    result = run('--name', 'Stale')
+    assert (result.returncode, result.stdout) == (0, 'Hello, Stale!\n')
+    assert process.wait(timeout=10) == 0
+    assert not socket_path.exists()
+
+
+def test_client_without_server(tmp_path):
+    app = tmp_path / 'app.py'
+    app.write_text(APP)
+    env = {**os.environ, 'PYTHONPATH': str(Path(milc.__file__).parent.parent), 'XDG_CONFIG_HOME': str(tmp_path / 'config')}
+    result = subprocess.run([sys.executable, '-S', str(CLIENT), str(tmp_path / 'missing.sock'), str(app), '--name', 'Direct'], env=env, capture_output=True, text=True, timeout=30)
+
+    assert (result.returncode, result.stdout) == (0, 'Hello, Direct!\n')
+
+
+def test_server_socket_mode(monkeypatch, tmp_path):
+    cli = create_milc(monkeypatch, tmp_path)
+    server = MILCServer(cli, tmp_path / 'run' / 'milc-server.sock')
+    modes = []
+    chmod = os.chmod
+
+    def record_mode(path, mode):
+        modes.append(os.stat(path).st_mode & 0o777)
+        chmod(path, mode)
+
+    monkeypatch.setattr(milc._server.os, 'chmod', record_mode)
+
+    try:
+        server.listen()
+
+    finally:
+        server.close()
+
+    # Nobody else could connect even before the socket was chmodded
+    assert modes == [0o600]
+
+
+@pytest.mark.parametrize('argv, ran', [
+    (['--milc-server'], ['serve']),
+    (['-v', '--milc-server'], ['serve']),
+    (['say', '--', '--milc-server'], [['--milc-server']]),
+    (['run', 'ls', '--milc-server'], [['ls', '--milc-server']]),
+])
+def test_server_argument(monkeypatch, tmp_path, argv, ran):
+    cli = create_milc(monkeypatch, tmp_path, argv)
+    cli.ran = []
+
+    @cli.argument('words', nargs='*', help='Words to say.')
+    @cli.subcommand('Say something.')
+    def say(cli):
+        cli.ran.append(cli.args.words)
+
+    @cli.argument('command', nargs=argparse.REMAINDER, help='The command to run.')
+    @cli.subcommand('Run a command.')
+    def run(cli):
+        cli.ran.append(cli.args.command)
+
+    monkeypatch.setattr(cli, 'serve', lambda: cli.ran.append('serve'))
+    cli()
+
+    # Only the top level --milc-server starts the server, not the same string passed to a subcommand
+    assert cli.ran == ran
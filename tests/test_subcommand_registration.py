@@ -0,0 +1,90 @@
+"""Make sure registering subcommands stays cheap without changing the help output.
+"""
+import sys
+
+from .common import create_milc
+
+
+def _create_milc(monkeypatch, tmp_path):
+    """Returns a MILC instance with a hidden and several visible subcommands.
+    """
+    cli = create_milc(monkeypatch, tmp_path)
+
+    for index in range(3):
+        cli.add_subcommand(lambda cli: None, f'Subcommand {index}.', name=f'sub-{index}')
+
+    cli.add_subcommand(lambda cli: None, 'Hidden subcommand.', hidden=True, name='secret')
+
+    return cli
+
+
+def test_metavar_built_for_help(monkeypatch, tmp_path, capsys):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    cli.print_usage()
+
+    assert '{sub-0,sub-1,sub-2}' in capsys.readouterr().out
+
+
+def test_metavar_skips_nested_subcommands(monkeypatch, tmp_path, capsys):
+    cli = _create_milc(monkeypatch, tmp_path)
+    cli.add_subcommand(lambda cli: None, 'Nested subcommand.', parent=cli.subcommands['sub-0'].get_default('entrypoint'), name='nested')
+
+    cli.print_usage()
+
+    assert '{sub-0,sub-1,sub-2}' in capsys.readouterr().out
+
+
+def test_subparser_wrapper_delegates(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path)
+    wrapper = cli.subcommands['sub-1']
+
+    assert wrapper.prog == wrapper.subparser.prog
+    assert wrapper.get_default('entrypoint') is wrapper.subparser.get_default('entrypoint')
+    assert 'prog' not in vars(wrapper)
+
+
+def test_parsers_built_on_use(monkeypatch, tmp_path, capsys):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    @cli.argument('--port', default='auto', help='Port to flash on.')
+    @cli.subcommand('Flash a board.')
+    def flash(cli):
+        return cli.config.flash.port
+
+    cli.print_help()
+
+    assert 'Flash a board.' in capsys.readouterr().out
+    assert [wrapper._subparser for wrapper in cli.subcommands.values()] == [None] * 5
+
+    monkeypatch.setattr(sys, 'argv', ['application', 'flash', '--port', 'usb'])
+    cli.parse_args()
+
+    assert cli.args.port == 'usb'
+    assert cli.subcommands['flash']._subparser is not None
+    assert [key for key, wrapper in cli.subcommands.items() if wrapper._subparser is not None] == ['flash']
+
+
+def test_nested_parsers_built_on_use(monkeypatch, tmp_path):
+    cli = _create_milc(monkeypatch, tmp_path)
+
+    @cli.subcommand('Manage remotes.')
+    def remote(cli):
+        pass
+
+    @cli.argument('--url', help='Remote URL.')
+    @cli.subcommand('Add a remote.', parent=remote)
+    def add(cli):
+        pass
+
+    @cli.subcommand('Remove a remote.', parent=remote)
+    def remove(cli):
+        pass
+
+    monkeypatch.setattr(sys, 'argv', ['application', 'remote', 'add', '--url', 'https://example.com/'])
+    cli.parse_args()
+
+    assert cli.args.url == 'https://example.com/'
+    assert cli.args.entrypoint is add
+    assert cli.subcommands['remote.add']._subparser is not None
+    assert cli.subcommands['remote.remove']._subparser is None
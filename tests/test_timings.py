@@ -0,0 +1,84 @@
+"""Make sure --milc-timings and MILC_TIMINGS report how long startup took.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from milc._timings import PhaseTimings
+
+APPLICATION = """
+from milc import cli
+
+cli.milc_options(name='application')
+
+
+@cli.prerun
+def prerun(cli):
+    pass
+
+
+@cli.entrypoint('Test application.')
+def main(cli):
+    print('main ran')
+
+
+if __name__ == '__main__':
+    cli()
+"""
+
+
+def _run(tmp_path, *args, **env):
+    """Run the test application and return the completed process.
+    """
+    (tmp_path / 'application.py').write_text(APPLICATION)
+    environment = {key: value for key, value in os.environ.items() if key != 'MILC_TIMINGS'}
+    environment.update(XDG_CONFIG_HOME=str(tmp_path / 'config'), **env)
+
+    return subprocess.run([sys.executable, str(tmp_path / 'application.py'), *args], capture_output=True, text=True, env=environment)
+
+
+def test_phase_timings_aggregate():
+    timings = PhaseTimings()
+
+    for _ in range(3):
+        with timings.phase('repeated'):
+            pass
+
+    result = timings.as_dict()
+
+    assert [phase['name'] for phase in result['phases']] == ['repeated']
+    assert result['phases'][0]['calls'] == 3
+    assert result['total_ms'] >= result['phases'][0]['total_ms']
+
+
+def test_no_timings_by_default(tmp_path):
+    result = _run(tmp_path)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'main ran\n'
+    assert 'total ms' not in result.stderr
+
+
+def test_milc_timings_argument(tmp_path):
+    result = _run(tmp_path, '--milc-timings')
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'main ran\n'
+
+    for phase in ('argparse build', 'config read', 'parse_args', 'merge_args_into_config', 'setup_logging', 'prerun prerun', 'entrypoint main'):
+        assert phase in result.stderr
+
+
+def test_milc_timings_json(tmp_path):
+    json_file = tmp_path / 'timings.json'
+    result = _run(tmp_path, MILC_TIMINGS=str(json_file))
+
+    assert result.returncode == 0, result.stderr
+
+    timings = json.loads(json_file.read_text())
+    phases = [phase['name'] for phase in timings['phases']]
+
+    assert phases[0] == 'argparse build'
+    assert 'entrypoint main' in phases
+    assert timings['total_ms'] > 0